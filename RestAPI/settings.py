@@ -1,5 +1,6 @@
 from datetime import timedelta
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from environ import Env
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -33,10 +34,13 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication',
+        'app.authentication.StatelessJWTAuthentication',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': (
+        'app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'app.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
 }
 
@@ -44,8 +48,15 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=10),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "SIGNING_KEY": env('SECRET_KEY'),
+    "TOKEN_USER_CLASS": 'app.authentication.APITokenUser',
 }
 
+USER_CACHE_TTL = env.int('USER_CACHE_TTL', default=30)
+
+PASSWORD_HASHING_EXECUTOR = env('PASSWORD_HASHING_EXECUTOR', default='thread')
+PASSWORD_HASHING_WORKERS = env.int('PASSWORD_HASHING_WORKERS', default=2)
+PASSWORD_HASHING_QUEUE = env.int('PASSWORD_HASHING_QUEUE', default=32)
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -55,6 +66,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'app.routing.replica_pin_middleware',
 ]
 
 ROOT_URLCONF = 'RestAPI.urls'
@@ -76,16 +88,59 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'RestAPI.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME' : 'RestAPIs',
-        'USER' : env('USER'),
-        'PASSWORD' : env('MYSQL_PASSWORD'),
-        'HOST': 'localhost',
-        'PORT': '3306'
+ASYNC_READ_VIEWS = env.bool('ASYNC_READ_VIEWS', default=False)
+ASYNC_READ_CONCURRENCY = env.int('ASYNC_READ_CONCURRENCY', default=32)
+
+if env('DATABASE_URL', default=None):
+    DATABASES = {'default': env.db('DATABASE_URL')}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME' : 'RestAPIs',
+            'USER' : env('USER'),
+            'PASSWORD' : env('MYSQL_PASSWORD'),
+            'HOST': 'localhost',
+            'PORT': '3306'
+        }
     }
+
+# async requests run their database work in a new thread each, so persistent connections would pile up
+DATABASE_CONNECTION = {
+    'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=0 if ASYNC_READ_VIEWS else 60),
+    'CONN_HEALTH_CHECKS': True,
 }
+DATABASES['default'].update(DATABASE_CONNECTION)
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # take the write lock when a transaction starts and wait up to SQLITE_TIMEOUT seconds for it,
+    # instead of failing with "database is locked" when a reader upgrades; tests use a file so
+    # that threads share the test database
+    DATABASES['default'].setdefault('OPTIONS', {}).update(
+        {'transaction_mode': 'IMMEDIATE', 'timeout': env.int('SQLITE_TIMEOUT', default=20)})
+    DATABASES['default'].setdefault('TEST', {}).setdefault('NAME', str(BASE_DIR / 'test_db.sqlite3'))
+
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[]), start=1):
+    DATABASES[f'replica{index}'] = {**Env.db_url_config(url), **DATABASE_CONNECTION, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['app.routing.ReplicaRouter']
+REPLICA_PIN_SECONDS = env.int('REPLICA_PIN_SECONDS', default=5)
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# replica pins and token revocations live in the cache and must be seen by every worker
+if DATABASE_REPLICAS and CACHES['default']['BACKEND'] in ('django.core.cache.backends.locmem.LocMemCache',
+                                                          'django.core.cache.backends.dummy.DummyCache'):
+    raise ImproperlyConfigured('DATABASE_REPLICA_URLS needs a CACHE_URL shared by all workers, '
+                               'such as Redis or Memcached')
+
+RESPONSE_CACHE_TIMEOUT = env.int('RESPONSE_CACHE_TIMEOUT', default=300)
+
+PENDING_BOOKING_TTL_MINUTES = env.int('PENDING_BOOKING_TTL_MINUTES', default=1440)
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from app.views import UserRegistrationView, UserLoginView, UserProfileView, HotelViewSet, RoomViewSet, BookingViewSet, ReviewViewSet
+from app.async_views import async_urls
+from app.views import UserRegistrationView, UserLoginView, UserProfileView, UserLogoutView, CatalogImportView, OccupancyReportView, HotelViewSet, RoomViewSet, BookingViewSet, ReviewViewSet
 
 router = DefaultRouter()
 router.register(r'hotels', HotelViewSet)
@@ -8,9 +10,16 @@ router.register(r'rooms', RoomViewSet)
 router.register(r'bookings', BookingViewSet, basename='booking')
 router.register(r'reviews', ReviewViewSet, basename='review')
 
-urlpatterns = [
+user_urlpatterns = [
     path('v1/public/user/register/', UserRegistrationView.as_view(), name="register"),
     path('v1/public/user/login/', UserLoginView.as_view(), name="login"),
     path('v1/public/user/profile/', UserProfileView.as_view(), name="profile"),
-    path('v1/', include(router.urls)),
-]
\ No newline at end of file
+    path('v1/public/user/logout/', UserLogoutView.as_view(), name="logout"),
+    path('v1/admin/import/', CatalogImportView.as_view(), name="catalog-import"),
+    path('v1/admin/analytics/occupancy/', OccupancyReportView.as_view(), name="occupancy-report"),
+]
+
+sync_urlpatterns = [*user_urlpatterns, path('v1/', include(router.urls))]
+async_urlpatterns = [*user_urlpatterns, path('v1/', include(async_urls(router.urls)))]
+
+urlpatterns = async_urlpatterns if settings.ASYNC_READ_VIEWS else sync_urlpatterns
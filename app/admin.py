@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Hotel, Room, Booking, Review
+from .models import User, Hotel, Room, RoomRate, Booking, DailyRollup, Review, Amenity
 
 class UserAdmin(BaseUserAdmin):
     list_display = ('email', 'name', 'is_active', 'is_staff', 'created_at')
@@ -29,7 +29,16 @@ class HotelAdmin(admin.ModelAdmin):
     list_display = ('name', 'city', 'state', 'country', 'rating', 'created_at')
     list_filter = ('city', 'state', 'country', 'rating')
     search_fields = ('name', 'city', 'description')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('rating', 'review_count', 'rating_sum', 'rating_1_count', 'rating_2_count',
+                       'rating_3_count', 'rating_4_count', 'rating_5_count', 'created_at', 'updated_at')
+
+
+
+
+@admin.register(Amenity)
+class AmenityAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug')
+    search_fields = ('name', 'slug')
 
 
 
@@ -44,6 +53,17 @@ class RoomAdmin(admin.ModelAdmin):
 
 
 
+@admin.register(RoomRate)
+class RoomRateAdmin(admin.ModelAdmin):
+    list_display = ('hotel', 'room', 'room_type', 'start_date', 'end_date', 'price_per_night', 'weekdays')
+    list_filter = ('room_type', 'start_date', 'hotel')
+    search_fields = ('hotel__name', 'room__room_number')
+    raw_id_fields = ('room',)
+    readonly_fields = ('created_at', 'updated_at')
+
+
+
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'room', 'check_in_date', 'check_out_date', 'status', 'total_price')
@@ -54,6 +74,16 @@ class BookingAdmin(admin.ModelAdmin):
 
 
 
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'hotel', 'room_type', 'rooms_sold', 'revenue')
+    list_filter = ('room_type', 'date')
+    search_fields = ('hotel__name',)
+    readonly_fields = ('hotel', 'room_type', 'date', 'rooms_sold', 'revenue')
+
+
+
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('user', 'hotel', 'rating', 'created_at')
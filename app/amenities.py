@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+from app.models import Amenity, HotelAmenity, RoomAmenity, amenity_key, parse_amenities
+
+LINKS = {
+    'app.hotel': (HotelAmenity, 'hotel'),
+    'app.room': (RoomAmenity, 'room'),
+}
+
+
+def _hotels_with(amenity_id):
+    return HotelAmenity.objects.filter(amenity_id=amenity_id).values('hotel_id')
+
+
+def _rooms_with(amenity_id):
+    return RoomAmenity.objects.filter(amenity_id=amenity_id).values('room_id')
+
+
+AMENITY_MATCHES = {
+    'app.hotel': lambda amenity_id: Q(pk__in=_hotels_with(amenity_id)),
+    'app.room': lambda amenity_id: Q(pk__in=_rooms_with(amenity_id)) | Q(hotel_id__in=_hotels_with(amenity_id)),
+}
+
+
+def link_amenities(model, objects):
+    """Point the amenity links of saved ``objects`` at what their ``amenities`` text lists now."""
+    link, field = LINKS[model._meta.label_lower]
+    listed = {obj.pk: {amenity_key(name): name for name in parse_amenities(obj.amenities)} for obj in objects}
+    if not listed:
+        return
+    ids = Amenity.objects.ids_for(name for names in listed.values() for name in names.values())
+    wanted = {(pk, ids[key]) for pk, names in listed.items() for key in names}
+    with transaction.atomic():
+        stale, kept = [], set()
+        for pk, owner_id, amenity_id in link.objects.filter(**{f'{field}__in': listed}).values_list(
+                'pk', f'{field}_id', 'amenity_id'):
+            if (owner_id, amenity_id) in wanted:
+                kept.add((owner_id, amenity_id))
+            else:
+                stale.append(pk)
+        if stale:
+            link.objects.filter(pk__in=stale).delete()
+        link.objects.bulk_create([link(**{f'{field}_id': owner_id, 'amenity_id': amenity_id})
+                                  for owner_id, amenity_id in wanted - kept], batch_size=1000, ignore_conflicts=True)
+
+
+def requested_amenities(value):
+    return [name for name in (value or '').split(',') if amenity_key(name)]
+
+
+def require_amenities(queryset, names, ids):
+    """Keep rows offering every amenity, each one an ``IN`` over the (amenity, hotel/room) link index.
+
+    Rooms also offer their hotel's amenities.
+    """
+    if len(ids) < len({amenity_key(name) for name in names}):
+        return queryset.none()
+    match = AMENITY_MATCHES[queryset.model._meta.label_lower]
+    for amenity_id in ids.values():
+        queryset = queryset.filter(match(amenity_id))
+    return queryset
+
+
+def filter_by_amenities(queryset, value):
+    names = requested_amenities(value)
+    if not names:
+        return queryset
+    return require_amenities(queryset, names, Amenity.objects.ids_for(names, create=False))
+
+
+async def afilter_by_amenities(queryset, value):
+    names = requested_amenities(value)
+    if not names:
+        return queryset
+    return require_amenities(queryset, names, await Amenity.objects.aids_for(names))
+
+
+class AmenityFilter(BaseFilterBackend):
+    amenities_param = 'amenities'
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_by_amenities(queryset, request.query_params.get(self.amenities_param))
+
+    async def afilter_queryset(self, request, queryset, view):
+        return await afilter_by_amenities(queryset, request.query_params.get(self.amenities_param))
@@ -0,0 +1,117 @@
+import asyncio
+import weakref
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.http import Http404
+from django.urls import URLPattern
+from rest_framework.response import Response
+from app.streaming import CHUNK_SIZE
+
+_gates = weakref.WeakKeyDictionary()
+
+
+def read_gate():
+    """Semaphore bounding the async reads in flight on this event loop, and so their DB connections."""
+    loop = asyncio.get_running_loop()
+    gate = _gates.get(loop)
+    if gate is None:
+        gate = _gates[loop] = asyncio.Semaphore(getattr(settings, 'ASYNC_READ_CONCURRENCY', 32))
+    return gate
+
+
+class AsyncReadMixin:
+    """Async twins (``alist``, ``aretrieve``, ...) of a viewset's read actions, served by ``async_route``.
+
+    Filter backends and paginators are awaited through their ``afilter_queryset`` and
+    ``apaginate_queryset`` when they have them; rows are fetched with ``aiterator``/``aget``.
+    Lists are shaped like ``QueryPlanMixin.list``, which the viewset must also use.
+    """
+
+    async def afilter_queryset(self, queryset):
+        for backend in self.filter_backends:
+            backend = backend()
+            if hasattr(backend, 'afilter_queryset'):
+                queryset = await backend.afilter_queryset(self.request, queryset, self)
+            else:
+                queryset = backend.filter_queryset(self.request, queryset, self)
+        return queryset
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        if hasattr(self.paginator, 'apaginate_queryset'):
+            return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        return await sync_to_async(self.paginator.paginate_queryset)(queryset, self.request, view=self)
+
+    async def aget_object(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (ObjectDoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.list_queryset(await self.afilter_queryset(self.get_queryset()))
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.serialize_list(page))
+        rows = [row async for row in queryset.aiterator(chunk_size=CHUNK_SIZE)]
+        return Response(self.serialize_list(rows))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return Response(self.get_serializer(await self.aget_object()).data)
+
+
+def async_route(viewset_class, actions, **initkwargs):
+    """Build a coroutine view for ``actions``, like ``viewset_class.as_view(actions)``.
+
+    Requests whose action has an ``a<action>`` method run it on the event loop, behind
+    ``read_gate``; the other actions (writes) run the regular sync view in a thread.
+    """
+    fallback = sync_to_async(viewset_class.as_view(actions, **initkwargs))
+    action_map = {'head': actions['get'], **actions} if 'get' in actions else dict(actions)
+
+    async def view(request, *args, **kwargs):
+        action = action_map.get(request.method.lower())
+        if action is None or not hasattr(viewset_class, f'a{action}'):
+            return await fallback(request, *args, **kwargs)
+        self = viewset_class(**initkwargs)
+        self.action_map = action_map
+        for method, name in action_map.items():
+            setattr(self, method, getattr(self, name))
+        self.args, self.kwargs = args, kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            # authentication checks revocations and replica pins in the cache: keep them off the loop
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            async with read_gate():
+                response = await getattr(self, f'a{self.action}')(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    view.cls = viewset_class
+    view.initkwargs = initkwargs
+    view.actions = actions
+    view.csrf_exempt = True
+    return view
+
+
+def async_urls(patterns):
+    """Re-point router-generated ``patterns`` whose viewset has async read actions at ``async_route``."""
+    routed = []
+    for pattern in patterns:
+        callback = getattr(pattern, 'callback', None)
+        actions = getattr(callback, 'actions', None)
+        if actions and any(hasattr(callback.cls, f'a{name}') for name in actions.values()):
+            pattern = URLPattern(pattern.pattern, async_route(callback.cls, actions, **callback.initkwargs),
+                                 pattern.default_args, pattern.name)
+        routed.append(pattern)
+    return routed
@@ -0,0 +1,153 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
+from app.models import User
+
+USER_CACHE_TTL = 30
+USER_CACHE_SIZE = 10000
+# changing any of these ends the user's sessions: tokens carry ``is_staff`` and are trusted until they expire
+CREDENTIAL_FIELDS = ('is_active', 'is_staff', 'is_superuser', 'password')
+
+
+def issue_tokens(user):
+    """Mint a refresh/access pair carrying the claims the API trusts without a database lookup."""
+    refresh = RefreshToken.for_user(user)
+    refresh['email'] = user.email
+    refresh['is_staff'] = user.is_staff
+    return {'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+
+def _revoked_key(jti):
+    return f'jwt:revoked:{jti}'
+
+
+def _revoked_before_key(user_id):
+    return f'jwt:revoked-before:{user_id}'
+
+
+def revoke_token(token):
+    """Reject a single token (by ``jti``) until it expires anyway."""
+    remaining = int(token['exp'] - time.time())
+    if remaining > 0:
+        cache.set(_revoked_key(token[api_settings.JTI_CLAIM]), True, remaining)
+
+
+def revoke_user_tokens(user_id):
+    """Reject every token issued to the user before the current second."""
+    lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+    # whole seconds like ``iat``: tokens issued from this second on stay valid
+    cache.set(_revoked_before_key(user_id), int(time.time()), int(lifetime.total_seconds()))
+    forget_user(user_id)
+
+
+def stored_credentials(user, using=None):
+    """The ``CREDENTIAL_FIELDS`` of a user as saved in the database, before the changes on the instance."""
+    if user._state.adding or user.pk is None:
+        return None
+    return User.objects.using(using).filter(pk=user.pk).values_list(*CREDENTIAL_FIELDS).first()
+
+
+def credentials_changed(user, stored):
+    return stored is not None and stored != tuple(getattr(user, name) for name in CREDENTIAL_FIELDS)
+
+
+def is_revoked(token):
+    found = cache.get_many([_revoked_key(token[api_settings.JTI_CLAIM]),
+                            _revoked_before_key(token[api_settings.USER_ID_CLAIM])])
+    revoked_before = found.get(_revoked_before_key(token[api_settings.USER_ID_CLAIM]))
+    return _revoked_key(token[api_settings.JTI_CLAIM]) in found or (
+        revoked_before is not None and token.get('iat', 0) < revoked_before)
+
+
+class UserCache:
+    """Process-local cache of ``User`` rows with a short TTL, for the few views that need one."""
+
+    def __init__(self, ttl=USER_CACHE_TTL, size=USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self.users = {}
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.users.get(user_id)
+        if entry and entry[0] > now:
+            return entry[1]
+        user = User.objects.filter(pk=user_id, is_active=True).first()
+        with self.lock:
+            if len(self.users) >= self.size:
+                self.users = {key: value for key, value in self.users.items() if value[0] > now}
+            if user is not None and len(self.users) < self.size:
+                self.users[user_id] = (now + self.ttl, user)
+        return user
+
+    def forget(self, user_id):
+        with self.lock:
+            self.users.pop(user_id, None)
+
+
+user_cache = UserCache(ttl=getattr(settings, 'USER_CACHE_TTL', USER_CACHE_TTL))
+
+
+def forget_user(user_id):
+    user_cache.forget(user_id)
+
+
+def _inactive():
+    return AuthenticationFailed('User is inactive', code='user_inactive')
+
+
+def load_user(user):
+    """Return the ``User`` row behind ``request.user``, which may be a token-backed ``APITokenUser``.
+
+    Raises AuthenticationFailed when the user has since been deactivated or deleted.
+    """
+    if isinstance(user, User):
+        return user
+    row = user_cache.get(user.id)
+    if row is None:
+        raise _inactive()
+    return row
+
+
+class APITokenUser(TokenUser):
+    @property
+    def email(self):
+        return self.token.get('email', '')
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """Authenticate from the token's claims alone and reject revoked tokens.
+
+    ``request.user`` is an ``APITokenUser``; use ``request.user.id`` for lookups and
+    ``load_user`` where the full row is needed. Writes also check that the user is still
+    active (through ``user_cache``), so they never run for a deactivated account.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None and request.method not in SAFE_METHODS and user_cache.get(result[0].id) is None:
+            raise _inactive()
+        return result
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if api_settings.USER_ID_CLAIM in token and is_revoked(token):
+            raise InvalidToken({'detail': 'Token has been revoked', 'code': 'token_revoked'})
+        return token
+
+
+def parse_refresh_token(raw):
+    token = UntypedToken(raw)
+    if token.get(api_settings.TOKEN_TYPE_CLAIM) != 'refresh':
+        raise InvalidToken({'detail': 'Not a refresh token', 'code': 'token_not_valid'})
+    return token
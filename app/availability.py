@@ -0,0 +1,167 @@
+import hashlib
+from datetime import datetime, timedelta
+from django.conf import settings
+from rest_framework import serializers
+from app.amenities import afilter_by_amenities, filter_by_amenities
+from app.caching import CATALOG, aversions, bump, response_cache, versions
+from app.geo import afilter_by_location, filter_by_location
+from app.inventory import booked_room_ids
+from app.models import Hotel, Room
+
+SEARCH_PARAMS = ['city', 'room_type', 'min_price', 'max_price', 'guests', 'amenities', 'lat', 'lng', 'radius', 'bbox']
+MAX_CACHED_IDS = 2000
+MAX_STAY_NIGHTS = 90
+
+
+def parse_stay(params):
+    """Return ``(check_in, check_out)`` when both are given, else None.
+
+    Raises ValueError on bad dates and ValidationError unless ``check_out`` is after ``check_in`` and at
+    most ``MAX_STAY_NIGHTS`` nights later.
+    """
+    check_in, check_out = params.get('check_in'), params.get('check_out')
+    if not (check_in and check_out):
+        return None
+    stay = datetime.strptime(check_in, '%Y-%m-%d').date(), datetime.strptime(check_out, '%Y-%m-%d').date()
+    if stay[1] <= stay[0]:
+        raise serializers.ValidationError({'check_out': ['Check-out date must be after check-in date']})
+    if (stay[1] - stay[0]).days > MAX_STAY_NIGHTS:
+        raise serializers.ValidationError({'check_out': [f'A stay can be at most {MAX_STAY_NIGHTS} nights']})
+    return stay
+
+
+def _filter_listing(queryset, params, stay):
+    city = params.get('city')
+    room_type = params.get('room_type')
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+    guests = params.get('guests')
+
+    queryset = queryset.filter(is_available=True)
+    if city:
+        queryset = queryset.filter(hotel__city__icontains=city)
+    if room_type:
+        queryset = queryset.filter(room_type=room_type)
+    if min_price:
+        queryset = queryset.filter(price_per_night__gte=min_price)
+    if max_price:
+        queryset = queryset.filter(price_per_night__lte=max_price)
+    if guests:
+        queryset = queryset.filter(max_occupancy__gte=guests)
+    if stay:
+        queryset = queryset.exclude(id__in=booked_room_ids(*stay))
+    return queryset
+
+
+def filter_available_rooms(queryset, params, stay):
+    queryset = _filter_listing(queryset, params, stay)
+    if params.get('amenities'):
+        queryset = filter_by_amenities(queryset, params['amenities'])
+    return filter_by_location(queryset, Hotel.objects.all(), params, hotel_field='hotel')
+
+
+async def afilter_available_rooms(queryset, params, stay):
+    queryset = _filter_listing(queryset, params, stay)
+    if params.get('amenities'):
+        queryset = await afilter_by_amenities(queryset, params['amenities'])
+    return await afilter_by_location(queryset, Hotel.objects.all(), params, hotel_field='hotel')
+
+
+def _city(name):
+    return name.strip().lower()
+
+
+def _week(day):
+    return day.toordinal() // 7
+
+
+def _cities_key(text, tokens):
+    return 'availability:cities:' + hashlib.md5(f'{_city(text)}|{"|".join(tokens)}'.encode(),
+                                                usedforsecurity=False).hexdigest()
+
+
+def _timeout():
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def matching_cities(text):
+    """Cities (normalized) that a ``city`` search term matches, cached until any hotel changes."""
+    key = _cities_key(text, versions([CATALOG, 'hotels']))
+    cities = response_cache().get(key)
+    if cities is None:
+        cities = sorted({_city(city) for city in Hotel.objects.filter(city__icontains=text)
+                         .values_list('city', flat=True).distinct()})
+        response_cache().set(key, cities, _timeout())
+    return cities
+
+
+async def amatching_cities(text):
+    key = _cities_key(text, await aversions([CATALOG, 'hotels']))
+    cities = await response_cache().aget(key)
+    if cities is None:
+        cities = sorted({_city(city) async for city in Hotel.objects.filter(city__icontains=text)
+                         .values_list('city', flat=True).distinct()})
+        await response_cache().aset(key, cities, _timeout())
+    return cities
+
+
+def _dependencies(stay, cities):
+    names = [CATALOG, 'rooms']
+    if stay:
+        names.extend(f'availability:{city}:{week}' for city in cities
+                     for week in range(_week(stay[0]), _week(stay[1] - timedelta(days=1)) + 1))
+    return names
+
+
+def _ids_key(params, stay, tokens):
+    query = sorted((name, _city(params[name]) if name == 'city' else params[name].strip())
+                   for name in SEARCH_PARAMS if params.get(name))
+    return 'availability:rooms:' + hashlib.md5(f'{query}|{stay}|{"|".join(tokens)}'.encode(),
+                                               usedforsecurity=False).hexdigest()
+
+
+
+
+def available_room_ids(queryset, params, stay):
+    """Return the ids of the available rooms for a search, or None when too many rooms match to cache.
+
+    Results are keyed on the normalized search and stay dates, and on version tokens per
+    ``(city, week)`` the stay touches; booking changes only replace the tokens of their own
+    city and weeks (see ``invalidate_availability``).
+    """
+    cities = matching_cities(params['city']) if stay and params.get('city') else ['*']
+    key = _ids_key(params, stay, versions(_dependencies(stay, cities)))
+    ids = response_cache().get(key)
+    if ids is None:
+        rooms = filter_available_rooms(queryset, params, stay).values_list('pk', flat=True)
+        ids = list(rooms[:MAX_CACHED_IDS + 1])
+        if len(ids) > MAX_CACHED_IDS:
+            return None
+        response_cache().set(key, ids, _timeout())
+    return ids
+
+
+async def aavailable_room_ids(queryset, params, stay):
+    cities = await amatching_cities(params['city']) if stay and params.get('city') else ['*']
+    key = _ids_key(params, stay, await aversions(_dependencies(stay, cities)))
+    ids = await response_cache().aget(key)
+    if ids is None:
+        rooms = (await afilter_available_rooms(queryset, params, stay)).values_list('pk', flat=True)
+        ids = [pk async for pk in rooms[:MAX_CACHED_IDS + 1]]
+        if len(ids) > MAX_CACHED_IDS:
+            return None
+        await response_cache().aset(key, ids, _timeout())
+    return ids
+
+
+def invalidate_availability(nights):
+    """Drop cached searches overlapping the given ``(room_id, date)`` nights in the rooms' cities."""
+    nights = list(nights)
+    if not nights:
+        return
+    cities = dict(Room.objects.filter(pk__in={room_id for room_id, _ in nights}).values_list('pk', 'hotel__city'))
+    names = set()
+    for room_id, day in nights:
+        names.add(f'availability:*:{_week(day)}')
+        names.add(f'availability:{_city(cities.get(room_id, ""))}:{_week(day)}')
+    bump(*names)
@@ -0,0 +1,348 @@
+import asyncio
+import json
+import math
+import platform
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from asgiref.sync import ThreadSensitiveContext
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import include, path, reverse
+from rest_framework.test import APIClient
+from api.urls import async_urlpatterns, sync_urlpatterns
+from app.models import Booking, Hotel, Room, User
+
+BENCHMARK_EMAIL = 'benchmark@example.com'
+BENCHMARK_PASSWORD = 'benchmark-password'
+PERCENTILES = [50, 95, 99]
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile: the smallest sample with at least ``pct`` percent of samples at or below it."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, math.ceil(pct * len(ordered) / 100) - 1))
+    return ordered[index]
+
+
+def summarize(name, method, path, timings, queries, sizes, errors, wall=None):
+    total = sum(timings)
+    wall = wall or total
+    summary = {'name': name, 'method': method.upper(), 'path': path, 'requests': len(timings), 'errors': errors,
+               'mean_ms': round(total / len(timings) * 1000, 3) if timings else 0.0,
+               'throughput_rps': round(len(timings) / wall, 1) if wall else 0.0,
+               'queries': {'mean': round(sum(queries) / len(queries), 2) if queries else 0, 'max': max(queries, default=0)},
+               'bytes': {'mean': round(sum(sizes) / len(sizes)) if sizes else 0, 'max': max(sizes, default=0)}}
+    for pct in PERCENTILES:
+        summary[f'p{pct}_ms'] = round(percentile(timings, pct) * 1000, 3)
+    return summary
+
+
+def benchmark_login(client):
+    """Return the benchmark user, created on first use, and a fresh access token for it."""
+    user = User.objects.filter(email=BENCHMARK_EMAIL).first()
+    if user is None:
+        user = User.objects.create_user(email=BENCHMARK_EMAIL, name='Benchmark', password=BENCHMARK_PASSWORD)
+    response = client.post(reverse('login'), {'email': BENCHMARK_EMAIL, 'password': BENCHMARK_PASSWORD}, format='json')
+    return user, response.json()['access']
+
+
+def first_free_day():
+    """A day well past the last check-out in the database, so benchmark stays never collide."""
+    last = Booking.objects.order_by('-check_out_date').values_list('check_out_date', flat=True).first()
+    return max(date.today(), last or date.today()) + timedelta(days=30)
+
+
+class BenchmarkRunner:
+    """Drive the public API routes in-process and time them.
+
+    Every request goes through the full middleware, authentication and serialization stack via
+    ``APIClient``. Each endpoint is called ``warmup`` times before ``iterations`` measured calls;
+    SQL queries are counted with ``CaptureQueriesContext`` and sizes are taken from the rendered
+    (or fully consumed streaming) body.
+    """
+
+    def __init__(self, iterations=50, warmup=5, only=None, log=None):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.only = set(only or [])
+        self.log = log or (lambda message: None)
+        self.client = APIClient()
+        self.run_id = uuid.uuid4().hex[:8]
+
+    @property
+    def calls(self):
+        return self.warmup + self.iterations
+
+    def setup(self):
+        self.user, self.token = benchmark_login(self.client)
+        self.rooms = list(Room.objects.filter(is_available=True).order_by('pk').values_list('pk', 'hotel_id')[:self.calls])
+        if not self.rooms:
+            raise ValueError('The benchmark database has no rooms; generate a dataset first')
+        self.city = Hotel.objects.values_list('city', flat=True).order_by('pk').first()
+        self.today = date.today()
+        self.first_free_day = first_free_day()
+        past = self.today - timedelta(days=30)
+        Booking.objects.bulk_create([
+            Booking(user=self.user, room_id=room_id, check_in_date=past, check_out_date=past + timedelta(days=2),
+                    guests=1, total_price=0, status='completed')
+            for room_id, _ in (self.rooms * self.calls)[:self.calls]])
+        self.reviewable = list(Booking.objects.filter(user=self.user, status='completed', review__isnull=True)
+                               .order_by('pk').values_list('pk', 'room__hotel_id')[:self.calls])
+        self.created_bookings = []
+
+    def scenarios(self):
+        check_in = self.today + timedelta(days=14)
+        search = f'check_in={check_in}&check_out={check_in + timedelta(days=3)}&city={self.city}&guests=2'
+        return [
+            ('register', 'post', False, lambda i: (reverse('register'), {
+                'email': f'bench-{self.run_id}-{i}@example.com', 'name': 'Bench', 'password': 'x' * 12,
+                'password2': 'x' * 12})),
+            ('login', 'post', False, lambda i: (reverse('login'), {
+                'email': BENCHMARK_EMAIL, 'password': BENCHMARK_PASSWORD})),
+            ('profile', 'get', True, lambda i: (reverse('profile'), None)),
+            ('hotels_list', 'get', False, lambda i: ('/api/v1/hotels/', None)),
+            ('hotels_search', 'get', False, lambda i: (f'/api/v1/hotels/?search={self.city}&ordering=-rating', None)),
+            ('rooms_search_available', 'get', False, lambda i: (f'/api/v1/rooms/search_available/?{search}', None)),
+            ('bookings_create', 'post', True, self.booking_request),
+            ('bookings_list', 'get', True, lambda i: ('/api/v1/bookings/', None)),
+            ('bookings_cancel', 'post', True, lambda i: (
+                f'/api/v1/bookings/{self.created_bookings[i % len(self.created_bookings)]}/cancel/', None)),
+            ('reviews_list', 'get', True, lambda i: ('/api/v1/reviews/', None)),
+            ('reviews_create', 'post', True, lambda i: ('/api/v1/reviews/', {
+                'hotel': self.reviewable[i][1], 'booking': self.reviewable[i][0], 'rating': 4,
+                'comment': 'Benchmark stay'})),
+        ]
+
+    def booking_request(self, i):
+        room_id, _ = self.rooms[i % len(self.rooms)]
+        check_in = self.first_free_day + timedelta(days=3 * (i // len(self.rooms)))
+        return '/api/v1/bookings/', {'room': room_id, 'check_in_date': str(check_in),
+                                     'check_out_date': str(check_in + timedelta(days=2)), 'guests': 1}
+
+    def run(self):
+        self.setup()
+        results = []
+        for name, method, authenticated, build in self.scenarios():
+            if self.only and name not in self.only:
+                continue
+            if name == 'bookings_cancel' and not self.created_bookings:
+                self.log('bookings_cancel: skipped, it cancels the bookings made by bookings_create')
+                continue
+            self.client.credentials(**({'HTTP_AUTHORIZATION': f'Bearer {self.token}'} if authenticated else {}))
+            results.append(self.measure(name, method, build))
+            self.log(f"{name}: p50 {results[-1]['p50_ms']}ms p95 {results[-1]['p95_ms']}ms "
+                     f"{results[-1]['queries']['mean']} queries {results[-1]['bytes']['mean']} bytes")
+        self.client.credentials()
+        return {'run_id': self.run_id, 'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(), 'database': connection.vendor,
+                'iterations': self.iterations, 'warmup': self.warmup, 'results': results}
+
+    def measure(self, name, method, build):
+        timings, queries, sizes, errors = [], [], [], 0
+        path = None
+        for i in range(self.calls):
+            path, payload = build(i)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(self.client, method)(path, payload, format='json')
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+                elapsed = time.perf_counter() - started
+            if name == 'bookings_create' and response.status_code == 201:
+                self.created_bookings.append(response.data['id'])
+            if i < self.warmup:
+                continue
+            errors += response.status_code >= 400
+            timings.append(elapsed)
+            queries.append(len(captured.captured_queries))
+            sizes.append(len(body))
+        return summarize(name, method, path.split('?')[0], timings, queries, sizes, errors)
+
+
+async def _timed(client, method, path, **kwargs):
+    started = time.perf_counter()
+    response = await getattr(client, method)(path, **kwargs)
+    return time.perf_counter() - started, response.status_code
+
+
+async def _read_load(client, paths, requests, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+
+    async def read(i):
+        async with gate:
+            return await _timed(client, 'get', paths[i % len(paths)])
+    started = time.perf_counter()
+    samples = await asyncio.gather(*(read(i) for i in range(requests)))
+    return samples, time.perf_counter() - started
+
+
+async def _login_storm(reads, readers, logins, login_concurrency):
+    client = AsyncClient()
+    paths = ['/api/v1/hotels/', '/api/v1/rooms/', '/api/v1/hotels/?ordering=-rating']
+    quiet = await _read_load(client, paths, reads, readers)
+    gate = asyncio.Semaphore(login_concurrency)
+
+    async def login():
+        async with gate:
+            return await _timed(client, 'post', reverse('login'), content_type='application/json',
+                                data={'email': BENCHMARK_EMAIL, 'password': BENCHMARK_PASSWORD})
+    started = time.perf_counter()
+    storm, attempts = await asyncio.gather(_read_load(client, paths, reads, readers),
+                                           asyncio.gather(*(login() for _ in range(logins))))
+    return quiet, storm, (attempts, time.perf_counter() - started)
+
+
+def login_storm(reads=200, readers=4, logins=100, login_concurrency=50):
+    """Compare hotel and room read latency alone and during a burst of concurrent logins.
+
+    Requests go through Django's ASGI handler, as under ``RestAPI/asgi.py``: the async read views
+    share the event loop with the async login view, which hashes in ``app.hashing.hashing_pool``.
+    """
+    with override_settings(ROOT_URLCONF=AsyncURLConf):
+        quiet, storm, attempts = asyncio.run(_login_storm(reads, readers, logins, login_concurrency))
+
+    def summary(name, measured, method='get', path='/api/v1/hotels/ /api/v1/rooms/'):
+        samples, wall = measured
+        return summarize(name, method, path, [elapsed for elapsed, _ in samples], [], [],
+                         sum(code >= 400 for _, code in samples), wall=wall)
+    results = [summary('reads_quiet', quiet), summary('reads_during_login_storm', storm),
+               summary('login_storm', attempts, 'post', reverse('login'))]
+    results[-1]['rejected'] = sum(code == 503 for _, code in attempts[0])
+    return results
+
+
+class SyncURLConf:
+    """URLconf serving the API without the async read views (as with ``ASYNC_READ_VIEWS=False``)."""
+    urlpatterns = [path('api/', include(sync_urlpatterns))]
+
+
+class AsyncURLConf:
+    """URLconf serving the API with the async read views (as under ``RestAPI/asgi.py``)."""
+    urlpatterns = [path('api/', include(async_urlpatterns))]
+
+
+def _book(token, payloads):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    try:
+        samples = []
+        for payload in payloads:
+            started = time.perf_counter()
+            response = client.post('/api/v1/bookings/', payload, format='json')
+            samples.append((time.perf_counter() - started, response.status_code))
+        return samples
+    finally:
+        connection.close()
+
+
+def booking_throughput(bookings=96, concurrency=8):
+    """Bookings per second on distinct rooms, made by one worker and then by ``concurrency`` workers.
+
+    Stays on different rooms share no room-nights, so the rate should grow with the workers. Each
+    worker thread has its own database connection; use a database that accepts concurrent writers.
+    """
+    _, token = benchmark_login(APIClient())
+    rooms = list(Room.objects.filter(is_available=True).order_by('pk').values_list('pk', flat=True)[:bookings])
+    if not rooms:
+        raise ValueError('The benchmark database has no rooms; generate a dataset first')
+    results = []
+    for workers in (1, concurrency):
+        start = first_free_day()
+        payloads = [{'room': rooms[i % len(rooms)], 'guests': 1,
+                     'check_in_date': str(start + timedelta(days=3 * (i // len(rooms)))),
+                     'check_out_date': str(start + timedelta(days=3 * (i // len(rooms)) + 2))}
+                    for i in range(bookings)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(workers) as pool:
+            batches = list(pool.map(lambda worker: _book(token, payloads[worker::workers]), range(workers)))
+        wall = time.perf_counter() - started
+        samples = [sample for batch in batches for sample in batch]
+        results.append(summarize(f'bookings_distinct_c{workers}', 'post', '/api/v1/bookings/',
+                                 [elapsed for elapsed, _ in samples], [], [],
+                                 sum(code != 201 for _, code in samples), wall=wall))
+    single = results[0]['throughput_rps']
+    results[-1]['speedup'] = round(results[-1]['throughput_rps'] / single, 2) if single else 0.0
+    return results
+
+
+SERVER_PATHS = ['/api/v1/hotels/', '/api/v1/hotels/?ordering=-rating', '/api/v1/rooms/',
+                '/api/v1/rooms/search_available/?city=a&check_in={check_in}&check_out={check_out}']
+
+
+def _wsgi_load(paths, requests, concurrency):
+    def read(indexes):
+        client = Client()
+        try:
+            return [_wsgi_get(client, paths[i % len(paths)]) for i in indexes]
+        finally:
+            connection.close()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        batches = list(pool.map(read, [range(worker, requests, concurrency) for worker in range(concurrency)]))
+    return [sample for batch in batches for sample in batch], time.perf_counter() - started
+
+
+def _wsgi_get(client, path):
+    started = time.perf_counter()
+    response = client.get(path)
+    return time.perf_counter() - started, response.status_code
+
+
+async def _asgi_load(paths, requests, concurrency):
+    client = AsyncClient()
+    gate = asyncio.Semaphore(concurrency)
+
+    async def read(i):
+        # like ASGIHandler, give each request its own thread for sync work (and DB connection)
+        async with gate, ThreadSensitiveContext():
+            return await _timed(client, 'get', paths[i % len(paths)])
+    started = time.perf_counter()
+    samples = await asyncio.gather(*(read(i) for i in range(requests)))
+    return samples, time.perf_counter() - started
+
+
+def compare_servers(requests=400, concurrency=16):
+    """Read throughput and latency of the hotel and room routes, sync views under WSGI vs async views under ASGI.
+
+    Response caching is off so every request reaches the database.
+    """
+    check_in = date.today() + timedelta(days=30)
+    paths = [route.format(check_in=check_in, check_out=check_in + timedelta(days=3)) for route in SERVER_PATHS]
+    with override_settings(RESPONSE_CACHE_TIMEOUT=0):
+        with override_settings(ROOT_URLCONF=SyncURLConf):
+            wsgi = _wsgi_load(paths, requests, concurrency)
+        with override_settings(ROOT_URLCONF=AsyncURLConf):
+            asgi = asyncio.run(_asgi_load(paths, requests, concurrency))
+
+    def summary(name, measured):
+        samples, wall = measured
+        return summarize(name, 'get', '/api/v1/hotels/ /api/v1/rooms/', [elapsed for elapsed, _ in samples], [], [],
+                         sum(code >= 400 for _, code in samples), wall=wall)
+    return [summary(f'reads_wsgi_c{concurrency}', wsgi), summary(f'reads_asgi_c{concurrency}', asgi)]
+
+
+def compare(results, baseline, threshold=0.2):
+    """Return regressions of ``results`` against a ``baseline`` run.
+
+    A regression is a p95 more than ``threshold`` slower, or more SQL queries per request.
+    """
+    previous = {entry['name']: entry for entry in baseline['results']}
+    regressions = []
+    for entry in results['results']:
+        before = previous.get(entry['name'])
+        if before is None:
+            continue
+        if before['p95_ms'] and entry['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append(f"{entry['name']}: p95 {before['p95_ms']}ms -> {entry['p95_ms']}ms")
+        if entry['queries']['mean'] > before['queries']['mean']:
+            regressions.append(f"{entry['name']}: queries {before['queries']['mean']} -> {entry['queries']['mean']}")
+    return regressions
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
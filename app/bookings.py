@@ -0,0 +1,143 @@
+import random
+import time
+from collections import defaultdict
+from django.db import IntegrityError, OperationalError, connection, transaction
+from rest_framework import serializers
+from app.models import Booking, Room, RoomNight
+from app.inventory import booking_nights, stay_dates
+from app.availability import invalidate_availability
+from app.pricing import quote_stays, room_row, to_decimal
+from app.rollups import booking_sale, record_sales
+
+MAX_ATTEMPTS = 4
+RETRY_DELAY = 0.02
+UNAVAILABLE_MESSAGE = "Room is not available for the selected dates"
+
+
+def conflicting_nights(room, check_in, check_out, exclude_booking=None):
+    nights = RoomNight.objects.filter(room=room, date__gte=check_in, date__lt=check_out)
+    if exclude_booking is not None and exclude_booking.pk:
+        nights = nights.exclude(booking=exclude_booking)
+    return nights
+
+
+def _still_conflicts(serializer, instance):
+    data = serializer.validated_data
+
+    def get(name):
+        return data.get(name, getattr(instance, name, None))
+    return conflicting_nights(get('room'), get('check_in_date'), get('check_out_date'), instance).exists()
+
+
+def save_booking(serializer, **kwargs):
+    """Save a BookingSerializer, relying on the room-night unique constraint to reject overlaps.
+
+    Only bookings that compete for the same room-nights contend with each other. A unique
+    violation backed by a committed booking is reported as a validation error; deadlocks,
+    lock timeouts and violations whose competing transaction rolled back are retried, at most
+    ``MAX_ATTEMPTS`` times over a fraction of a second. That covers MySQL deadlocks, not a busy
+    SQLite file: there, writers queue on the connection's lock timeout (``SQLITE_TIMEOUT``)
+    and a timeout that still expires is raised.
+    """
+    instance = serializer.instance
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        serializer.instance = instance
+        try:
+            with transaction.atomic():
+                return serializer.save(**kwargs)
+        except IntegrityError:
+            if attempt == MAX_ATTEMPTS or _still_conflicts(serializer, instance):
+                raise serializers.ValidationError({'non_field_errors': [UNAVAILABLE_MESSAGE]})
+        except OperationalError:
+            if attempt == MAX_ATTEMPTS:
+                raise
+        time.sleep(RETRY_DELAY * 2 ** attempt * random.random())
+
+
+def _claim_nights(items, errors, rooms):
+    requested = [(index, data) for index, data in items.items() if data['room'] in rooms]
+    if not requested:
+        return
+    taken = set(RoomNight.objects.filter(
+        room_id__in={data['room'] for _, data in requested},
+        date__gte=min(data['check_in_date'] for _, data in requested),
+        date__lt=max(data['check_out_date'] for _, data in requested),
+    ).values_list('room_id', 'date'))
+    for index, data in requested:
+        if data.get('status', 'pending') not in Booking.ACTIVE_STATUSES:
+            continue
+        nights = {(data['room'], day) for day in stay_dates(data['check_in_date'], data['check_out_date'])}
+        if nights & taken:
+            errors[index] = {'non_field_errors': [UNAVAILABLE_MESSAGE]}
+        else:
+            taken |= nights
+
+
+def _bulk_create_and_read_pks(bookings):
+    """``bulk_create`` on backends that do not return the new rows' pks (MySQL), then read them back.
+
+    The new rows are those above the newest pk before the insert, matched to ``bookings`` by
+    ``(room, check_in, check_out)``; all of them belong to one user.
+    """
+    last_pk = Booking.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    Booking.objects.bulk_create(bookings)
+    created = defaultdict(list)
+    for pk, *stay in (Booking.objects.filter(pk__gt=last_pk, user_id=bookings[0].user_id,
+                                             room_id__in={booking.room_id for booking in bookings})
+                      .order_by('pk').values_list('pk', 'room_id', 'check_in_date', 'check_out_date')):
+        created[tuple(stay)].append(pk)
+    for booking in bookings:
+        booking.pk = created[booking.room_id, booking.check_in_date, booking.check_out_date].pop(0)
+
+
+def _insert(bookings):
+    if connection.features.can_return_rows_from_bulk_insert:
+        Booking.objects.bulk_create(bookings)
+    else:
+        _bulk_create_and_read_pks(bookings)
+    nights = [night for booking in bookings for night in booking_nights(booking)]
+    RoomNight.objects.bulk_create(nights)
+    invalidate_availability((night.room_id, night.date) for night in nights)
+    record_sales(added=[booking_sale(booking) for booking in bookings])
+
+
+def create_bookings(user, items, errors, atomic=True):
+    """Create many bookings with one overlap query and one batched quote.
+
+    ``items`` maps request positions to validated data whose ``room`` is a primary key, and
+    ``errors`` maps positions to per-item errors; it is extended in place. With ``atomic``
+    nothing is written unless every item is valid. Returns the created bookings by position.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        rooms = Room.objects.select_related('hotel').in_bulk({data['room'] for data in items.values()})
+        failed = dict(errors)
+        for index, data in items.items():
+            if data['room'] not in rooms:
+                failed[index] = {'room': [f'Invalid pk "{data["room"]}" - object does not exist.']}
+        _claim_nights(items, failed, rooms)
+
+        valid = [index for index in items if index not in failed]
+        totals = quote_stays([room_row(rooms[items[index]['room']]) for index in valid],
+                             [(items[index]['check_in_date'], items[index]['check_out_date']) for index in valid])
+        bookings = {}
+        for index, total in zip(valid, totals.tolist()):
+            data = items[index]
+            bookings[index] = Booking(**{**data, 'room': rooms[data['room']]}, user=user, total_price=to_decimal(total))
+        if not bookings or (atomic and failed):
+            errors.update(failed)
+            return {}
+        try:
+            with transaction.atomic():
+                _insert(list(bookings.values()))
+        except IntegrityError:
+            if attempt == MAX_ATTEMPTS:
+                raise serializers.ValidationError({'non_field_errors': [UNAVAILABLE_MESSAGE]})
+        except OperationalError:
+            if attempt == MAX_ATTEMPTS:
+                raise
+        else:
+            errors.update(failed)
+            return bookings
+        for booking in bookings.values():
+            booking.pk = None
+        time.sleep(RETRY_DELAY * 2 ** attempt * random.random())
@@ -0,0 +1,181 @@
+import hashlib
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.fields import DateTimeField
+from rest_framework.response import Response
+from app.models import Room
+
+CATALOG = 'catalog'
+
+
+def response_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def _version_key(name):
+    return f'api:version:{name}'
+
+
+def versions(names):
+    """Return the current token of each dependency, creating missing (or evicted) ones."""
+    cache = response_cache()
+    keys = [_version_key(name) for name in names]
+    found = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        for key, token in missing.items():
+            cache.add(key, token, None)
+        found.update(cache.get_many(list(missing)))
+    return [found.get(key, '') for key in keys]
+
+
+async def aversions(names):
+    cache = response_cache()
+    keys = [_version_key(name) for name in names]
+    found = await cache.aget_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        for key, token in missing.items():
+            await cache.aadd(key, token, None)
+        found.update(await cache.aget_many(list(missing)))
+    return [found.get(key, '') for key in keys]
+
+
+def bump(*names):
+    """Invalidate every cached response depending on ``names``.
+
+    Tokens are replaced now and again on commit, so responses cached by other requests while the
+    transaction was still open are dropped as well.
+    """
+    def replace():
+        response_cache().set_many({_version_key(name): uuid.uuid4().hex for name in names}, None)
+    replace()
+    transaction.on_commit(replace)
+
+
+def invalidate_hotels(hotel_ids, rooms=True):
+    names = ['hotels', *(f'hotels:{pk}' for pk in hotel_ids)]
+    if rooms:
+        names.append('rooms')
+        names.extend(f'rooms:{pk}' for pk in Room.objects.filter(hotel_id__in=hotel_ids).values_list('pk', flat=True))
+    bump(*names)
+
+
+def invalidate_rooms(room_ids):
+    bump('rooms', *(f'rooms:{pk}' for pk in room_ids))
+
+
+def invalidate_catalog():
+    bump(CATALOG)
+
+
+def _results(data):
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return data['results']
+    return data if isinstance(data, list) else [data]
+
+
+def _etag(path, tokens, items):
+    digest = hashlib.md5(path.encode(), usedforsecurity=False)
+    digest.update('|'.join(tokens).encode())
+    for item in items:
+        digest.update(f"|{item.get('id')}:{item.get('updated_at')}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _last_modified(items):
+    stamps = [item['updated_at'] for item in items if isinstance(item, dict) and item.get('updated_at')]
+    if not stamps:
+        return None
+    return http_date(max(DateTimeField().to_internal_value(stamp) for stamp in stamps).timestamp())
+
+
+def _not_modified(request, entry):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        return entry['etag'] in {tag.strip() for tag in if_none_match.split(',')} or if_none_match.strip() == '*'
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+    modified = parse_http_date_safe(entry['last_modified'] or '')
+    return since is not None and modified is not None and modified <= since
+
+
+class CachedReadMixin:
+    """Cache ``list`` and ``retrieve`` responses and answer conditional GETs.
+
+    Entries are keyed on the absolute URL (pagination links embed the host) and on version tokens of what they depend on: the whole
+    collection for lists, the single object for retrieves. Writes replace those tokens (see
+    ``app.signals``), so stale entries are never read again and simply expire. ETags hash the
+    tokens with each object's ``id`` and ``updated_at``; Last-Modified is the newest ``updated_at``.
+    """
+    cache_scope = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, [self.cache_scope], super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, self.object_dependencies(kwargs), super().retrieve, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.acached_response(request, [self.cache_scope], super().alist, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.acached_response(request, self.object_dependencies(kwargs), super().aretrieve,
+                                           *args, **kwargs)
+
+    def object_dependencies(self, kwargs):
+        return [f'{self.cache_scope}:{kwargs.get(self.lookup_url_kwarg or self.lookup_field)}']
+
+    def cached_response(self, request, dependencies, view, *args, **kwargs):
+        lookup = self.cache_lookup(request, versions([CATALOG, *dependencies]))
+        entry = response_cache().get(lookup['key'])
+        if entry:
+            return self.cache_respond(request, entry)
+        response = view(request, *args, **kwargs)
+        entry = self.cache_entry(lookup, response)
+        if entry is None:
+            return response
+        response_cache().set(lookup['key'], entry, _timeout())
+        return self.cache_respond(request, entry, response)
+
+    async def acached_response(self, request, dependencies, view, *args, **kwargs):
+        lookup = self.cache_lookup(request, await aversions([CATALOG, *dependencies]))
+        entry = await response_cache().aget(lookup['key'])
+        if entry:
+            return self.cache_respond(request, entry)
+        response = await view(request, *args, **kwargs)
+        entry = self.cache_entry(lookup, response)
+        if entry is None:
+            return response
+        await response_cache().aset(lookup['key'], entry, _timeout())
+        return self.cache_respond(request, entry, response)
+
+    def cache_lookup(self, request, tokens):
+        path = request.build_absolute_uri()
+        key = 'api:response:' + hashlib.md5(f'{path}|{"|".join(tokens)}'.encode(), usedforsecurity=False).hexdigest()
+        return {'path': path, 'tokens': tokens, 'key': key}
+
+    def cache_entry(self, lookup, response):
+        """The entry to cache for a fresh response, or None when it is not a 200."""
+        if response.status_code != status.HTTP_200_OK:
+            return None
+        items = _results(response.data)
+        return {'data': response.data, 'etag': _etag(lookup['path'], lookup['tokens'], items),
+                'last_modified': _last_modified(items)}
+
+    def cache_respond(self, request, entry, response=None):
+        if response is None:
+            response = Response(entry['data'])
+        if _not_modified(request, entry):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = entry['etag']
+        if entry['last_modified']:
+            response['Last-Modified'] = entry['last_modified']
+        return response
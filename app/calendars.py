@@ -0,0 +1,116 @@
+from datetime import date, datetime, timedelta
+import numpy as np
+from django.utils import timezone
+from app.models import Booking, Room
+
+CALENDAR_NIGHTS = 30
+MAX_CALENDAR_NIGHTS = 366
+DATE_FORMAT_ERROR = 'Invalid date format. Use YYYY-MM-DD'
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(DATE_FORMAT_ERROR)
+
+
+def parse_window(params, start=None, nights=CALENDAR_NIGHTS, max_nights=MAX_CALENDAR_NIGHTS):
+    """Return the nights ``from`` to ``to`` (exclusive); raises ValueError.
+
+    ``from`` defaults to ``start`` or today, and ``to`` to ``nights`` nights after ``from``.
+    """
+    first = _date(params['from']) if params.get('from') else start or timezone.localdate()
+    last = _date(params['to']) if params.get('to') else first + timedelta(days=nights)
+    if last <= first:
+        raise ValueError('"to" must be after "from"')
+    if (last - first).days > max_nights:
+        raise ValueError(f'At most {max_nights} nights can be requested')
+    return first, last
+
+
+def _stays(bookings, first, last):
+    return bookings.filter(status__in=Booking.ACTIVE_STATUSES, check_in_date__lt=last,
+                           check_out_date__gt=first).values_list('room_id', 'check_in_date', 'check_out_date')
+
+
+def booked_nights(room_ids, stays, first, last):
+    """Rooms × nights boolean array, True where one of the ``(room_id, check_in, check_out)`` stays holds the night.
+
+    Each stay adds +1 at its first night and -1 after its last, clipped to the window; a running
+    sum along the nights is then non-zero exactly on the booked nights.
+    """
+    nights = (last - first).days
+    room_ids = np.asarray(room_ids, dtype=np.int64)
+    changes = np.zeros((len(room_ids), nights + 1), dtype=np.int32)
+    if stays and len(room_ids):
+        rooms, check_ins, check_outs = zip(*stays)
+        rooms = np.fromiter(rooms, dtype=np.int64, count=len(stays))
+        order = np.argsort(room_ids)
+        rows = order[np.minimum(np.searchsorted(room_ids, rooms, sorter=order), len(room_ids) - 1)]
+        known = room_ids[rows] == rooms
+        origin = first.toordinal()
+        starts = np.clip(np.fromiter(map(date.toordinal, check_ins), dtype=np.int64, count=len(stays)) - origin,
+                         0, nights)
+        ends = np.clip(np.fromiter(map(date.toordinal, check_outs), dtype=np.int64, count=len(stays)) - origin,
+                       0, nights)
+        np.add.at(changes, (rows[known], starts[known]), 1)
+        np.add.at(changes, (rows[known], ends[known]), -1)
+    return np.cumsum(changes[:, :-1], axis=1) > 0
+
+
+def bitmaps(available):
+    """One ``'1'``/``'0'`` string per row of a boolean rooms × nights array, a character per night."""
+    if not available.size:
+        return [''] * len(available)
+    nights = available.shape[1]
+    raw = np.where(available, ord('1'), ord('0')).astype(np.uint8).tobytes().decode('ascii')
+    return [raw[start:start + nights] for start in range(0, len(raw), nights)]
+
+
+def _availability(rooms, stays, first, last):
+    room_ids = [room[0] for room in rooms]
+    open_rooms = np.array([room[-1] for room in rooms], dtype=bool)
+    return ~booked_nights(room_ids, stays, first, last) & open_rooms[:, None]
+
+
+def _room_calendar(room, stays, first, last):
+    available = _availability([(room.pk, room.is_available)], stays, first, last)
+    return {'room': room.pk, 'from': first.isoformat(), 'to': last.isoformat(), 'available': bitmaps(available)[0]}
+
+
+def _hotel_calendar(hotel, rooms, stays, first, last):
+    available = _availability(rooms, stays, first, last)
+    return {
+        'hotel': hotel.pk, 'from': first.isoformat(), 'to': last.isoformat(),
+        'available_rooms': available.sum(axis=0).tolist(),
+        'rooms': [{'room': pk, 'room_number': number, 'available': bitmap}
+                  for (pk, number, _), bitmap in zip(rooms, bitmaps(available))],
+    }
+
+
+def room_calendar(room, first, last):
+    """Per-night availability of ``room``, as a bitmap string starting at ``first``."""
+    return _room_calendar(room, list(_stays(Booking.objects.filter(room_id=room.pk), first, last)), first, last)
+
+
+async def aroom_calendar(room, first, last):
+    stays = [stay async for stay in _stays(Booking.objects.filter(room_id=room.pk), first, last)]
+    return _room_calendar(room, stays, first, last)
+
+
+def _hotel_rooms(hotel):
+    return Room.objects.filter(hotel_id=hotel.pk).values_list('pk', 'room_number', 'is_available')
+
+
+def hotel_calendar(hotel, first, last):
+    """Per-night availability of every room of ``hotel``, with the number of rooms free each night."""
+    rooms = list(_hotel_rooms(hotel))
+    stays = list(_stays(Booking.objects.filter(room__hotel_id=hotel.pk), first, last))
+    return _hotel_calendar(hotel, rooms, stays, first, last)
+
+
+async def ahotel_calendar(hotel, first, last):
+    rooms = [room async for room in _hotel_rooms(hotel)]
+    stays = [stay async for stay in _stays(Booking.objects.filter(room__hotel_id=hotel.pk), first, last)]
+    return _hotel_calendar(hotel, rooms, stays, first, last)
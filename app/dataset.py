@@ -0,0 +1,211 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from app.amenities import link_amenities
+from app.caching import invalidate_catalog
+from app.geo import encode_geohash
+from app.inventory import booking_nights
+from app.models import Booking, Hotel, Review, Room, RoomNight, User
+
+CITIES = [
+    ('Mumbai', 'Maharashtra', 19.0760, 72.8777), ('Delhi', 'Delhi', 28.6139, 77.2090),
+    ('Bengaluru', 'Karnataka', 12.9716, 77.5946), ('Goa', 'Goa', 15.2993, 74.1240),
+    ('Jaipur', 'Rajasthan', 26.9124, 75.7873), ('Chennai', 'Tamil Nadu', 13.0827, 80.2707),
+    ('Hyderabad', 'Telangana', 17.3850, 78.4867), ('Kolkata', 'West Bengal', 22.5726, 88.3639),
+    ('Pune', 'Maharashtra', 18.5204, 73.8567), ('Udaipur', 'Rajasthan', 24.5854, 73.7125),
+    ('Kochi', 'Kerala', 9.9312, 76.2673), ('Agra', 'Uttar Pradesh', 27.1767, 78.0081),
+    ('Shimla', 'Himachal Pradesh', 31.1048, 77.1734), ('Rishikesh', 'Uttarakhand', 30.0869, 78.2676),
+    ('Mysuru', 'Karnataka', 12.2958, 76.6394), ('Ahmedabad', 'Gujarat', 23.0225, 72.5714),
+    ('Varanasi', 'Uttar Pradesh', 25.3176, 82.9739), ('Amritsar', 'Punjab', 31.6340, 74.8723),
+    ('Darjeeling', 'West Bengal', 27.0410, 88.2663), ('Kolhapur', 'Maharashtra', 16.7050, 74.2433),
+]
+HOTEL_AMENITIES = ['WiFi', 'Pool', 'Gym', 'Spa', 'Restaurant', 'Bar', 'Parking', 'Beach Access',
+                   'Airport Shuttle', 'Conference Room', 'Fireplace', 'Hiking Trails', 'Kids Club']
+ROOM_AMENITIES = ['WiFi', 'TV', 'Air Conditioning', 'Mini Bar', 'Room Service', 'Balcony', 'Bathtub',
+                  'Coffee Maker', 'Safe', 'Work Desk']
+ROOM_TYPES = [('single', 1, 1.0, 20), ('double', 2, 1.4, 40), ('deluxe', 3, 2.0, 20),
+              ('suite', 4, 3.0, 10), ('family', 6, 2.4, 10)]
+NAME_PREFIXES = ['Grand', 'Royal', 'Seaside', 'Mountain View', 'Heritage', 'City', 'Palm', 'Lakeview',
+                 'Golden', 'Silver Oak', 'Riverside', 'Sunset']
+NAME_SUFFIXES = ['Hotel', 'Resort', 'Inn', 'Lodge', 'Suites', 'Palace', 'Retreat']
+# relative booking demand per calendar month, peaking over winter holidays and in May
+SEASONALITY = [1.3, 1.1, 1.0, 0.9, 1.2, 0.7, 0.6, 0.7, 0.8, 1.1, 1.3, 1.6]
+STAY_LENGTHS = [1, 2, 3, 4, 5, 7]
+STAY_WEIGHTS = [20, 30, 22, 12, 9, 7]
+REVIEW_RATING_WEIGHTS = [5, 8, 17, 35, 35]
+
+
+class DatasetGenerator:
+    """Generate a large, deterministic dataset for load testing.
+
+    City popularity follows a Zipf distribution, booking density follows ``SEASONALITY`` and
+    cancelled stays overlap the bookings that replaced them. Output depends only on the seed
+    and ``today``, which separates past (completed) stays from future ones.
+    """
+
+    def __init__(self, seed=42, batch_size=5000, today=None, history_days=365, future_days=180,
+                 password_pool=8, log=None):
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.batch_size = batch_size
+        self.today = today or date.today()
+        self.start = self.today - timedelta(days=history_days)
+        self.end = self.today + timedelta(days=future_days)
+        self.password_pool = password_pool
+        self.log = log or (lambda message: None)
+        self.city_weights = [1 / (rank + 1) ** 1.1 for rank in range(len(CITIES))]
+
+    def run(self, hotels, rooms_per_hotel, users, bookings, reviews):
+        hotel_rows = self.create_hotels(hotels)
+        room_rows = self.create_rooms(hotel_rows, rooms_per_hotel)
+        user_ids = self.create_users(users)
+        booked, reviewed = self.create_bookings(room_rows, user_ids, bookings, reviews)
+        invalidate_catalog()
+        return {'hotels': len(hotel_rows), 'rooms': len(room_rows), 'users': len(user_ids),
+                'bookings': booked, 'reviews': reviewed}
+
+    def insert(self, model, objects):
+        if not objects:
+            return
+        last_pk = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        if objects[0].pk is None:
+            new_pks = model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)
+            for obj, pk in zip(objects, new_pks):
+                obj.pk = pk
+
+    def batches(self, total, build):
+        for start in range(0, total, self.batch_size):
+            yield [build(i) for i in range(start, min(total, start + self.batch_size))]
+
+    def create_hotels(self, total):
+        rows = []
+        for batch in self.batches(total, self.build_hotel):
+            self.insert(Hotel, batch)
+            link_amenities(Hotel, batch)
+            rows.extend((hotel.pk, self.city_weights[hotel.city_rank], hotel.price_factor) for hotel in batch)
+            self.log(f'hotels: {len(rows)}/{total}')
+        return rows
+
+    def build_hotel(self, index):
+        rng = self.rng
+        rank = rng.choices(range(len(CITIES)), weights=self.city_weights)[0]
+        city, state, latitude, longitude = CITIES[rank]
+        latitude = round(latitude + rng.uniform(-0.15, 0.15), 6)
+        longitude = round(longitude + rng.uniform(-0.15, 0.15), 6)
+        amenities = rng.sample(HOTEL_AMENITIES, rng.randint(3, 8))
+        hotel = Hotel(
+            external_ref=f'gen-{self.seed}-{index}',
+            name=f'{rng.choice(NAME_PREFIXES)} {city} {rng.choice(NAME_SUFFIXES)} {index}',
+            description=f'{rng.choice(NAME_PREFIXES)} stay in {city} with {", ".join(amenities[:3]).lower()}',
+            address=f'{rng.randint(1, 999)} {rng.choice(NAME_PREFIXES)} Road', city=city, state=state,
+            country='India', postal_code=str(rng.randint(110001, 855999)), phone=f'+91{rng.randint(10**9, 10**10 - 1)}',
+            email=f'reservations{index}@example.com', latitude=latitude, longitude=longitude,
+            geohash=encode_geohash(latitude, longitude), amenities=', '.join(amenities),
+        )
+        hotel.city_rank = rank
+        hotel.price_factor = rng.uniform(0.7, 1.6) * (1.3 if rank < 3 else 1.0)
+        return hotel
+
+    def create_rooms(self, hotel_rows, rooms_per_hotel):
+        rows = []
+        pending = []
+        for hotel_id, weight, price_factor in hotel_rows:
+            count = self.rng.randint(max(1, rooms_per_hotel // 2), max(1, rooms_per_hotel * 3 // 2))
+            for number in range(count):
+                pending.append(self.build_room(hotel_id, number, price_factor))
+                pending[-1].weight = weight
+            if len(pending) >= self.batch_size:
+                rows.extend(self.flush_rooms(pending))
+                pending = []
+                self.log(f'rooms: {len(rows)}')
+        rows.extend(self.flush_rooms(pending))
+        return rows
+
+    def build_room(self, hotel_id, number, price_factor):
+        rng = self.rng
+        room_type, occupancy, multiplier, _ = rng.choices(ROOM_TYPES, weights=[t[3] for t in ROOM_TYPES])[0]
+        price = Decimal(round(1800 * multiplier * price_factor / 50) * 50)
+        return Room(
+            hotel_id=hotel_id, room_number=f'{number // 20 + 1}{number % 20 + 1:02d}', room_type=room_type,
+            description=f'Comfortable {room_type} room', price_per_night=price, max_occupancy=occupancy,
+            amenities=', '.join(rng.sample(ROOM_AMENITIES, rng.randint(2, 6))),
+        )
+
+    def flush_rooms(self, rooms):
+        self.insert(Room, rooms)
+        link_amenities(Room, rooms)
+        return [(room.pk, room.hotel_id, room.price_per_night, room.max_occupancy, room.weight) for room in rooms]
+
+    def create_users(self, total):
+        passwords = [make_password(f'password{i}', salt=f'loadtest{self.seed}x{i}') for i in range(self.password_pool)]
+        user_ids = []
+        for batch in self.batches(total, lambda i: User(
+                email=f'loadtest{self.seed}.{i}@example.com', name=f'Load Test User {i}',
+                password=passwords[i % len(passwords)])):
+            self.insert(User, batch)
+            user_ids.extend(user.pk for user in batch)
+            self.log(f'users: {len(user_ids)}/{total}')
+        return user_ids
+
+    def stays(self, count):
+        """Yield ``(check_in, nights, status)`` for one room in date order."""
+        if not count:
+            return
+        mean_stay = sum(n * w for n, w in zip(STAY_LENGTHS, STAY_WEIGHTS)) / sum(STAY_WEIGHTS)
+        mean_gap = max(0.5, (self.end - self.start).days / count - mean_stay)
+        cursor = self.start
+        for _ in range(count):
+            season = SEASONALITY[cursor.month - 1]
+            cursor += timedelta(days=int(self.rng.expovariate(season / mean_gap)))
+            nights = self.rng.choices(STAY_LENGTHS, weights=STAY_WEIGHTS)[0]
+            if cursor + timedelta(days=nights) > self.end:
+                return
+            roll = self.rng.random()
+            if cursor + timedelta(days=nights) <= self.today:
+                status = 'cancelled' if roll < 0.12 else 'completed'
+            else:
+                status = 'cancelled' if roll < 0.12 else 'pending' if roll < 0.35 else 'confirmed'
+            yield cursor, nights, status
+            if status != 'cancelled':
+                cursor += timedelta(days=nights)
+
+    def create_bookings(self, room_rows, user_ids, total, review_total):
+        total_weight = sum(row[4] for row in room_rows) or 1
+        review_rate = min(1.0, review_total / max(1, total * 0.5))
+        booked = reviewed = 0
+        pending = []
+        for room_id, hotel_id, price, occupancy, weight in room_rows:
+            expected = total * weight / total_weight
+            count = int(expected) + (self.rng.random() < expected - int(expected))
+            for check_in, nights, status in self.stays(count):
+                booking = Booking(
+                    room_id=room_id, user_id=self.rng.choice(user_ids), check_in_date=check_in,
+                    check_out_date=check_in + timedelta(days=nights), guests=self.rng.randint(1, occupancy),
+                    total_price=price * nights, status=status,
+                )
+                booking.hotel_id = hotel_id
+                pending.append(booking)
+            if len(pending) >= self.batch_size:
+                booked, reviewed = self.flush_bookings(pending, booked, reviewed, review_total, review_rate)
+                pending = []
+        return self.flush_bookings(pending, booked, reviewed, review_total, review_rate)
+
+    def flush_bookings(self, bookings, booked, reviewed, review_total, review_rate):
+        self.insert(Booking, bookings)
+        RoomNight.objects.bulk_create([night for booking in bookings for night in booking_nights(booking)],
+                                      batch_size=self.batch_size)
+        reviews = []
+        for booking in bookings:
+            if booking.status == 'completed' and reviewed + len(reviews) < review_total \
+                    and self.rng.random() < review_rate:
+                rating = self.rng.choices(range(1, 6), weights=REVIEW_RATING_WEIGHTS)[0]
+                reviews.append(Review(user_id=booking.user_id, hotel_id=booking.hotel_id, booking_id=booking.pk,
+                                      rating=rating, comment=f'{rating} star stay'))
+        self.insert(Review, reviews)
+        booked += len(bookings)
+        reviewed += len(reviews)
+        self.log(f'bookings: {booked}, reviews: {reviewed}')
+        return booked, reviewed
+
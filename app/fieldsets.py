@@ -0,0 +1,71 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+SELECTION_PARAMS = ('fields', 'exclude', 'expand')
+
+
+def parse_selection(value):
+    """Turn ``"id,room_details.price_per_night"`` into ``{'id': {}, 'room_details': {'price_per_night': {}}}``."""
+    tree = {}
+    for item in (value or '').split(','):
+        parts = [part.strip() for part in item.split('.')]
+        if not all(parts):
+            continue
+        node = tree
+        for part in parts:
+            node = node.setdefault(part, {})
+    return tree
+
+
+def _below(tree, path):
+    for name in path:
+        tree = tree.get(name) or {}
+    return tree
+
+
+class SparseFieldsetMixin:
+    """Let read requests choose the fields a serializer returns.
+
+    ``?fields=`` keeps only the listed fields and ``?exclude=`` drops them; both take dotted paths
+    into nested serializers (``room_details.price_per_night``). ``?expand=`` swaps a primary key
+    for the nested serializer named in ``Meta.expandable_fields``. Query planning reads the
+    pruned fields, so unselected columns and joins are never queried.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+        path = self.selection_path()
+        trees = {param: parse_selection(request.query_params.get(param)) for param in SELECTION_PARAMS}
+        include = trees['fields']
+        for name in path:
+            # a nested serializer listed on its own keeps all of its fields
+            include = include.get(name) if include else None
+        exclude, expand = _below(trees['exclude'], path), _below(trees['expand'], path)
+
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in expand:
+            if name not in expandable:
+                raise serializers.ValidationError({'expand': [f'"{name}" cannot be expanded.']})
+            fields[name] = expandable[name](read_only=True)
+        for param, tree in (('fields', include or {}), ('exclude', exclude)):
+            unknown = [name for name in tree if name not in fields]
+            if unknown:
+                raise serializers.ValidationError({param: [f'Unknown field "{name}".' for name in unknown]})
+
+        if include:
+            fields = {name: field for name, field in fields.items() if name in include}
+        for name, below in exclude.items():
+            if not below:
+                fields.pop(name)
+        return fields
+
+    def selection_path(self):
+        path, node = [], self
+        while node.parent is not None:
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+        return path[::-1]
@@ -0,0 +1,161 @@
+import math
+import operator
+from functools import reduce
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 12
+EARTH_RADIUS_KM = 6371.0088
+MAX_RADIUS_KM = 500
+MAX_CELLS = 32
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    latitude, longitude = float(latitude), float(longitude)
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 - lng_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def bounding_boxes(latitude, longitude, radius_km):
+    """Boxes covering the circle: every longitude when it covers a pole, two when it crosses the antimeridian."""
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(-90.0, latitude - delta_lat), min(90.0, latitude + delta_lat)
+    cos_lat = math.cos(math.radians(latitude))
+    if min_lat == -90.0 or max_lat == 90.0 or cos_lat < 1e-6:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+    delta_lng = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    if delta_lng >= 180.0:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+    min_lng, max_lng = longitude - delta_lng, longitude + delta_lng
+    if min_lng < -180.0:
+        return [(min_lat, min_lng + 360.0, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lng)]
+    if max_lng > 180.0:
+        return [(min_lat, min_lng, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lng - 360.0)]
+    return [(min_lat, min_lng, max_lat, max_lng)]
+
+
+def _steps(low, high, step):
+    count = int((high - low) / step) + 1
+    return [low + i * step for i in range(count)] + [high]
+
+
+def covering_cells(bbox, max_cells=MAX_CELLS):
+    min_lat, min_lng, max_lat, max_lng = bbox
+    precision = 1
+    for candidate in range(1, GEOHASH_PRECISION + 1):
+        height, width = cell_size(candidate)
+        if ((max_lat - min_lat) / height + 2) * ((max_lng - min_lng) / width + 2) > max_cells:
+            break
+        precision = candidate
+    height, width = cell_size(precision)
+    return {encode_geohash(lat, lng, precision)
+            for lat in _steps(min_lat, max_lat, height) for lng in _steps(min_lng, max_lng, width)}
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def within_bbox(hotels, bbox):
+    min_lat, min_lng, max_lat, max_lng = bbox
+    cells = Q()
+    for cell in sorted(covering_cells(bbox)):
+        cells |= Q(geohash__startswith=cell)
+    return hotels.filter(cells, latitude__gte=min_lat, latitude__lte=max_lat,
+                         longitude__gte=min_lng, longitude__lte=max_lng)
+
+
+def _candidates(hotels, latitude, longitude, radius_km):
+    return reduce(operator.or_, (within_bbox(hotels, bbox) for bbox in bounding_boxes(latitude, longitude, radius_km)))
+
+
+def nearby_hotel_ids(hotels, latitude, longitude, radius_km):
+    candidates = _candidates(hotels, latitude, longitude, radius_km)
+    return [pk for pk, lat, lng in candidates.values_list('pk', 'latitude', 'longitude')
+            if haversine_km(latitude, longitude, float(lat), float(lng)) <= radius_km]
+
+
+async def anearby_hotel_ids(hotels, latitude, longitude, radius_km):
+    candidates = _candidates(hotels, latitude, longitude, radius_km)
+    return [pk async for pk, lat, lng in candidates.values_list('pk', 'latitude', 'longitude')
+            if haversine_km(latitude, longitude, float(lat), float(lng)) <= radius_km]
+
+
+def _number(params, name, low, high):
+    try:
+        value = float(params[name])
+    except ValueError:
+        raise ValidationError({name: ['A valid number is required.']})
+    if not low <= value <= high:
+        raise ValidationError({name: [f'Must be between {low} and {high}.']})
+    return value
+
+
+def parse_location(params):
+    """Return ``('radius', (lat, lng, km))``, ``('bbox', bbox)`` or None from query params."""
+    if 'lat' in params or 'lng' in params:
+        if 'lat' not in params or 'lng' not in params:
+            raise ValidationError({'lat': ['lat and lng must be given together.']})
+        radius = _number(params, 'radius', 0, MAX_RADIUS_KM) if 'radius' in params else 10.0
+        return 'radius', (_number(params, 'lat', -90, 90), _number(params, 'lng', -180, 180), radius)
+    if 'bbox' in params:
+        parts = params['bbox'].split(',')
+        if len(parts) != 4:
+            raise ValidationError({'bbox': ['Use min_lat,min_lng,max_lat,max_lng.']})
+        values = dict(zip(('min_lat', 'min_lng', 'max_lat', 'max_lng'), parts))
+        bbox = tuple(_number(values, name, -180 if 'lng' in name else -90, 180 if 'lng' in name else 90)
+                     for name in ('min_lat', 'min_lng', 'max_lat', 'max_lng'))
+        if bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+            raise ValidationError({'bbox': ['Minimum corner must be below and left of the maximum corner.']})
+        return 'bbox', bbox
+    return None
+
+
+def filter_by_location(queryset, hotels, params, hotel_field='pk'):
+    location = parse_location(params)
+    if location is None:
+        return queryset
+    kind, value = location
+    if kind == 'radius':
+        return queryset.filter(**{f'{hotel_field}__in': nearby_hotel_ids(hotels, *value)})
+    return queryset.filter(**{f'{hotel_field}__in': within_bbox(hotels, value).values('pk')})
+
+
+async def afilter_by_location(queryset, hotels, params, hotel_field='pk'):
+    location = parse_location(params)
+    if location is not None and location[0] == 'radius':
+        return queryset.filter(**{f'{hotel_field}__in': await anearby_hotel_ids(hotels, *location[1])})
+    return filter_by_location(queryset, hotels, params, hotel_field)
+
+
+class GeoFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        return filter_by_location(queryset, queryset.model.objects.all(), request.query_params)
+
+    async def afilter_queryset(self, request, queryset, view):
+        return await afilter_by_location(queryset, queryset.model.objects.all(), request.query_params)
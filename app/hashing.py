@@ -0,0 +1,69 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class HashingPoolBusy(Exception):
+    pass
+
+
+def _setup_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+class HashingPool:
+    """Run password hashing off the event loop with bounded concurrency.
+
+    At most ``workers`` hashes run at once and at most ``queue`` more wait for a worker; callers
+    beyond that get ``HashingPoolBusy`` straight away instead of piling up. ``kind`` is ``thread``
+    (PBKDF2 releases the GIL) or ``process``.
+    """
+
+    def __init__(self, kind='thread', workers=2, queue=32):
+        self.kind = kind
+        self.workers = workers
+        self.queue = queue
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def executor(self):
+        with self.lock:
+            if self._executor is None:
+                if self.kind == 'process':
+                    self._executor = ProcessPoolExecutor(
+                        self.workers, initializer=_setup_worker,
+                        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'RestAPI.settings'),))
+                else:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hashing')
+            return self._executor
+
+    async def run(self, function, *args):
+        with self.lock:
+            if self.in_flight >= self.workers + self.queue:
+                raise HashingPoolBusy()
+            self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    async def make_password(self, password):
+        return await self.run(make_password, password)
+
+    async def check_password(self, password, encoded):
+        return await self.run(check_password, password, encoded)
+
+
+hashing_pool = HashingPool(
+    kind=getattr(settings, 'PASSWORD_HASHING_EXECUTOR', 'thread'),
+    workers=getattr(settings, 'PASSWORD_HASHING_WORKERS', 2),
+    queue=getattr(settings, 'PASSWORD_HASHING_QUEUE', 32),
+)
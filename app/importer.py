@@ -0,0 +1,178 @@
+import csv
+import json
+import time
+from itertools import islice
+from django.db import connection, transaction
+from rest_framework import serializers
+from app.geo import encode_geohash
+from app.amenities import link_amenities
+from app.models import Hotel, Room
+from app.search import index_objects
+from app.serializers import validate_amenity_list
+from app.caching import invalidate_hotels, invalidate_rooms
+
+HOTEL_FIELDS = ['name', 'description', 'address', 'city', 'state', 'country', 'postal_code',
+                'latitude', 'longitude', 'phone', 'email', 'amenities']
+ROOM_FIELDS = ['room_number', 'room_type', 'description', 'price_per_night', 'max_occupancy',
+               'amenities', 'is_available']
+MAX_REPORTED_ERRORS = 100
+
+
+class HotelImportSerializer(serializers.ModelSerializer):
+    ref = serializers.CharField(source='external_ref', max_length=64)
+
+    class Meta:
+        model = Hotel
+        fields = ['ref', *HOTEL_FIELDS]
+
+    def validate_amenities(self, value):
+        return validate_amenity_list(value)
+
+
+class RoomImportSerializer(serializers.ModelSerializer):
+    hotel = serializers.CharField(max_length=64)
+
+    class Meta:
+        model = Room
+        fields = ['hotel', *ROOM_FIELDS]
+        validators = []
+
+    def validate_amenities(self, value):
+        return validate_amenity_list(value)
+
+
+class ImportReport:
+    def __init__(self, kind):
+        self.kind = kind
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.monotonic()
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {'kind': self.kind, 'rows': self.rows, 'imported': self.imported, 'failed': self.failed,
+                'errors': self.errors, 'seconds': round(time.monotonic() - self.started, 3)}
+
+
+def read_rows(lines, fmt):
+    if fmt == 'csv':
+        for line, row in enumerate(csv.DictReader(lines), start=2):
+            yield line, {key: value for key, value in row.items() if value not in ('', None)}
+        return
+    for line, text in enumerate(lines, start=1):
+        if text.strip():
+            try:
+                yield line, json.loads(text)
+            except ValueError as exc:
+                yield line, exc
+
+
+def detect_format(filename):
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def _upsert(model, objects, unique_fields, update_fields):
+    options = {'update_conflicts': True, 'update_fields': update_fields}
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = unique_fields
+    model.objects.bulk_create(objects, **options)
+
+
+def _validate(serializer, batch, report):
+    valid = []
+    for line, row in batch:
+        report.rows += 1
+        try:
+            if isinstance(row, Exception):
+                raise serializers.ValidationError({'non_field_errors': [str(row)]})
+            valid.append((line, serializer.run_validation(row)))
+        except serializers.ValidationError as exc:
+            report.add_error(line, exc.detail)
+    return valid
+
+
+class CatalogImporter:
+    """Stream hotels and rooms into the database in fixed-size batches.
+
+    Hotels are upserted on ``ref`` (stored as ``external_ref``); rooms name their hotel by that
+    ref, or by primary key, and are upserted on ``(hotel, room_number)``. The ref to id map is the
+    only state kept across batches.
+    """
+
+    def __init__(self, batch_size=1000, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.hotel_ids = {}
+
+    def run(self, kind, lines, fmt):
+        report = ImportReport(kind)
+        serializer = HotelImportSerializer() if kind == 'hotels' else RoomImportSerializer()
+        load = self.load_hotels if kind == 'hotels' else self.load_rooms
+        rows = read_rows(lines, fmt)
+        while batch := list(islice(rows, self.batch_size)):
+            valid = _validate(serializer, batch, report)
+            if valid:
+                with transaction.atomic():
+                    load(valid, report)
+            if self.progress:
+                self.progress(report)
+        return report
+
+    def load_hotels(self, valid, report):
+        hotels = {}
+        for line, data in valid:
+            hotels[data['external_ref']] = Hotel(**data)
+        hotel_list = list(hotels.values())
+        for hotel in hotel_list:
+            has_location = hotel.latitude is not None and hotel.longitude is not None
+            hotel.geohash = encode_geohash(hotel.latitude, hotel.longitude) if has_location else ''
+        _upsert(Hotel, hotel_list, ['external_ref'], HOTEL_FIELDS + ['geohash', 'updated_at'])
+
+        ids = dict(Hotel.objects.filter(external_ref__in=hotels).values_list('external_ref', 'pk'))
+        for ref, hotel in hotels.items():
+            hotel.pk = ids[ref]
+        self.hotel_ids.update(ids)
+        index_objects(Hotel, hotel_list)
+        link_amenities(Hotel, hotel_list)
+        invalidate_hotels(ids.values())
+        report.imported += len(hotel_list)
+
+    def resolve_hotels(self, refs):
+        missing = set(refs) - self.hotel_ids.keys()
+        if missing:
+            self.hotel_ids.update(Hotel.objects.filter(external_ref__in=missing).values_list('external_ref', 'pk'))
+            numeric = {int(ref) for ref in missing - self.hotel_ids.keys() if ref.isdigit()}
+            if numeric:
+                self.hotel_ids.update((str(pk), pk) for pk in Hotel.objects.filter(pk__in=numeric)
+                                      .values_list('pk', flat=True))
+
+    def load_rooms(self, valid, report):
+        self.resolve_hotels(data['hotel'] for _, data in valid)
+        rooms = {}
+        for line, data in valid:
+            hotel_id = self.hotel_ids.get(data['hotel'])
+            if hotel_id is None:
+                report.add_error(line, {'hotel': [f'Unknown hotel "{data["hotel"]}".']})
+                continue
+            fields = {name: value for name, value in data.items() if name != 'hotel'}
+            rooms[(hotel_id, data['room_number'])] = Room(**fields, hotel_id=hotel_id)
+        if not rooms:
+            return
+        room_list = list(rooms.values())
+        _upsert(Room, room_list, ['hotel', 'room_number'], ROOM_FIELDS + ['updated_at'])
+
+        stored = Room.objects.filter(hotel_id__in={key[0] for key in rooms},
+                                     room_number__in={key[1] for key in rooms})
+        for pk, hotel_id, room_number in stored.values_list('pk', 'hotel_id', 'room_number'):
+            if (hotel_id, room_number) in rooms:
+                rooms[(hotel_id, room_number)].pk = pk
+        index_objects(Room, room_list)
+        link_amenities(Room, room_list)
+        invalidate_rooms(room.pk for room in room_list)
+        report.imported += len(room_list)
@@ -0,0 +1,57 @@
+from datetime import timedelta
+from django.db import transaction
+from app.caching import invalidate_catalog
+from app.models import Booking, RoomNight
+
+
+def stay_dates(check_in, check_out):
+    return [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+
+
+def booking_nights(booking):
+    if booking.status not in Booking.ACTIVE_STATUSES:
+        return []
+    return [RoomNight(room_id=booking.room_id, booking_id=booking.pk, date=day)
+            for day in stay_dates(booking.check_in_date, booking.check_out_date)]
+
+
+def sync_booking_nights(booking, created=False):
+    """Bring a booking's room-nights in line with it; returns the ``(room_id, date)`` pairs that changed."""
+    if created:
+        added = booking_nights(booking)
+        RoomNight.objects.bulk_create(added)
+        return [(night.room_id, night.date) for night in added]
+    wanted = {night.date: night for night in booking_nights(booking)}
+    with transaction.atomic():
+        current = RoomNight.objects.filter(booking_id=booking.pk)
+        kept = set(current.filter(room_id=booking.room_id, date__in=wanted).values_list('date', flat=True))
+        stale = current.exclude(room_id=booking.room_id, date__in=kept)
+        removed = list(stale.values_list('room_id', 'date'))
+        if removed:
+            stale.delete()
+        added = [night for day, night in wanted.items() if day not in kept]
+        RoomNight.objects.bulk_create(added)
+    return removed + [(night.room_id, night.date) for night in added]
+
+
+def booked_room_ids(check_in, check_out):
+    return RoomNight.objects.filter(date__gte=check_in, date__lt=check_out).values('room_id')
+
+
+def rebuild_inventory(batch_size=1000):
+    created = 0
+    with transaction.atomic():
+        RoomNight.objects.all().delete()
+        bookings = Booking.objects.filter(status__in=Booking.ACTIVE_STATUSES).only(
+            'id', 'room_id', 'status', 'check_in_date', 'check_out_date')
+        nights = []
+        for booking in bookings.iterator(chunk_size=batch_size):
+            nights.extend(booking_nights(booking))
+            if len(nights) >= batch_size:
+                RoomNight.objects.bulk_create(nights, ignore_conflicts=True)
+                created += len(nights)
+                nights = []
+        RoomNight.objects.bulk_create(nights, ignore_conflicts=True)
+        created += len(nights)
+    invalidate_catalog()
+    return created
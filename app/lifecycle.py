@@ -0,0 +1,56 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from app.availability import invalidate_availability
+from app.inventory import stay_dates
+from app.models import Booking, RoomNight
+
+SWEEP_BATCH_SIZE = 500
+
+
+def _sweep(bookings, status, batch_size):
+    """Move ``bookings`` to ``status`` ``batch_size`` rows per transaction; returns how many moved.
+
+    Each chunk is locked (skipping rows another transaction holds), updated and stripped of its
+    room-nights in one short transaction, so locks are held for one chunk at a time.
+    """
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    moved = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(bookings.select_for_update(skip_locked=skip_locked)
+                         .values_list('pk', 'room_id', 'check_in_date', 'check_out_date')[:batch_size])
+            if not chunk:
+                return moved
+            ids = [row[0] for row in chunk]
+            bookings.filter(pk__in=ids).update(status=status, updated_at=timezone.now())
+            RoomNight.objects.filter(booking_id__in=ids).delete()
+        invalidate_availability((room_id, day) for _, room_id, check_in, check_out in chunk
+                                for day in stay_dates(check_in, check_out))
+        moved += len(chunk)
+
+
+def expire_pending(now=None, ttl=None, batch_size=SWEEP_BATCH_SIZE):
+    """Expire bookings pending for longer than ``ttl`` (default ``PENDING_BOOKING_TTL_MINUTES``), freeing their nights."""
+    now = now or timezone.now()
+    if ttl is None:
+        ttl = timedelta(minutes=getattr(settings, 'PENDING_BOOKING_TTL_MINUTES', 1440))
+    bookings = Booking.objects.filter(status='pending', created_at__lt=now - ttl).order_by('created_at')
+    return _sweep(bookings, 'expired', batch_size)
+
+
+def complete_past_stays(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """Mark confirmed bookings whose check-out date has passed as completed."""
+    today = timezone.localdate(now or timezone.now())
+    bookings = Booking.objects.filter(status='confirmed', check_out_date__lt=today).order_by('check_out_date')
+    return _sweep(bookings, 'completed', batch_size)
+
+
+def sweep_bookings(now=None, ttl=None, batch_size=SWEEP_BATCH_SIZE):
+    """Run both sweeps; returns ``{'expired': n, 'completed': n}``.
+
+    Neither move changes the daily rollups: pending bookings were never counted as sold, and
+    confirmed and completed stays count the same.
+    """
+    return {'expired': expire_pending(now, ttl, batch_size), 'completed': complete_past_stays(now, batch_size)}
@@ -0,0 +1,77 @@
+import json
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from app.benchmarks import BenchmarkRunner, booking_throughput, compare, compare_servers, load_results, login_storm
+from app.models import Hotel
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the API routes in-process against a seeded test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--only', nargs='+', help='Benchmark only these endpoints, e.g. hotels_list login')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='Results file from an earlier run to compare against')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Allowed p95 slowdown against the baseline')
+        parser.add_argument('--login-storm', type=int, default=0, metavar='LOGINS',
+                            help='Also measure hotel/room read latency during this many concurrent logins (ASGI)')
+        parser.add_argument('--compare-servers', type=int, default=0, metavar='CONCURRENCY',
+                            help='Also compare hotel/room reads under WSGI (sync views) and ASGI (async views)')
+        parser.add_argument('--booking-throughput', type=int, default=0, metavar='CONCURRENCY',
+                            help='Also measure bookings per second on distinct rooms, one worker against CONCURRENCY')
+        parser.add_argument('--keepdb', action='store_true', help='Keep (and reuse) the seeded test database')
+        parser.add_argument('--hotels', type=int, default=200)
+        parser.add_argument('--rooms-per-hotel', type=int, default=20)
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--bookings', type=int, default=20000)
+        parser.add_argument('--reviews', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        baseline = load_results(options['baseline']) if options['baseline'] else None
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            if not Hotel.objects.exists():
+                self.stdout.write('Seeding the benchmark database...')
+                call_command('generate_dataset', hotels=options['hotels'], rooms_per_hotel=options['rooms_per_hotel'],
+                             users=options['users'], bookings=options['bookings'], reviews=options['reviews'],
+                             seed=options['seed'], stdout=self.stdout)
+            runner = BenchmarkRunner(iterations=options['iterations'], warmup=options['warmup'],
+                                     only=options['only'], log=self.stdout.write)
+            results = runner.run()
+            if options['login_storm']:
+                results['results'].extend(login_storm(logins=options['login_storm']))
+            if options['compare_servers']:
+                results['results'].extend(compare_servers(concurrency=options['compare_servers']))
+            if options['booking_throughput']:
+                results['results'].extend(booking_throughput(concurrency=options['booking_throughput']))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        self.print_table(results['results'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if baseline:
+            regressions = compare(results, baseline, options['threshold'])
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS(f'No regressions against {options["baseline"]}'))
+
+    def print_table(self, results):
+        self.stdout.write(f"{'endpoint':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}"
+                          f"{'queries':>9}{'bytes':>10}{'errors':>8}")
+        for entry in results:
+            self.stdout.write(f"{entry['name']:<24}{entry['p50_ms']:>10}{entry['p95_ms']:>10}{entry['p99_ms']:>10}"
+                              f"{entry['throughput_rps']:>10}{entry['queries']['mean']:>9}{entry['bytes']['mean']:>10}"
+                              f"{entry['errors']:>8}")
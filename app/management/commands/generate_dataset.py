@@ -0,0 +1,42 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand
+from app.dataset import DatasetGenerator
+from app.ratings import reconcile_ratings
+from app.rollups import rebuild_rollups
+from app.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Generate a seeded synthetic dataset of hotels, rooms, users, bookings and reviews for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotels', type=int, default=100)
+        parser.add_argument('--rooms-per-hotel', type=int, default=20, help='Average; each hotel gets 50-150%%')
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--bookings', type=int, default=10000, help='Approximate target')
+        parser.add_argument('--reviews', type=int, default=2000, help='Upper bound; only completed stays are reviewed')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--today', type=date.fromisoformat,
+                            help='Date separating past and future stays (YYYY-MM-DD); defaults to today')
+        parser.add_argument('--history-days', type=int, default=365)
+        parser.add_argument('--future-days', type=int, default=180)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--skip-search-index', action='store_true',
+                            help='Leave the search index for a later rebuild_search_index run')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        generator = DatasetGenerator(
+            seed=options['seed'], batch_size=options['batch_size'], today=options['today'],
+            history_days=options['history_days'], future_days=options['future_days'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        counts = generator.run(options['hotels'], options['rooms_per_hotel'], options['users'],
+                               options['bookings'], options['reviews'])
+        reconcile_ratings(batch_size=options['batch_size'])
+        rebuild_rollups()
+        if not options['skip_search_index']:
+            rebuild_search_index(batch_size=options['batch_size'])
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Generated {summary} in {time.monotonic() - started:.1f}s'))
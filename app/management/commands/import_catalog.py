@@ -0,0 +1,33 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from app.importer import CatalogImporter, detect_format
+
+
+class Command(BaseCommand):
+    help = 'Stream hotels and rooms from CSV or JSONL files, upserting in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotels', help='CSV/JSONL file of hotels, keyed by a "ref" column')
+        parser.add_argument('--rooms', help='CSV/JSONL file of rooms whose "hotel" column is a hotel ref or id')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not options['hotels'] and not options['rooms']:
+            raise CommandError('Pass --hotels and/or --rooms')
+        importer = CatalogImporter(batch_size=options['batch_size'], progress=self.report_progress)
+        for kind in ('hotels', 'rooms'):
+            path = options[kind]
+            if not path:
+                continue
+            with open(path, newline='', encoding='utf-8') as lines:
+                report = importer.run(kind, lines, options['format'] or detect_format(path))
+            summary = report.as_dict()
+            for error in summary['errors']:
+                self.stderr.write(f"{kind} line {error['line']}: {json.dumps(error['errors'])}")
+            self.stdout.write(self.style.SUCCESS(
+                f"{kind}: imported {summary['imported']} of {summary['rows']} rows "
+                f"({summary['failed']} failed) in {summary['seconds']}s"))
+
+    def report_progress(self, report):
+        self.stdout.write(f'{report.kind}: {report.rows} rows read, {report.imported} imported, {report.failed} failed')
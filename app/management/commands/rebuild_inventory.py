@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from app.inventory import rebuild_inventory
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the room-night inventory from active bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = rebuild_inventory(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt inventory with {created} room-nights'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from app.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily occupancy and revenue rollups from confirmed and completed bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Hotels rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        written = rebuild_rollups(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} daily rollups'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from app.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute hotel review counts, rating sums, histograms and average ratings from reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = reconcile_ratings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reconciled ratings for {updated} hotels'))
@@ -0,0 +1,27 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from app.lifecycle import SWEEP_BATCH_SIZE, sweep_bookings
+
+
+class Command(BaseCommand):
+    help = 'Expire stale pending bookings and complete stays whose check-out date has passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE, help='Bookings updated per transaction')
+        parser.add_argument('--ttl-minutes', type=int, default=None,
+                            help='Expire pending bookings older than this (default: PENDING_BOOKING_TTL_MINUTES)')
+        parser.add_argument('--every', type=int, default=None, metavar='SECONDS',
+                            help='Keep running, sweeping every SECONDS')
+
+    def handle(self, *args, **options):
+        ttl = timedelta(minutes=options['ttl_minutes']) if options['ttl_minutes'] is not None else None
+        while True:
+            counts = sweep_bookings(ttl=ttl, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Expired {counts["expired"]} pending bookings, completed {counts["completed"]} stays'))
+            if options['every'] is None:
+                return
+            close_old_connections()
+            time.sleep(options['every'])
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:40
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.db import migrations, models
+
+
+def populate_room_nights(apps, schema_editor):
+    Booking = apps.get_model('app', 'Booking')
+    RoomNight = apps.get_model('app', 'RoomNight')
+    nights, holders, conflicts = [], {}, []
+    for booking in Booking.objects.filter(status__in=['pending', 'confirmed']).order_by('pk').iterator():
+        for i in range((booking.check_out_date - booking.check_in_date).days):
+            night = (booking.room_id, booking.check_in_date + timedelta(days=i))
+            if night in holders:
+                conflicts.append((*night, holders[night], booking.id))
+                continue
+            holders[night] = booking.id
+            nights.append(RoomNight(room_id=night[0], booking_id=booking.id, date=night[1]))
+    if conflicts:
+        details = '\n'.join(f'  room {room_id} on {day}: bookings {first} and {second}'
+                            for room_id, day, first, second in conflicts[:50])
+        raise RuntimeError(f'{len(conflicts)} room-nights are held by more than one active booking. '
+                           f'Cancel the overlapping bookings, then migrate again:\n{details}')
+    RoomNight.objects.bulk_create(nights, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='app.booking')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='app.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'room'], name='roomnight_date_room_idx')],
+                'constraints': [models.UniqueConstraint(fields=('room', 'date'), name='unique_room_night')],
+            },
+        ),
+        migrations.RunPython(populate_room_nights, migrations.RunPython.noop),
+    ]
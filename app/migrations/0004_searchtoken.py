@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:43
+
+from django.db import migrations, models
+
+
+def populate_search_tokens(apps, schema_editor):
+    from app.search import INDEXED_FIELDS, document_tokens
+    SearchToken = apps.get_model('app', 'SearchToken')
+    entries = []
+    for label, weights in INDEXED_FIELDS.items():
+        for obj in apps.get_model(label).objects.iterator():
+            entries.extend(SearchToken(model=label, object_id=obj.pk, token=token, weight=weight)
+                           for token, weight in document_tokens(obj, weights).items())
+    SearchToken.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('token', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model', 'token', 'object_id'], name='searchtoken_lookup_idx')],
+                'constraints': [models.UniqueConstraint(fields=('model', 'object_id', 'token'), name='unique_search_token')],
+            },
+        ),
+        migrations.RunPython(populate_search_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_searchtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Amenity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.CharField(max_length=100, unique=True)),
+                ('bit', models.PositiveSmallIntegerField(unique=True)),
+            ],
+            options={
+                'ordering': ['bit'],
+            },
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='amenity_mask',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='amenity_mask',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
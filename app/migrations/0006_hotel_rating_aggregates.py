@@ -0,0 +1,75 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:45
+
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    Hotel = apps.get_model('app', 'Hotel')
+    Review = apps.get_model('app', 'Review')
+    stats = {row['hotel_id']: row for row in Review.objects.values('hotel_id').annotate(
+        count=Count('id'), total=Sum('rating'),
+        **{f'rating_{star}_count': Count('id', filter=Q(rating=star)) for star in range(1, 6)})}
+    hotels = list(Hotel.objects.all())
+    for hotel in hotels:
+        row = stats.get(hotel.pk)
+        hotel.review_count = row['count'] if row else 0
+        hotel.rating_sum = row['total'] if row else 0
+        for star in range(1, 6):
+            setattr(hotel, f'rating_{star}_count', row[f'rating_{star}_count'] if row else 0)
+        hotel.rating = (Decimal(hotel.rating_sum) / hotel.review_count).quantize(
+            Decimal('0.01'), rounding=ROUND_HALF_UP) if hotel.review_count else Decimal('0.00')
+    Hotel.objects.bulk_update(hotels, ['rating', 'review_count', 'rating_sum'] + [
+        f'rating_{star}_count' for star in range(1, 6)], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_amenity_catalogue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='hotel',
+            name='rating',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0.0, max_digits=3),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:46
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_hotel_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+    ]
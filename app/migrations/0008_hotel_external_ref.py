@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_hotel_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='external_ref',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:23
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_hotel_external_ref'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_type', models.CharField(blank=True, choices=[('single', 'Single'), ('double', 'Double'), ('suite', 'Suite'), ('deluxe', 'Deluxe'), ('family', 'Family')], max_length=20)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('price_per_night', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0)])),
+                ('weekdays', models.PositiveSmallIntegerField(default=127, help_text='Bitmask of the weekdays the rate applies to (Monday = 1, Tuesday = 2, ... Sunday = 64)', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(127)])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rates', to='app.hotel')),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rates', to='app.room')),
+            ],
+            options={
+                'ordering': ['hotel', 'start_date'],
+                'indexes': [models.Index(fields=['hotel', 'start_date', 'end_date'], name='roomrate_hotel_dates_idx')],
+            },
+        ),
+    ]
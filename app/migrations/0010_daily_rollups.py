@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_room_rates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_type', models.CharField(choices=[('single', 'Single'), ('double', 'Double'), ('suite', 'Suite'), ('deluxe', 'Deluxe'), ('family', 'Family')], max_length=20)),
+                ('date', models.DateField()),
+                ('rooms_sold', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='app.hotel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'hotel'], name='rollup_date_hotel_idx')],
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'room_type', 'date'), name='unique_daily_rollup')],
+            },
+        ),
+    ]
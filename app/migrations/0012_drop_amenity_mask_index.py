@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_booking_lifecycle'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hotel',
+            name='amenity_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='room',
+            name='amenity_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
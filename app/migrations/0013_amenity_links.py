@@ -0,0 +1,77 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:05
+
+import re
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_amenity_links(apps, schema_editor):
+    Amenity = apps.get_model('app', 'Amenity')
+    catalogue = dict(Amenity.objects.values_list('slug', 'pk'))
+    for model_name, field in (('Hotel', 'hotel'), ('Room', 'room')):
+        model = apps.get_model('app', model_name)
+        link = apps.get_model('app', f'{model_name}Amenity')
+        links = []
+        for pk, text in model.objects.values_list('pk', 'amenities').iterator():
+            for name in (text or '').split(','):
+                key = re.sub(r'[^a-z0-9]+', '', name.lower())[:100]
+                if not key:
+                    continue
+                if key not in catalogue:
+                    catalogue[key] = Amenity.objects.create(name=name.strip()[:100], slug=key).pk
+                links.append(link(**{f'{field}_id': pk, 'amenity_id': catalogue[key]}))
+            if len(links) >= 1000:
+                link.objects.bulk_create(links, ignore_conflicts=True)
+                links = []
+        link.objects.bulk_create(links, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_drop_amenity_mask_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='amenity',
+            options={'ordering': ['name']},
+        ),
+        migrations.RemoveField(
+            model_name='amenity',
+            name='bit',
+        ),
+        migrations.CreateModel(
+            name='HotelAmenity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amenity', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='hotel_links', to='app.amenity')),
+                ('hotel', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='amenity_links', to='app.hotel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['amenity', 'hotel'], name='hotelamenity_amenity_idx')],
+                'constraints': [models.UniqueConstraint(fields=('hotel', 'amenity'), name='unique_hotel_amenity')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RoomAmenity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amenity', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='room_links', to='app.amenity')),
+                ('room', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='amenity_links', to='app.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['amenity', 'room'], name='roomamenity_amenity_idx')],
+                'constraints': [models.UniqueConstraint(fields=('room', 'amenity'), name='unique_room_amenity')],
+            },
+        ),
+        migrations.RunPython(populate_amenity_links, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='hotel',
+            name='amenity_mask',
+        ),
+        migrations.RemoveField(
+            model_name='room',
+            name='amenity_mask',
+        ),
+    ]
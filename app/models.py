@@ -1,5 +1,9 @@
-from django.db import models
+import re
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from app.geo import encode_geohash
 
 class UserManager(BaseUserManager):
     def create_user(self, email, name, password=None, password2=None):
@@ -42,7 +46,45 @@ class User(AbstractBaseUser, PermissionsMixin):
         return True
 
 
+def amenity_key(name):
+    return re.sub(r'[^a-z0-9]+', '', name.lower())
+
+
+def parse_amenities(text):
+    return [name.strip() for name in (text or '').split(',') if amenity_key(name)]
+
+
+class AmenityManager(models.Manager):
+    def ids_for(self, names, create=True):
+        """``{slug: pk}`` of the named amenities, adding the unknown ones to the catalogue unless ``create`` is off."""
+        names = {amenity_key(name): name for name in names}
+        ids = dict(self.filter(slug__in=names).values_list('slug', 'pk'))
+        missing = names.keys() - ids.keys()
+        if create and missing:
+            self.bulk_create([self.model(name=names[key], slug=key) for key in missing], ignore_conflicts=True)
+            ids.update(self.filter(slug__in=missing).values_list('slug', 'pk'))
+        return ids
+
+    async def aids_for(self, names):
+        keys = {amenity_key(name) for name in names}
+        return {slug: pk async for slug, pk in self.filter(slug__in=keys).values_list('slug', 'pk')}
+
+
+class Amenity(models.Model):
+    name = models.CharField(max_length=100)
+    slug = models.CharField(max_length=100, unique=True)
+
+    objects = AmenityManager()
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ['name']
+
+
 class Hotel(models.Model):
+    external_ref = models.CharField(max_length=64, unique=True, null=True, blank=True)
     name = models.CharField(max_length=200)
     description = models.TextField()
     address = models.TextField()
@@ -50,9 +92,21 @@ class Hotel(models.Model):
     state = models.CharField(max_length=100)
     country = models.CharField(max_length=100)
     postal_code = models.CharField(max_length=20)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True,
+                                   validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True,
+                                    validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True, editable=False)
     phone = models.CharField(max_length=20)
     email = models.EmailField()
-    rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
+    rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00, db_index=True)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
     amenities = models.TextField(help_text="Comma-separated list of amenities")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -60,6 +114,11 @@ class Hotel(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        has_location = self.latitude is not None and self.longitude is not None
+        self.geohash = encode_geohash(self.latitude, self.longitude) if has_location else ''
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['name']
 
@@ -90,13 +149,89 @@ class Room(models.Model):
         unique_together = ['hotel', 'room_number']
         ordering = ['hotel', 'room_number']
 
+class HotelAmenity(models.Model):
+    """One amenity a hotel lists, kept in step with ``Hotel.amenities`` by ``app.amenities.link_amenities``."""
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='amenity_links', db_index=False)
+    amenity = models.ForeignKey(Amenity, on_delete=models.CASCADE, related_name='hotel_links', db_index=False)
+
+    def __str__(self):
+        return f"{self.hotel_id} - {self.amenity_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'amenity'], name='unique_hotel_amenity'),
+        ]
+        indexes = [
+            models.Index(fields=['amenity', 'hotel'], name='hotelamenity_amenity_idx'),
+        ]
+
+class RoomAmenity(models.Model):
+    """One amenity a room lists, kept in step with ``Room.amenities`` by ``app.amenities.link_amenities``."""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='amenity_links', db_index=False)
+    amenity = models.ForeignKey(Amenity, on_delete=models.CASCADE, related_name='room_links', db_index=False)
+
+    def __str__(self):
+        return f"{self.room_id} - {self.amenity_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'amenity'], name='unique_room_amenity'),
+        ]
+        indexes = [
+            models.Index(fields=['amenity', 'room'], name='roomamenity_amenity_idx'),
+        ]
+
+class RoomRate(models.Model):
+    """Nightly price for the nights ``start_date`` to ``end_date`` (inclusive).
+
+    A rate covers one room, every room of ``room_type`` in the hotel, or with neither set the
+    whole hotel; the most specific rate wins, then the newest. Nights without a rate cost
+    the room's ``price_per_night``.
+    """
+    ALL_WEEKDAYS = 0b1111111
+
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='rates')
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='rates', null=True, blank=True)
+    room_type = models.CharField(max_length=20, choices=Room.ROOM_TYPES, blank=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    price_per_night = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
+    weekdays = models.PositiveSmallIntegerField(
+        default=ALL_WEEKDAYS, validators=[MinValueValidator(1), MaxValueValidator(ALL_WEEKDAYS)],
+        help_text="Bitmask of the weekdays the rate applies to (Monday = 1, Tuesday = 2, ... Sunday = 64)")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        target = f"Room {self.room.room_number}" if self.room_id else (self.room_type or "all rooms")
+        return f"{self.hotel.name} - {target} - {self.start_date} to {self.end_date}"
+
+    def clean(self):
+        if self.end_date and self.start_date and self.end_date < self.start_date:
+            raise ValidationError({'end_date': "End date cannot be before the start date"})
+
+    def save(self, *args, **kwargs):
+        if self.room_id:
+            self.hotel_id = self.room.hotel_id
+            self.room_type = ''
+        super().save(*args, **kwargs)
+
+    class Meta:
+        ordering = ['hotel', 'start_date']
+        indexes = [
+            models.Index(fields=['hotel', 'start_date', 'end_date'], name='roomrate_hotel_dates_idx'),
+        ]
+
 class Booking(models.Model):
     BOOKING_STATUS = [
         ('pending', 'Pending'),
         ('confirmed', 'Confirmed'),
         ('cancelled', 'Cancelled'),
         ('completed', 'Completed'),
+        ('expired', 'Expired'),
     ]
+    ACTIVE_STATUSES = ['pending', 'confirmed']
+    STAY_FIELDS = ('room_id', 'check_in_date', 'check_out_date')
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='bookings')
@@ -112,14 +247,86 @@ class Booking(models.Model):
     def __str__(self):
         return f"Booking {self.id} - {self.user.email} - {self.room}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        booking = super().from_db(db, field_names, values)
+        booking._priced_stay = booking.stay()
+        return booking
+
+    def stay(self):
+        return tuple(self.__dict__.get(name) for name in self.STAY_FIELDS)
+
     def save(self, *args, **kwargs):
-        if not self.total_price:
-            nights = (self.check_out_date - self.check_in_date).days
-            self.total_price = self.room.price_per_night * nights
-        super().save(*args, **kwargs)
+        priced = getattr(self, '_priced_stay', None)
+        if not self.total_price or (priced and None not in priced and priced != self.stay()):
+            from app.pricing import quote_booking
+            self.total_price = quote_booking(self)
+        # the post_save handlers claim the room-nights: a clash rolls the booking back with them
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+        self._priced_stay = self.stay()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='booking_user_created_idx'),
+            models.Index(fields=['user', 'check_in_date', 'id'], name='booking_user_checkin_idx'),
+            models.Index(fields=['user', 'check_out_date', 'id'], name='booking_user_checkout_idx'),
+            models.Index(fields=['status', 'created_at'], name='booking_status_created_idx'),
+            models.Index(fields=['status', 'check_out_date'], name='booking_status_checkout_idx'),
+        ]
+
+class RoomNight(models.Model):
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='nights')
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='nights')
+    date = models.DateField()
+
+    def __str__(self):
+        return f"Room {self.room_id} - {self.date}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date'], name='unique_room_night'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'room'], name='roomnight_date_room_idx'),
+        ]
+
+class DailyRollup(models.Model):
+    """Room-nights sold and their revenue per hotel, room type and night, kept current by ``app.rollups``."""
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='rollups')
+    room_type = models.CharField(max_length=20, choices=Room.ROOM_TYPES)
+    date = models.DateField()
+    rooms_sold = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.hotel_id} - {self.room_type} - {self.date}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'room_type', 'date'], name='unique_daily_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'hotel'], name='rollup_date_hotel_idx'),
+        ]
+
+class SearchToken(models.Model):
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    token = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.model}:{self.object_id} - {self.token}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id', 'token'], name='unique_search_token'),
+        ]
+        indexes = [
+            models.Index(fields=['model', 'token', 'object_id'], name='searchtoken_lookup_idx'),
+        ]
 
 class Review(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews')
@@ -135,4 +342,8 @@ class Review(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='review_created_idx'),
+            models.Index(fields=['rating', 'id'], name='review_rating_idx'),
+        ]
 
@@ -0,0 +1,181 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections.abc import Mapping
+from datetime import date
+from decimal import Decimal
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    ordering_param = api_settings.ORDERING_PARAM
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.page_rows(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page = self.page_queryset(queryset, request, view)
+        return self.page_rows([row async for row in page.aiterator(chunk_size=self.page_size + 1)])
+
+    def page_queryset(self, queryset, request, view):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor_position, self.reverse = self.decode_cursor(request)
+
+        ordering = [self.invert(field) for field in self.ordering] if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor_position is not None:
+            queryset = queryset.filter(self.keyset_filter(ordering, self.cursor_position))
+        return queryset[:self.page_size + 1]
+
+    def page_rows(self, rows):
+        position, reverse = self.cursor_position, self.reverse
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = self.position(rows[-1]) if rows and has_next else None
+        self.previous_position = self.position(rows[0]) if rows and has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.next_position, reverse=False),
+            'previous': self.get_link(self.previous_position, reverse=True),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_ordering(self, request, queryset, view):
+        valid_fields = getattr(view, 'ordering_fields', None) or []
+        fields = []
+        param = request.query_params.get(self.ordering_param)
+        if param:
+            fields = [term.strip() for term in param.split(',') if term.strip().lstrip('-') in valid_fields]
+        if not fields:
+            fields = list(getattr(view, 'ordering', None) or queryset.model._meta.ordering)
+        fields = [field for field in fields if field.lstrip('-') not in ('id', 'pk')]
+        tie_breaker = '-id' if fields and fields[0].startswith('-') else 'id'
+        return fields + [tie_breaker]
+
+    def invert(self, field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    def keyset_filter(self, ordering, position):
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def position(self, row):
+        values = []
+        for field in self.ordering:
+            value = self.get_value(row, field.lstrip('-'))
+            if isinstance(value, (date, Decimal)):
+                value = value.isoformat() if isinstance(value, date) else str(value)
+            values.append(value)
+        return values
+
+    def get_value(self, row, name):
+        if isinstance(row, Mapping):
+            return row[name]
+        *path, last = name.split('__')
+        for part in path:
+            row = getattr(row, part)
+        return getattr(row, row._meta.get_field(last).attname)
+
+    def encode_cursor(self, position, reverse):
+        payload = {'o': self.ordering, 'p': position}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            position, reverse = payload['p'], bool(payload.get('r'))
+            valid = payload['o'] == self.ordering and len(position) == len(self.ordering)
+        except (TypeError, ValueError, KeyError):
+            valid = False
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def get_link(self, position, reverse):
+        if position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+
+class PageNumberPagination(pagination.PageNumberPagination):
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.page.object_list = [row async for row in self.page.object_list.aiterator(chunk_size=page_size)]
+        return list(self.page)
+
+
+class CollectionPagination(BasePagination):
+    """Keyset pagination by default; ``?page=`` switches to page numbers with a total count."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.choose(request).paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return await self.choose(request).apaginate_queryset(queryset, request, view)
+
+    def choose(self, request):
+        if PageNumberPagination.page_query_param in request.query_params:
+            self.delegate = PageNumberPagination()
+        else:
+            self.delegate = KeysetPagination()
+        return self.delegate
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return KeysetPagination().get_paginated_response_schema(schema)
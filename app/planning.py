@@ -0,0 +1,323 @@
+import decimal
+from datetime import datetime
+from functools import cached_property
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+PLAN_CACHE_SIZE = 1000
+
+_plans = {}
+_values_plans = {}
+
+
+class QueryPlan:
+    def __init__(self):
+        self.select_related = set()
+        self.prefetch_related = set()
+        self.only = set()
+        self.restrict = True
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*sorted(self.prefetch_related))
+        if self.restrict and self.only:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+def _join(prefix, name):
+    return f'{prefix}__{name}' if prefix else name
+
+
+def _walk_source(plan, model, prefix, parts, prefetched=False):
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            # properties and methods may touch any column of this model
+            plan.restrict = False
+            return None, prefix
+        path = _join(prefix, part)
+        last = index == len(parts) - 1
+        if not field.is_relation:
+            if not prefetched:
+                plan.only.add(path)
+            return None, path
+        if field.many_to_one or (field.one_to_one and field.concrete):
+            if not prefetched:
+                plan.only.add(path)
+            if last:
+                return field.related_model, path
+            if prefetched:
+                plan.prefetch_related.add(path)
+            else:
+                plan.select_related.add(path)
+        else:
+            plan.prefetch_related.add(path)
+            prefetched = True
+        model = field.related_model
+        prefix = path
+    return model, prefix
+
+
+def _walk_serializer(plan, serializer, model, prefix='', prefetched=False):
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            plan.restrict = False
+            continue
+        parts = field.source.split('.')
+        if isinstance(field, serializers.ListSerializer):
+            related, path = _walk_source(plan, model, prefix, parts, prefetched)
+            if related is not None:
+                plan.prefetch_related.add(path)
+                _walk_serializer(plan, field.child, related, path, prefetched=True)
+        elif isinstance(field, serializers.BaseSerializer):
+            related, path = _walk_source(plan, model, prefix, parts, prefetched)
+            if related is not None:
+                (plan.prefetch_related if prefetched else plan.select_related).add(path)
+                _walk_serializer(plan, field, related, path, prefetched)
+        elif isinstance(field, serializers.ManyRelatedField):
+            related, path = _walk_source(plan, model, prefix, parts, prefetched)
+            if related is not None:
+                plan.prefetch_related.add(path)
+        else:
+            _walk_source(plan, model, prefix, parts, prefetched)
+
+
+def signature(serializer):
+    """Hashable shape of a serializer's fields, nested serializers included (sparse fieldsets vary it)."""
+    shape = []
+    for name, field in serializer.fields.items():
+        if isinstance(field, serializers.ListSerializer):
+            field = field.child
+        shape.append((name, type(field), signature(field) if isinstance(field, serializers.BaseSerializer) else None))
+    return type(serializer), tuple(shape)
+
+
+def _remember(cache, key, value):
+    if len(cache) >= PLAN_CACHE_SIZE:
+        cache.clear()
+    cache[key] = value
+    return value
+
+
+def build_plan(serializer):
+    key = signature(serializer)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = QueryPlan()
+        _walk_serializer(plan, serializer, serializer.Meta.model)
+        _remember(_plans, key, plan)
+    return plan
+
+
+def plan_queryset(queryset, serializer):
+    return build_plan(serializer).apply(queryset)
+
+
+class ValuesPlan:
+    """Build a serializer's output from ``values()`` rows instead of model instances.
+
+    ``fields`` holds ``(name, key, convert, nested)`` in serializer order: ``key`` is the
+    ``values()`` column, ``convert`` does what the field's ``to_representation`` would (None when
+    the column value is already the output) and ``nested`` is the plan of a nested serializer,
+    whose ``key`` is its foreign key. Converters that depend on the active timezone are bound
+    once per ``dump``.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.rows = {}
+
+    @property
+    def keys(self):
+        keys = []
+        for name, key, convert, nested in self.fields:
+            keys.append(key)
+            if nested is not None:
+                keys.extend(nested.keys)
+        return keys
+
+    def row_builder(self, zone):
+        fields = [(name, key, convert.bind(zone) if isinstance(convert, DateTimeConverter) else convert,
+                   nested.row_builder(zone) if nested is not None else None)
+                  for name, key, convert, nested in self.fields]
+
+        def row(values):
+            data = {}
+            for name, key, convert, nested in fields:
+                value = values[key]
+                if value is None:
+                    data[name] = None
+                elif nested is not None:
+                    data[name] = nested(values)
+                elif convert is None:
+                    data[name] = value
+                else:
+                    data[name] = convert(value)
+            return data
+        return row
+
+    def dump(self, rows):
+        zone = timezone.get_current_timezone() if settings.USE_TZ else None
+        row = self.rows.get(zone)
+        if row is None:
+            row = self.rows[zone] = self.row_builder(zone)
+        return [row(values) for values in rows]
+
+    def apply(self, queryset, extra=()):
+        return queryset.prefetch_related(None).values(*dict.fromkeys([*self.keys, *extra]))
+
+
+class DateTimeConverter:
+    """``DateTimeField.to_representation`` with the output timezone looked up once, not per value."""
+
+    def __init__(self, field):
+        self.field = field
+
+    def bind(self, zone):
+        field = self.field
+        if getattr(field, 'format', api_settings.DATETIME_FORMAT) != ISO_8601:
+            return field.to_representation
+        zone = field.timezone if hasattr(field, 'timezone') else zone
+
+        def convert(value):
+            if zone is None or not isinstance(value, datetime) or value.tzinfo is None:
+                return field.to_representation(value)
+            value = value.astimezone(zone).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return convert
+
+
+def _column(model, parts):
+    # the model field behind a dotted source, following only non-null forward foreign keys
+    for part in parts[:-1]:
+        field = model._meta.get_field(part)
+        if not (field.many_to_one or (field.one_to_one and field.concrete)) or field.null:
+            return None
+        model = field.related_model
+    field = model._meta.get_field(parts[-1])
+    return field if field.concrete and not field.many_to_many else None
+
+
+def _decimal(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or field.localize or field.normalize_output or not coerce_to_string:
+        return field.to_representation
+    quantum = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            return field.to_representation(value)
+        return format(value.quantize(quantum, rounding=field.rounding, context=context), 'f')
+    return convert
+
+
+def _converter(field, column):
+    """Return the converter for ``field`` reading ``column``, None for no conversion, False if unsupported."""
+    if column.is_relation:
+        return None if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None else False
+    if isinstance(field, serializers.RelatedField) or isinstance(column, models.FileField):
+        return False
+    if isinstance(field, serializers.DecimalField):
+        return _decimal(field)
+    if isinstance(field, serializers.DateTimeField):
+        return DateTimeConverter(field)
+    if isinstance(field, serializers.DateField):
+        if getattr(field, 'format', api_settings.DATE_FORMAT) == ISO_8601:
+            return lambda value: value.isoformat()
+        return field.to_representation
+    if isinstance(field, serializers.ChoiceField):
+        choices = field.choice_strings_to_values
+        return lambda value: choices.get(str(value), value)
+    if ((isinstance(field, serializers.CharField) and isinstance(column, (models.CharField, models.TextField)))
+            or (isinstance(field, serializers.IntegerField) and isinstance(column, models.IntegerField))
+            or (isinstance(field, serializers.BooleanField) and isinstance(column, models.BooleanField))):
+        return None
+    return field.to_representation
+
+
+def _compile(serializer, model, prefix=''):
+    fields = []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*' or isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+            return None
+        try:
+            column = _column(model, field.source.split('.'))
+        except FieldDoesNotExist:
+            return None
+        if column is None:
+            return None
+        key = _join(prefix, field.source.replace('.', '__'))
+        if isinstance(field, serializers.BaseSerializer):
+            nested = _compile(field, column.related_model, key) if column.is_relation else None
+            if nested is None:
+                return None
+            fields.append((field.field_name, key, None, nested))
+            continue
+        convert = _converter(field, column)
+        if convert is False:
+            return None
+        fields.append((field.field_name, key, convert, None))
+    return ValuesPlan(fields)
+
+
+def build_values_plan(serializer):
+    """Return the ``ValuesPlan`` for ``serializer``, or None when some field needs a model instance."""
+    key = signature(serializer)
+    if key not in _values_plans:
+        return _remember(_values_plans, key, _compile(serializer, serializer.Meta.model))
+    return _values_plans[key]
+
+
+class QueryPlanMixin:
+    """Plan list and detail querysets from the serializer's fields.
+
+    Lists are fetched with ``values()`` and serialized through the serializer's ``ValuesPlan``
+    when it has one (set ``values_lists = False`` to opt out); the output is the same.
+    """
+    values_lists = True
+
+    def get_queryset(self):
+        return self.plan_queryset(super().get_queryset())
+
+    def plan_queryset(self, queryset):
+        return plan_queryset(queryset, self.get_serializer())
+
+    @cached_property
+    def values_plan(self):
+        return build_values_plan(self.get_serializer()) if self.values_lists else None
+
+    def list_queryset(self, queryset):
+        if self.values_plan is None:
+            return queryset
+        # keyset pagination reads the ordering columns from the rows
+        ordering = [getattr(self, 'ordering', None), getattr(self, 'ordering_fields', None)]
+        names = [name for names in ordering if isinstance(names, (list, tuple)) for name in names]
+        return self.values_plan.apply(queryset, [queryset.model._meta.pk.name, *(name.lstrip('-') for name in names)])
+
+    def serialize_list(self, rows):
+        if self.values_plan is None:
+            return self.get_serializer(rows, many=True).data
+        return self.values_plan.dump(rows)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.list_queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.serialize_list(page))
+        return Response(self.serialize_list(queryset))
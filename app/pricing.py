@@ -0,0 +1,174 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+import numpy as np
+from rest_framework import serializers
+from app.models import Booking, Room, RoomRate
+
+QUOTE_FIELD = 'quoted_total'
+QUOTE_FIELDS = ('pk', 'hotel_id', 'room_type', 'price_per_night')
+ROOM_TYPE_CODES = {code: index for index, (code, _) in enumerate(Room.ROOM_TYPES)}
+
+
+def cents(value):
+    return int((Decimal(value) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def to_decimal(amount):
+    return Decimal(int(amount)).scaleb(-2)
+
+
+def room_row(room):
+    return room.pk, room.hotel_id, room.room_type, room.price_per_night
+
+
+def _specificity(rate):
+    return 2 if rate.room_id else 1 if rate.room_type else 0
+
+
+class RateCalendar:
+    """Nightly prices in cents for ``rooms`` over the nights ``first`` to ``last`` (exclusive), as a rooms × nights array.
+
+    ``rooms`` are ``(pk, hotel_id, room_type, price_per_night)`` rows. Every night starts at the
+    room's own price and ``rates`` are painted over it, least specific and oldest first, each
+    one a single masked assignment across all the rooms and nights it covers.
+    """
+
+    def __init__(self, rooms, first, last, rates=()):
+        self.first = first
+        nights = max((last - first).days, 0)
+        room_ids, hotel_ids, types, base = zip(*rooms) if rooms else ((), (), (), ())
+        self.room_ids = np.array(room_ids, dtype=np.int64)
+        self.hotel_ids = np.array(hotel_ids, dtype=np.int64)
+        self.types = np.array([ROOM_TYPE_CODES.get(code, -1) for code in types], dtype=np.int64)
+        self.prices = np.repeat(np.array([cents(price) for price in base], dtype=np.int64)[:, None], nights, axis=1)
+        self.days = np.arange(nights)
+        self.weekdays = (first.weekday() + self.days) % 7
+        for rate in sorted(rates, key=lambda rate: (_specificity(rate), rate.pk)):
+            self.paint(rate)
+
+    def paint(self, rate):
+        if rate.room_id:
+            rooms = self.room_ids == rate.room_id
+        else:
+            rooms = self.hotel_ids == rate.hotel_id
+            if rate.room_type:
+                rooms &= self.types == ROOM_TYPE_CODES.get(rate.room_type, -2)
+        start, end = (rate.start_date - self.first).days, (rate.end_date - self.first).days
+        nights = (self.days >= start) & (self.days <= end) & ((rate.weekdays >> self.weekdays) & 1).astype(bool)
+        self.prices[np.ix_(rooms, nights)] = cents(rate.price_per_night)
+
+    def totals(self, check_ins, check_outs):
+        """Stay totals in cents, row ``i`` for room ``i`` from ``check_ins[i]`` to ``check_outs[i]``.
+
+        Raises ValueError when a check-out is not after its check-in.
+        """
+        running = np.zeros((len(self.prices), self.prices.shape[1] + 1), dtype=np.int64)
+        np.cumsum(self.prices, axis=1, out=running[:, 1:])
+        rows = np.arange(len(self.prices))
+        starts = np.array([(day - self.first).days for day in check_ins], dtype=np.int64)
+        ends = np.array([(day - self.first).days for day in check_outs], dtype=np.int64)
+        if (ends <= starts).any():
+            raise ValueError('Every stay must be at least one night')
+        return running[rows, ends] - running[rows, starts]
+
+
+def rates_for(rooms, first, last):
+    """Rates of the rooms' hotels touching the nights ``first`` to ``last`` (exclusive)."""
+    return RoomRate.objects.filter(hotel_id__in={row[1] for row in rooms}, start_date__lt=last,
+                                   end_date__gte=first).only('room_id', 'hotel_id', 'room_type', 'start_date',
+                                                             'end_date', 'price_per_night', 'weekdays')
+
+
+def _window(stays):
+    check_ins, check_outs = zip(*stays)
+    return min(check_ins), max(check_outs)
+
+
+def _totals(rooms, stays, rates):
+    if not rooms:
+        return np.zeros(0, dtype=np.int64)
+    check_ins, check_outs = zip(*stays)
+    return RateCalendar(rooms, *_window(stays), rates).totals(check_ins, check_outs)
+
+
+def quote_stays(rooms, stays):
+    """Total price in cents of each ``(check_in, check_out)`` stay in the matching room row, with one rate query."""
+    rates = list(rates_for(rooms, *_window(stays))) if rooms else []
+    return _totals(rooms, stays, rates)
+
+
+async def aquote_stays(rooms, stays):
+    rates = [rate async for rate in rates_for(rooms, *_window(stays))] if rooms else []
+    return _totals(rooms, stays, rates)
+
+
+def quote_booking(booking):
+    """Price of a booking's stay; a room that is not loaded yet is read as a single narrow row.
+
+    Raises ValueError unless the check-out date is after the check-in date.
+    """
+    if booking.check_out_date <= booking.check_in_date:
+        raise ValueError(f'Booking stay {booking.check_in_date} to {booking.check_out_date} has no nights')
+    if Booking._meta.get_field('room').is_cached(booking):
+        row = room_row(booking.room)
+    else:
+        row = Room.objects.values_list(*QUOTE_FIELDS).get(pk=booking.room_id)
+    return to_decimal(quote_stays([row], [(booking.check_in_date, booking.check_out_date)])[0])
+
+
+def _total_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return cents(value)
+    except (InvalidOperation, ValueError):
+        raise serializers.ValidationError({name: ['A valid number is required.']})
+
+
+def quote_options(params, stay):
+    """Read ``min_total``, ``max_total`` and ``ordering=[-]quoted_total`` from a search, in cents.
+
+    Other ``ordering`` values are left alone (search results keep their default order).
+    """
+    ordering = params.get('ordering')
+    options = {'min': _total_param(params, 'min_total'), 'max': _total_param(params, 'max_total'),
+               'ordering': ordering if ordering in (QUOTE_FIELD, f'-{QUOTE_FIELD}') else None}
+    if not stay and any(value is not None for value in options.values()):
+        raise serializers.ValidationError({'non_field_errors': ['check_in and check_out are required to price a stay.']})
+    return options
+
+
+def select_quotes(rooms, totals, options):
+    """Apply the ``quote_options`` to quoted rooms: returns the room ids in result order and ``{id: total}``."""
+    ids = np.array([row[0] for row in rooms], dtype=np.int64)
+    keep = np.ones(len(ids), dtype=bool)
+    if options['min'] is not None:
+        keep &= totals >= options['min']
+    if options['max'] is not None:
+        keep &= totals <= options['max']
+    ids, totals = ids[keep], totals[keep]
+    if options['ordering']:
+        order = np.argsort(-totals if options['ordering'].startswith('-') else totals, kind='stable')
+        ids, totals = ids[order], totals[order]
+    ids = ids.tolist()
+    return ids, dict(zip(ids, totals.tolist()))
+
+
+def quote_search(queryset, stay, options):
+    rooms = list(queryset.values_list(*QUOTE_FIELDS))
+    return select_quotes(rooms, quote_stays(rooms, [stay] * len(rooms)), options)
+
+
+async def aquote_search(queryset, stay, options):
+    rooms = [row async for row in queryset.values_list(*QUOTE_FIELDS)]
+    return select_quotes(rooms, await aquote_stays(rooms, [stay] * len(rooms)), options)
+
+
+def with_quotes(serialize, totals):
+    """Wrap a chunk serializer so every room also carries its ``quoted_total``."""
+    def serialize_quoted(rows):
+        items = serialize(rows)
+        for row, item in zip(rows, items):
+            item[QUOTE_FIELD] = str(to_decimal(totals[row['id'] if isinstance(row, dict) else row.pk]))
+        return items
+    return serialize_quoted
@@ -0,0 +1,95 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from app.caching import invalidate_catalog, invalidate_hotels
+from app.models import Hotel, Review
+
+STAR_FIELDS = {star: f'rating_{star}_count' for star in range(1, 6)}
+AGGREGATE_FIELDS = ['rating', 'review_count', 'rating_sum', *STAR_FIELDS.values()]
+
+
+def average_rating(rating_sum, review_count):
+    """The stored rating: the mean rounded half up to two places, 0.00 without reviews."""
+    if not review_count:
+        return Decimal('0.00')
+    return (Decimal(rating_sum) / review_count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def _apply(hotel_id, rating, sign):
+    star = STAR_FIELDS[rating]
+    Hotel.objects.filter(pk=hotel_id).update(**{
+        'review_count': F('review_count') + sign,
+        'rating_sum': F('rating_sum') + sign * rating,
+        star: F(star) + sign,
+    })
+
+
+def review_score(review):
+    return review.hotel_id, review.rating
+
+
+def stored_score(review, using=None):
+    """The ``(hotel_id, rating)`` a review counted for before the changes on the instance."""
+    if review._state.adding or review.pk is None:
+        return None
+    return Review.objects.using(using).filter(pk=review.pk).values_list('hotel_id', 'rating').first()
+
+
+def record_review_change(old=None, new=None):
+    """Apply a review's move from ``old`` to ``new``, each a ``(hotel_id, rating)`` pair or None."""
+    if old == new:
+        return
+    with transaction.atomic():
+        if old:
+            _apply(*old, -1)
+        if new:
+            _apply(*new, 1)
+        hotel_ids = {pair[0] for pair in (old, new) if pair}
+        now = timezone.now()
+        for pk, rating_sum, review_count in Hotel.objects.filter(pk__in=hotel_ids).values_list(
+                'pk', 'rating_sum', 'review_count'):
+            Hotel.objects.filter(pk=pk).update(rating=average_rating(rating_sum, review_count), updated_at=now)
+        # rooms too: ``?expand=hotel`` embeds the rating in cached room responses
+        invalidate_hotels(hotel_ids)
+
+
+def reconcile_ratings(batch_size=1000):
+    counts = {f'r{star}': Count('id', filter=Q(rating=star)) for star in STAR_FIELDS}
+    updated, last_pk = 0, 0
+    while True:
+        with transaction.atomic():
+            hotels = list(Hotel.objects.filter(pk__gt=last_pk).order_by('pk').select_for_update()
+                          .only('pk', *AGGREGATE_FIELDS)[:batch_size])
+            if not hotels:
+                invalidate_catalog()
+                return updated
+            stats = {row['hotel_id']: row for row in Review.objects.filter(hotel__in=hotels)
+                     .values('hotel_id').annotate(count=Count('id'), total=Sum('rating'), **counts)}
+            for hotel in hotels:
+                row = stats.get(hotel.pk, {})
+                hotel.review_count = row.get('count', 0)
+                hotel.rating_sum = row.get('total') or 0
+                for star, field in STAR_FIELDS.items():
+                    setattr(hotel, field, row.get(f'r{star}', 0))
+                hotel.rating = average_rating(hotel.rating_sum, hotel.review_count)
+            Hotel.objects.bulk_update(hotels, AGGREGATE_FIELDS)
+        updated += len(hotels)
+        last_pk = hotels[-1].pk
+
+
+class RatingFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        for param, lookup in (('min_rating', 'rating__gte'), ('max_rating', 'rating__lte')):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    rating = Decimal(value)
+                except InvalidOperation:
+                    rating = None
+                if rating is None or not rating.is_finite() or not 0 <= rating <= 5:
+                    raise ValidationError({param: ['A number from 0 to 5 is required.']})
+                queryset = queryset.filter(**{lookup: rating})
+        return queryset
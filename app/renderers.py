@@ -0,0 +1,50 @@
+import json
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SHORT_SEPARATORS = (',', ':')
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    _default = JSONEncoder().default
+
+
+def _escape_line_separators(raw):
+    for char, escaped in LINE_SEPARATORS:
+        raw = raw.replace(char, escaped)
+    return raw
+
+
+def dumps(data):
+    """Compact UTF-8 JSON, byte-for-byte what ``JSONRenderer`` produces under the default settings.
+
+    Uses orjson when it is installed; values orjson does not handle natively go through DRF's
+    ``JSONEncoder``, and anything it rejects (e.g. integers over 64 bits) falls back to ``json``.
+    """
+    if orjson is not None:
+        try:
+            return _escape_line_separators(orjson.dumps(data, default=_default, option=ORJSON_OPTIONS))
+        except orjson.JSONEncodeError:
+            pass
+    return _escape_line_separators(json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=False, allow_nan=not api_settings.STRICT_JSON,
+        separators=SHORT_SEPARATORS).encode())
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` encoding compact responses with ``dumps``; indented or ASCII output is left to DRF."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (self.compact and not self.ensure_ascii and self.strict
+                and self.get_indent(accepted_media_type, renderer_context or {}) is None):
+            return dumps(data)
+        return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,191 @@
+import calendar
+from collections import defaultdict
+from datetime import date
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from rest_framework import serializers
+from app.models import Booking, DailyRollup, Hotel, Room
+from app.pricing import cents, to_decimal
+
+SOLD_STATUSES = ('confirmed', 'completed')
+ROOM_TYPES = [code for code, _ in Room.ROOM_TYPES]
+TYPE_CODES = {code: index for index, code in enumerate(ROOM_TYPES)}
+SALE_FIELDS = ('room_id', 'check_in_date', 'check_out_date', 'total_price')
+
+
+def booking_sale(booking):
+    """``(room_id, check_in, check_out, total_price)`` of a booking counted as sold, else None."""
+    if booking.status not in SOLD_STATUSES:
+        return None
+    return tuple(getattr(booking, name) for name in SALE_FIELDS)
+
+
+def stored_sale(booking, using=None):
+    """The sale a booking counted as before the changes on the instance, read from the database."""
+    if booking._state.adding or booking.pk is None:
+        return None
+    row = Booking.objects.using(using).filter(pk=booking.pk, status__in=SOLD_STATUSES).values_list(*SALE_FIELDS)
+    return row.first()
+
+
+def nightly_sales(hotels, types, check_ins, check_outs, amounts, signs):
+    """Spread stays over their nights and sum them per ``(hotel, room type code, night ordinal)``.
+
+    Takes one array entry per stay, with dates as ordinals and amounts in cents; each stay's
+    amount is split evenly over its nights, the remainder cents going to the first nights.
+    Returns the distinct keys as a ``(n, 3)`` array with the room-nights and cents on each.
+    """
+    nights = check_outs - check_ins
+    valid = nights > 0
+    hotels, types, check_ins, nights, amounts, signs = (
+        column[valid] for column in (hotels, types, check_ins, nights, amounts, signs))
+    stay = np.repeat(np.arange(len(nights)), nights)
+    offset = np.arange(len(stay)) - np.repeat(np.cumsum(nights) - nights, nights)
+    night_cents = amounts[stay] // nights[stay] + (offset < amounts[stay] % nights[stay])
+    keys, inverse = np.unique(np.stack([hotels[stay], types[stay], check_ins[stay] + offset], axis=1),
+                              axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    sold, revenue = np.zeros(len(keys), dtype=np.int64), np.zeros(len(keys), dtype=np.int64)
+    np.add.at(sold, inverse, signs[stay])
+    np.add.at(revenue, inverse, signs[stay] * night_cents)
+    return keys, sold, revenue
+
+
+def _columns(rows):
+    """Arrays for ``nightly_sales`` from ``(hotel_id, room_type, check_in, check_out, total, sign)`` rows."""
+    hotels, types, check_ins, check_outs, totals, signs = zip(*rows) if rows else ((),) * 6
+    return (np.array(hotels, dtype=np.int64), np.array([TYPE_CODES.get(code, -1) for code in types], dtype=np.int64),
+            np.array([day.toordinal() for day in check_ins], dtype=np.int64),
+            np.array([day.toordinal() for day in check_outs], dtype=np.int64),
+            np.array([cents(total) for total in totals], dtype=np.int64), np.array(signs, dtype=np.int64))
+
+
+def record_sales(removed=(), added=()):
+    """Move the daily rollups by the sales in ``removed`` (taken off) and ``added``.
+
+    Sales are ``booking_sale`` tuples or None. Nights whose change is the same are updated
+    together, so a booking costs one or two UPDATEs per hotel and room type.
+    """
+    changes = [(sale, -1) for sale in removed if sale] + [(sale, 1) for sale in added if sale]
+    if not changes:
+        return
+    rooms = {pk: (hotel_id, room_type) for pk, hotel_id, room_type in Room.objects.filter(
+        pk__in={sale[0] for sale, _ in changes}).values_list('pk', 'hotel_id', 'room_type')}
+    rows = [(*rooms[sale[0]], *sale[1:], sign) for sale, sign in changes if sale[0] in rooms]
+    if not rows:
+        return
+    keys, sold, revenue = nightly_sales(*_columns(rows))
+    groups = defaultdict(list)
+    for (hotel_id, type_code, day), nights, amount in zip(keys.tolist(), sold.tolist(), revenue.tolist()):
+        if nights or amount:
+            groups[hotel_id, ROOM_TYPES[type_code], nights, amount].append(date.fromordinal(day))
+    with transaction.atomic():
+        DailyRollup.objects.bulk_create([
+            DailyRollup(hotel_id=hotel_id, room_type=room_type, date=day)
+            for (hotel_id, room_type, _, _), days in groups.items() for day in days], ignore_conflicts=True)
+        for (hotel_id, room_type, nights, amount), days in groups.items():
+            DailyRollup.objects.filter(hotel_id=hotel_id, room_type=room_type, date__in=days).update(
+                rooms_sold=F('rooms_sold') + nights, revenue=F('revenue') + to_decimal(amount))
+
+
+def record_booking_change(old=None, new=None):
+    """Apply a booking's move from sale ``old`` to sale ``new`` (see ``booking_sale``)."""
+    if old != new:
+        record_sales(removed=[old], added=[new])
+
+
+def rebuild_rollups(batch_size=100):
+    """Recompute the daily rollups from bookings, ``batch_size`` hotels at a time; returns the rows written."""
+    written, last_pk = 0, 0
+    while True:
+        hotel_ids = list(Hotel.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not hotel_ids:
+            return written
+        sales = Booking.objects.filter(room__hotel_id__in=hotel_ids, status__in=SOLD_STATUSES).values_list(
+            'room__hotel_id', 'room__room_type', 'check_in_date', 'check_out_date', 'total_price')
+        keys, sold, revenue = nightly_sales(*_columns([(*sale, 1) for sale in sales.iterator(chunk_size=5000)]))
+        rollups = [DailyRollup(hotel_id=hotel_id, room_type=ROOM_TYPES[type_code], date=date.fromordinal(day),
+                               rooms_sold=nights, revenue=to_decimal(amount))
+                   for (hotel_id, type_code, day), nights, amount in zip(keys.tolist(), sold.tolist(), revenue.tolist())]
+        with transaction.atomic():
+            DailyRollup.objects.filter(hotel_id__in=hotel_ids).delete()
+            DailyRollup.objects.bulk_create(rollups, batch_size=1000)
+        written += len(rollups)
+        last_pk = hotel_ids[-1]
+
+
+REPORT_NIGHTS = 30
+MAX_REPORT_NIGHTS = 3660
+GROUPS = {'date': 'date', 'month': TruncMonth('date'), 'hotel': 'hotel_id', 'room_type': 'room_type'}
+INVENTORY = {'hotel': 'hotel_id', 'room_type': 'room_type'}
+
+
+def report_options(params):
+    """Read ``group_by``, ``hotel`` (comma-separated ids) and ``room_type`` for ``occupancy_report``."""
+    group_by = [name.strip() for name in params.get('group_by', 'date').split(',') if name.strip()]
+    unknown = [name for name in group_by if name not in GROUPS]
+    if unknown:
+        raise serializers.ValidationError({'group_by': [f'Cannot group by "{name}".' for name in unknown]})
+    if 'date' in group_by and 'month' in group_by:
+        raise serializers.ValidationError({'group_by': ['Group by "date" or "month", not both.']})
+    try:
+        hotel_ids = [int(pk) for pk in params.get('hotel', '').split(',') if pk.strip()]
+    except ValueError:
+        raise serializers.ValidationError({'hotel': ['A comma-separated list of hotel ids is required.']})
+    room_type = params.get('room_type') or None
+    if room_type and room_type not in TYPE_CODES:
+        raise serializers.ValidationError({'room_type': [f'"{room_type}" is not a valid choice.']})
+    return {'group_by': list(dict.fromkeys(group_by)), 'hotel_ids': hotel_ids, 'room_type': room_type}
+
+
+def _nights_in(group, first, last):
+    """Nights of the window ``first`` to ``last`` (exclusive) falling in a result row's period."""
+    if 'date' in group:
+        return 1
+    if 'month' in group:
+        month = group['month']
+        start = max(first, month)
+        end = min(last, date.fromordinal(month.toordinal() + calendar.monthrange(month.year, month.month)[1]))
+        return (end - start).days
+    return (last - first).days
+
+
+def _ratio(amount, nights):
+    return str(to_decimal(round(cents(amount) / nights))) if nights else None
+
+
+def occupancy_report(first, last, group_by=('date',), hotel_ids=None, room_type=None):
+    """Occupancy, ADR, RevPAR and revenue over the nights ``first`` to ``last`` (exclusive), from the rollups.
+
+    Rows are grouped by any of ``date``, ``month``, ``hotel`` and ``room_type``. Rooms available
+    are today's rooms of each hotel and type times the nights in the row's period; periods
+    without sold nights are left out.
+    """
+    rollups, rooms = DailyRollup.objects.filter(date__gte=first, date__lt=last), Room.objects.all()
+    if hotel_ids:
+        rollups, rooms = rollups.filter(hotel_id__in=hotel_ids), rooms.filter(hotel_id__in=hotel_ids)
+    if room_type:
+        rollups, rooms = rollups.filter(room_type=room_type), rooms.filter(room_type=room_type)
+
+    names = {name: f'group_{name}' for name in group_by}
+    rows = (rollups.values(**{alias: F(GROUPS[name]) if isinstance(GROUPS[name], str) else GROUPS[name]
+                              for name, alias in names.items()})
+            .annotate(sold=Sum('rooms_sold'), total=Sum('revenue')).order_by(*names.values()))
+    split = [name for name in group_by if name in INVENTORY]
+    inventory = {tuple(row[names[name]] for name in split): row['rooms'] for row in rooms.values(
+        **{names[name]: F(INVENTORY[name]) for name in split}).annotate(rooms=Count('pk'))}
+
+    report = []
+    for row in rows:
+        group = {name: row[alias] for name, alias in names.items()}
+        available = inventory.get(tuple(group[name] for name in split), 0) * _nights_in(group, first, last)
+        report.append({
+            **{name: value.isoformat() if isinstance(value, date) else value for name, value in group.items()},
+            'rooms_sold': row['sold'], 'rooms_available': available,
+            'occupancy': round(row['sold'] / available, 4) if available else None,
+            'adr': _ratio(row['total'], row['sold']), 'revpar': _ratio(row['total'], available),
+            'revenue': str(to_decimal(cents(row['total']))),
+        })
+    return report
@@ -0,0 +1,119 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework.permissions import SAFE_METHODS
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def _pin_key(user_id):
+    return f'db:pinned:{user_id}'
+
+
+def pin_primary(user_id):
+    """Send the user's reads to the primary for ``REPLICA_PIN_SECONDS``, so they see their own writes."""
+    seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+    if seconds > 0:
+        cache.set(_pin_key(user_id), True, seconds)
+
+
+def is_pinned(user_id):
+    return user_id is not None and cache.get(_pin_key(user_id), False)
+
+
+def use_replica(user_id=None):
+    """Route reads in this context to a random replica; returns a token for ``release_replica``.
+
+    Returns None (reads stay on the primary) without replicas or while the user is pinned.
+    """
+    aliases = replica_aliases()
+    if not aliases or is_pinned(user_id):
+        return None
+    return _read_alias.set(random.choice(aliases))
+
+
+def release_replica(token):
+    if token is None:
+        return
+    try:
+        _read_alias.reset(token)
+    except ValueError:
+        # set inside ``sync_to_async``, whose context changes are copied back rather than shared
+        _read_alias.set(None if token.old_value is Token.MISSING else token.old_value)
+
+
+@contextmanager
+def replica_reads(user_id=None):
+    token = use_replica(user_id)
+    try:
+        yield
+    finally:
+        release_replica(token)
+
+
+class ReplicaRouter:
+    """Reads go to the replica chosen by ``use_replica``, everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaReadMixin:
+    """Serve ``replica_actions`` of a viewset from a replica, unless the user has just written."""
+    replica_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and self.action in self.replica_actions:
+            self.replica_token = use_replica(request.user.id)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        release_replica(getattr(self, 'replica_token', None))
+        self.replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def _pin_after_write(request, response):
+    if request.method in SAFE_METHODS or response.status_code >= 400:
+        return
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        # nothing authenticated this request; resolving the session user would query the database
+        return
+    if user is not None and user.is_authenticated:
+        pin_primary(user.id)
+
+
+@sync_and_async_middleware
+def replica_pin_middleware(get_response):
+    """Pin users to the primary after any successful write (see ``pin_primary``)."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = await get_response(request)
+            _pin_after_write(request, response)
+            return response
+    else:
+        def middleware(request):
+            response = get_response(request)
+            _pin_after_write(request, response)
+            return response
+    return middleware
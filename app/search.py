@@ -0,0 +1,76 @@
+import re
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, Subquery, Sum
+from rest_framework import filters
+from app.models import SearchToken
+
+TOKEN_PATTERN = re.compile(r'\w+')
+MAX_TOKEN_LENGTH = 64
+
+INDEXED_FIELDS = {
+    'app.hotel': {'name': 8, 'city': 4, 'amenities': 2, 'description': 1},
+    'app.room': {'room_number': 8, 'amenities': 2, 'description': 1},
+}
+
+
+def tokenize(text):
+    return [token[:MAX_TOKEN_LENGTH] for token in TOKEN_PATTERN.findall((text or '').lower())]
+
+
+def document_tokens(obj, weights):
+    tokens = {}
+    for field, weight in weights.items():
+        for token in tokenize(getattr(obj, field)):
+            tokens[token] = tokens.get(token, 0) + weight
+    return tokens
+
+
+def index_objects(model, objects):
+    label = model._meta.label_lower
+    weights = INDEXED_FIELDS[label]
+    entries = [SearchToken(model=label, object_id=obj.pk, token=token, weight=weight)
+               for obj in objects for token, weight in document_tokens(obj, weights).items()]
+    with transaction.atomic():
+        remove_objects(model, [obj.pk for obj in objects])
+        SearchToken.objects.bulk_create(entries, batch_size=1000)
+
+
+def remove_objects(model, pks):
+    SearchToken.objects.filter(model=model._meta.label_lower, object_id__in=pks).delete()
+
+
+def rebuild_search_index(batch_size=1000):
+    indexed = 0
+    for label, weights in INDEXED_FIELDS.items():
+        model = apps.get_model(label)
+        SearchToken.objects.filter(model=label).delete()
+        batch = []
+        for obj in model.objects.only('pk', *weights).iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                index_objects(model, batch)
+                indexed += len(batch)
+                batch = []
+        index_objects(model, batch)
+        indexed += len(batch)
+    return indexed
+
+
+class IndexedSearchFilter(filters.SearchFilter):
+    def filter_queryset(self, request, queryset, view):
+        label = queryset.model._meta.label_lower
+        if label not in INDEXED_FIELDS:
+            return super().filter_queryset(request, queryset, view)
+        terms = [token for term in self.get_search_terms(request) for token in tokenize(term)]
+        if not terms:
+            return queryset
+
+        tokens = SearchToken.objects.filter(model=label, object_id=OuterRef('pk'))
+        matches = Q()
+        for term in terms:
+            queryset = queryset.filter(Exists(tokens.filter(token__startswith=term)))
+            matches |= Q(token__startswith=term)
+        rank = tokens.filter(matches).values('object_id').annotate(rank=Sum('weight')).values('rank')
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        return queryset.annotate(search_rank=Subquery(rank[:1])).order_by('-search_rank', *ordering)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
-from django.contrib.auth.hashers import make_password
-from app.models import User, Hotel, Room, Booking, Review
+from app.models import User, Hotel, Room, Booking, Review, Amenity, parse_amenities
+from app.bookings import UNAVAILABLE_MESSAGE, conflicting_nights
+from app.fieldsets import SparseFieldsetMixin
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password2 = serializers.CharField(style={'input_type': 'password'}, write_only=True)
@@ -18,9 +19,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return data
     
     def create(self, validated_data):
+        # the view hashes the password off the request worker and passes it to save()
         validated_data.pop('password2', None)
-        if 'password' in validated_data:
-            validated_data['password'] = make_password(validated_data['password'])
         return User.objects.create(**validated_data)
     
 
@@ -37,21 +37,37 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ['id','email', 'name']
 
 
-class HotelSerializer(serializers.ModelSerializer):
+def validate_amenity_list(value):
+    limit = Amenity._meta.get_field('name').max_length
+    if any(len(name) > limit for name in parse_amenities(value)):
+        raise serializers.ValidationError(f'Amenity names can be at most {limit} characters')
+    return value
+
+
+class HotelSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Hotel
-        fields = '__all__'
+        exclude = ['external_ref', 'geohash', 'rating_sum', 'rating_1_count', 'rating_2_count', 'rating_3_count',
+                   'rating_4_count', 'rating_5_count']
+        read_only_fields = ['rating', 'review_count']
 
+    def validate_amenities(self, value):
+        return validate_amenity_list(value)
 
-class RoomSerializer(serializers.ModelSerializer):
+
+class RoomSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     hotel_name = serializers.CharField(source='hotel.name', read_only=True)
     
     class Meta:
         model = Room
         fields = '__all__'
+        expandable_fields = {'hotel': HotelSerializer}
+
+    def validate_amenities(self, value):
+        return validate_amenity_list(value)
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user_email = serializers.CharField(source='user.email', read_only=True)
     room_details = RoomSerializer(source='room', read_only=True)
     
@@ -61,32 +77,37 @@ class BookingSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'total_price']
 
     def validate(self, data):
-        check_in = data.get('check_in_date')
-        check_out = data.get('check_out_date')
+        # a partial update is checked against the stay it will actually save
+        stored = self.instance
+        check_in = data.get('check_in_date', getattr(stored, 'check_in_date', None))
+        check_out = data.get('check_out_date', getattr(stored, 'check_out_date', None))
         
         if check_in and check_out:
             if check_in >= check_out:
                 raise serializers.ValidationError("Check-out date must be after check-in date")
 
-            room = data.get('room')
-            if room:
-                overlapping_bookings = Booking.objects.filter(
-                    room=room,
-                    status__in=['pending', 'confirmed'],
-                    check_in_date__lt=check_out,
-                    check_out_date__gt=check_in
-                )
-                
-                if self.instance:
-                    overlapping_bookings = overlapping_bookings.exclude(id=self.instance.id)
-                
-                if overlapping_bookings.exists():
-                    raise serializers.ValidationError("Room is not available for the selected dates")
+            room = data.get('room', getattr(stored, 'room_id', None))
+            if room and conflicting_nights(room, check_in, check_out, stored).exists():
+                raise serializers.ValidationError(UNAVAILABLE_MESSAGE)
         
         return data
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class BulkBookingItemSerializer(BookingSerializer):
+    room = serializers.IntegerField(min_value=1)
+
+    def validate(self, data):
+        if data['check_in_date'] >= data['check_out_date']:
+            raise serializers.ValidationError("Check-out date must be after check-in date")
+        return data
+
+
+class BulkBookingSerializer(serializers.Serializer):
+    bookings = serializers.ListField(child=serializers.DictField(), min_length=1, max_length=500)
+    atomic = serializers.BooleanField(default=True)
+
+
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user_email = serializers.CharField(source='user.email', read_only=True)
     hotel_name = serializers.CharField(source='hotel.name', read_only=True)
     
@@ -94,4 +115,5 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = '__all__'
         read_only_fields = ['user']
+        expandable_fields = {'hotel': HotelSerializer, 'booking': BookingSerializer}
 
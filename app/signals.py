@@ -0,0 +1,92 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from app.models import Hotel, Room, Booking, Review, User
+from app.inventory import stay_dates, sync_booking_nights
+from app.availability import invalidate_availability
+from app.search import index_objects, remove_objects
+from app.amenities import link_amenities
+from app.caching import invalidate_hotels, invalidate_rooms
+from app.authentication import credentials_changed, forget_user, revoke_user_tokens, stored_credentials
+from app.rollups import booking_sale, record_booking_change, stored_sale
+from app.ratings import record_review_change, review_score, stored_score
+
+
+@receiver(pre_save, sender=Booking)
+def booking_saving(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        instance._stored_sale = stored_sale(instance, using)
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        invalidate_availability(sync_booking_nights(instance, created=created))
+        record_booking_change(old=getattr(instance, '_stored_sale', None), new=booking_sale(instance))
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    if instance.status in Booking.ACTIVE_STATUSES:
+        invalidate_availability((instance.room_id, day)
+                                for day in stay_dates(instance.check_in_date, instance.check_out_date))
+    record_booking_change(old=booking_sale(instance))
+
+
+@receiver(pre_save, sender=Review)
+def review_saving(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        instance._stored_score = stored_score(instance, using)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_review_change(old=getattr(instance, '_stored_score', None), new=review_score(instance))
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    # also runs when a booking, user or hotel delete cascades to the review
+    record_review_change(old=review_score(instance))
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_save, sender=Room)
+def searchable_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_objects(sender, [instance])
+        link_amenities(sender, [instance])
+
+
+@receiver(post_delete, sender=Hotel)
+@receiver(post_delete, sender=Room)
+def searchable_deleted(sender, instance, **kwargs):
+    remove_objects(sender, [instance.pk])
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def hotel_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_hotels([instance.pk])
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def room_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_rooms([instance.pk])
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        instance._stored_credentials = stored_credentials(instance, using)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        forget_user(instance.pk)
+        if not instance.is_active or credentials_changed(instance, getattr(instance, '_stored_credentials', None)):
+            revoke_user_tokens(instance.pk)
@@ -0,0 +1,150 @@
+import json
+from itertools import islice
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from app.renderers import dumps
+
+CHUNK_SIZE = 500
+
+
+def encode(data):
+    if api_settings.UNICODE_JSON:
+        return dumps(data)
+    return json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON, separators=(',', ':'),
+    ).encode()
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return b''.join(encode(item) + b'\n' for item in items)
+
+
+def row_chunks(queryset, chunk_size=CHUNK_SIZE, ids=None):
+    """Lists of up to ``chunk_size`` rows of ``queryset``, or of its rows with primary keys ``ids`` in that order.
+
+    The database is resolved now, as streamed bodies are read after the view has returned.
+    """
+    queryset = queryset.using(queryset.db)
+    if ids is None:
+        return _iterated_chunks(queryset, chunk_size)
+    return _ordered_chunks(queryset, ids, chunk_size)
+
+
+def arow_chunks(queryset, chunk_size=CHUNK_SIZE, ids=None):
+    queryset = queryset.using(queryset.db)
+    if ids is None:
+        return _aiterated_chunks(queryset, chunk_size)
+    return _aordered_chunks(queryset, ids, chunk_size)
+
+
+def _pk(row):
+    return row['id'] if isinstance(row, dict) else row.pk
+
+
+def _iterated_chunks(queryset, chunk_size):
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+async def _aiterated_chunks(queryset, chunk_size):
+    chunk = []
+    async for row in queryset.aiterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _in_order(rows, ids):
+    by_pk = {_pk(row): row for row in rows}
+    return [by_pk[pk] for pk in ids if pk in by_pk]
+
+
+def _ordered_chunks(queryset, ids, chunk_size):
+    for start in range(0, len(ids), chunk_size):
+        part = ids[start:start + chunk_size]
+        yield _in_order(queryset.filter(pk__in=part), part)
+
+
+async def _aordered_chunks(queryset, ids, chunk_size):
+    for start in range(0, len(ids), chunk_size):
+        part = ids[start:start + chunk_size]
+        yield _in_order([row async for row in queryset.filter(pk__in=part)], part)
+
+
+def serialized_chunks(chunks, serialize):
+    for chunk in chunks:
+        yield serialize(chunk)
+
+
+async def aserialized_chunks(chunks, serialize):
+    async for chunk in chunks:
+        yield serialize(chunk)
+
+
+def _ndjson(items):
+    return b''.join(encode(item) + b'\n' for item in items)
+
+
+def _array_part(items, first):
+    return (b'' if first else b',') + b','.join(encode(item) for item in items)
+
+
+def ndjson_lines(chunks):
+    for items in chunks:
+        yield _ndjson(items)
+
+
+async def andjson_lines(chunks):
+    async for items in chunks:
+        yield _ndjson(items)
+
+
+def json_array(chunks):
+    yield b'['
+    first = True
+    for items in chunks:
+        if items:
+            yield _array_part(items, first)
+            first = False
+    yield b']'
+
+
+async def ajson_array(chunks):
+    yield b'['
+    first = True
+    async for items in chunks:
+        if items:
+            yield _array_part(items, first)
+            first = False
+    yield b']'
+
+
+def streaming_response(chunks, serialize, mode):
+    """Stream ``row_chunks`` as NDJSON or a JSON array; ``serialize`` turns a chunk of rows into a list of dicts."""
+    chunks = serialized_chunks(chunks, serialize)
+    if mode == 'ndjson':
+        return StreamingHttpResponse(ndjson_lines(chunks), content_type=NDJSONRenderer.media_type)
+    return StreamingHttpResponse(json_array(chunks), content_type='application/json')
+
+
+def astreaming_response(chunks, serialize, mode):
+    """Like ``streaming_response`` for ``arow_chunks``, so ASGI serves it without a thread."""
+    chunks = aserialized_chunks(chunks, serialize)
+    if mode == 'ndjson':
+        return StreamingHttpResponse(andjson_lines(chunks), content_type=NDJSONRenderer.media_type)
+    return StreamingHttpResponse(ajson_array(chunks), content_type='application/json')
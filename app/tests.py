@@ -1,3 +1,932 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from asgiref.sync import sync_to_async
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from importlib import import_module
+from decimal import Decimal
+from django.core.cache import cache
+from django.core.management import call_command
+from django.apps import apps
+from django.db import IntegrityError, connection
+from django.db.models import Sum
+from django.test import AsyncClient, TransactionTestCase
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient, APITestCase
+from app.models import Amenity, User, Hotel, Room, RoomRate, Booking, DailyRollup, Review, RoomNight
+from app.authentication import issue_tokens, user_cache
+from app.benchmarks import AsyncURLConf, BenchmarkRunner, SyncURLConf, booking_throughput, compare, percentile, summarize
+from app.dataset import DatasetGenerator
+from app.geo import encode_geohash
+from app.hashing import HashingPool, HashingPoolBusy
+from app.importer import CatalogImporter
+from app.planning import build_values_plan
+from app.ratings import average_rating, reconcile_ratings
+from app.renderers import FastJSONRenderer
+from app.pricing import quote_booking
+from app.lifecycle import sweep_bookings
+from app.rollups import rebuild_rollups
+from app.routing import replica_reads
+from app.streaming import json_array, ndjson_lines, row_chunks
+from app.serializers import BookingSerializer, HotelSerializer, ReviewSerializer, RoomSerializer
 
-# Create your tests here.
+
+def create_hotel(name='Hotel', city='Pune'):
+    return Hotel.objects.create(
+        name=name, description='Test hotel', address='Street 1', city=city, state='Maharashtra',
+        country='India', postal_code='411001', phone='+911234567890', email='hotel@example.com',
+        amenities='WiFi, Pool')
+
+
+def create_room(hotel, number, price=100, occupancy=2):
+    return Room.objects.create(
+        hotel=hotel, room_number=number, room_type='double', description='Test room',
+        price_per_night=price, max_occupancy=occupancy, amenities='WiFi, TV')
+
+
+class ListQueryCountTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.client.force_authenticate(self.user)
+
+    def add_rows(self, count):
+        start = Hotel.objects.count()
+        for i in range(start, start + count):
+            hotel = create_hotel(name=f'Hotel {i}')
+            room = create_room(hotel, str(i))
+            booking = Booking.objects.create(
+                user=self.user, room=room, check_in_date=date(2030, 1, 1) + timedelta(days=i),
+                check_out_date=date(2030, 1, 2) + timedelta(days=i), guests=1)
+            Review.objects.create(user=self.user, hotel=hotel, booking=booking, rating=5, comment='Great')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_list_query_count_is_constant(self):
+        for url in ['/api/v1/hotels/', '/api/v1/rooms/', '/api/v1/bookings/', '/api/v1/reviews/']:
+            with self.subTest(url=url):
+                self.add_rows(2)
+                small = self.count_queries(url)
+                self.add_rows(10)
+                self.assertEqual(self.count_queries(url), small)
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.pune = create_hotel(name='Pune Hotel')
+        self.mumbai = create_hotel(name='Mumbai Hotel', city='Mumbai')
+        self.room = create_room(self.pune, '101')
+
+    def test_conditional_get_returns_not_modified(self):
+        url = f'/api/v1/hotels/{self.pune.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_invalidate_only_dependent_entries(self):
+        pune_url, mumbai_url = f'/api/v1/hotels/{self.pune.pk}/', f'/api/v1/hotels/{self.mumbai.pk}/'
+        room_url = f'/api/v1/rooms/{self.room.pk}/'
+        etags = {url: self.client.get(url)['ETag'] for url in (pune_url, mumbai_url, room_url, '/api/v1/hotels/')}
+
+        self.mumbai.name = 'Mumbai Grand'
+        self.mumbai.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(pune_url, HTTP_IF_NONE_MATCH=etags[pune_url]).status_code, 304)
+            self.assertEqual(self.client.get(room_url, HTTP_IF_NONE_MATCH=etags[room_url]).status_code, 304)
+        response = self.client.get(mumbai_url, HTTP_IF_NONE_MATCH=etags[mumbai_url])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Mumbai Grand')
+        self.assertNotEqual(self.client.get('/api/v1/hotels/')['ETag'], etags['/api/v1/hotels/'])
+
+        self.pune.name = 'Pune Grand'
+        self.pune.save()
+        self.assertEqual(self.client.get(room_url).data['hotel_name'], 'Pune Grand')
+
+
+class AvailabilityCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.client.force_authenticate(self.user)
+        self.pune_room = create_room(create_hotel(name='Pune Hotel'), '101')
+        self.mumbai_room = create_room(create_hotel(name='Mumbai Hotel', city='Mumbai'), '201')
+
+    def search(self, city, check_in, check_out):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/rooms/search_available/', {
+                'city': city, 'check_in': check_in, 'check_out': check_out, 'guests': 1})
+        self.assertEqual(response.status_code, 200)
+        return [room['id'] for room in response.data], len(queries)
+
+    def book(self, room, check_in, check_out):
+        response = self.client.post('/api/v1/bookings/', {
+            'room': room.pk, 'check_in_date': check_in, 'check_out_date': check_out, 'guests': 1})
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def test_bookings_only_invalidate_overlapping_city_and_dates(self):
+        self.search('mumbai', '2030-02-10', '2030-02-12')
+        rooms, cached_queries = self.search('Mumbai ', '2030-02-10', '2030-02-12')
+        self.assertEqual(rooms, [self.mumbai_room.pk])
+
+        self.book(self.pune_room, '2030-02-10', '2030-02-12')
+        self.book(self.mumbai_room, '2030-01-10', '2030-01-12')
+        self.assertEqual(self.search('Mumbai', '2030-02-10', '2030-02-12'), (rooms, cached_queries))
+
+        booking = self.book(self.mumbai_room, '2030-02-11', '2030-02-13')
+        self.assertEqual(self.search('Mumbai', '2030-02-10', '2030-02-12')[0], [])
+
+        self.client.post(f'/api/v1/bookings/{booking}/cancel/')
+        self.assertEqual(self.search('Mumbai', '2030-02-10', '2030-02-12')[0], [self.mumbai_room.pk])
+
+
+class SearchIndexTests(APITestCase):
+    def setUp(self):
+        self.by_name = create_hotel(name='Lakeside Palace')
+        self.by_city = create_hotel(name='Grand Central', city='Lakeside')
+        self.by_description = create_hotel(name='Grand Plaza')
+        self.by_description.description = 'Rooms over the lakeside promenade'
+        self.by_description.save()
+
+    def search(self, text):
+        return [hotel['name'] for hotel in self.client.get('/api/v1/hotels/', {'search': text}).data['results']]
+
+    def test_results_are_ranked_by_field_weight(self):
+        self.assertEqual(self.search('lake'), ['Lakeside Palace', 'Grand Central', 'Grand Plaza'])
+        self.assertEqual(self.search('GRAND lake'), ['Grand Central', 'Grand Plaza'])
+        self.assertEqual(self.search('lake nowhere'), [])
+
+        self.by_name.name = 'Hilltop Palace'
+        self.by_name.save()
+        self.by_city.delete()
+        self.assertEqual(self.search('lake'), ['Grand Plaza'])
+        self.assertEqual(self.search('hill'), ['Hilltop Palace'])
+
+
+class RatingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.client.force_authenticate(self.user)
+        self.hotel, self.other = create_hotel(name='Rated'), create_hotel(name='Other')
+        room = create_room(self.hotel, '101')
+        self.bookings = [Booking.objects.create(user=self.user, room=room, check_in_date=date(2030, 8, day),
+                                                check_out_date=date(2030, 8, day + 1), guests=1) for day in (1, 3, 5)]
+
+    def review(self, booking, rating):
+        response = self.client.post('/api/v1/reviews/', {
+            'hotel': self.hotel.pk, 'booking': booking.pk, 'rating': rating, 'comment': 'Fine'})
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def aggregates(self, hotel):
+        hotel.refresh_from_db()
+        return hotel.rating, hotel.review_count, [hotel.rating_1_count, hotel.rating_5_count]
+
+    def test_aggregates_follow_review_changes(self):
+        first, _, third = [self.review(booking, rating) for booking, rating in zip(self.bookings, (5, 4, 1))]
+        self.assertEqual(self.aggregates(self.hotel), (Decimal('3.33'), 3, [1, 1]))
+        self.assertEqual(self.client.delete(f'/api/v1/reviews/{third}/').status_code, 204)
+        self.assertEqual(self.aggregates(self.hotel), (Decimal('4.50'), 2, [0, 1]))
+        self.client.patch(f'/api/v1/reviews/{first}/', {'hotel': self.other.pk, 'rating': 1})
+        self.assertEqual(self.aggregates(self.hotel), (Decimal('4.00'), 1, [0, 0]))
+        self.assertEqual(self.aggregates(self.other), (Decimal('1.00'), 1, [1, 0]))
+
+        Hotel.objects.update(rating=0, review_count=0, rating_sum=0, rating_1_count=0, rating_5_count=0)
+        reconcile_ratings(batch_size=1)
+        self.assertEqual([self.aggregates(self.hotel), self.aggregates(self.other)],
+                         [(Decimal('4.00'), 1, [0, 0]), (Decimal('1.00'), 1, [1, 0])])
+        self.assertEqual([hotel['name'] for hotel in self.client.get(
+            '/api/v1/hotels/', {'min_rating': '2', 'ordering': '-rating'}).data['results']], ['Rated'])
+        for value in ('nan', 'Infinity', '-inf', '5.5', '-1', 'high'):
+            self.assertEqual(self.client.get('/api/v1/hotels/', {'min_rating': value}).status_code, 400)
+
+    def test_ratings_round_half_up(self):
+        self.assertEqual([average_rating(25, 8), average_rating(10, 3), average_rating(0, 0)],
+                         [Decimal('3.13'), Decimal('3.33'), Decimal('0.00')])
+
+    def test_cached_rooms_show_the_new_rating(self):
+        cache.clear()
+        room = self.bookings[0].room_id
+        self.assertEqual(self.client.get(f'/api/v1/rooms/{room}/', {'expand': 'hotel'}).data['hotel']['review_count'], 0)
+        self.review(self.bookings[0], 4)
+        hotel = self.client.get(f'/api/v1/rooms/{room}/', {'expand': 'hotel'}).data['hotel']
+        self.assertEqual((hotel['rating'], hotel['review_count']), ('4.00', 1))
+
+    def test_deleting_the_booking_drops_its_review(self):
+        self.review(self.bookings[0], 5)
+        self.review(self.bookings[1], 2)
+        self.assertEqual(self.client.delete(f'/api/v1/bookings/{self.bookings[0].pk}/').status_code, 204)
+        self.assertEqual(self.aggregates(self.hotel), (Decimal('2.00'), 1, [0, 0]))
+        self.bookings[1].delete()
+        self.assertEqual(self.aggregates(self.hotel), (Decimal('0.00'), 0, [0, 0]))
+
+
+class GeoSearchTests(APITestCase):
+    def setUp(self):
+        for name, latitude, longitude in [('Inside', 18.5895, 73.0), ('Outside', 18.5905, 73.0), ('East', 0, 179.99),
+                                          ('West', 0, -179.99), ('Pole', 89.9, 0), ('Opposite', 89.9, 180)]:
+            hotel = create_hotel(name=name)
+            hotel.latitude, hotel.longitude = latitude, longitude
+            hotel.save()
+        create_hotel(name='Unplaced')
+
+    def find(self, **params):
+        response = self.client.get('/api/v1/hotels/', params)
+        return [hotel['name'] for hotel in response.data['results']] if response.status_code == 200 else 400
+
+    def test_geohashes(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual([encode_geohash(-90, -180, 4), encode_geohash(90, 180, 4)], ['0000', 'zzzz'])
+
+    def test_radius_and_bbox_edges(self):
+        self.assertEqual(self.find(lat=18.5, lng=73, radius=10), ['Inside'])
+        self.assertEqual(self.find(lat=0, lng=179.995, radius=5), ['East', 'West'])
+        self.assertEqual(self.find(lat=89.9, lng=90, radius=30), ['Opposite', 'Pole'])
+        self.assertEqual(self.find(bbox='18.5,72.9,18.5895,73'), ['Inside'])
+        self.assertEqual(self.find(bbox='18.5895,73,18.5895,73'), ['Inside'])
+        self.assertEqual(self.find(bbox='-1,-180,1,180'), ['East', 'West'])
+        for params in ({'bbox': '19,73,18,74'}, {'bbox': '1,2,3'}, {'lat': 18.5},
+                       {'lat': 18.5, 'lng': 73, 'radius': 600}):
+            self.assertEqual(self.find(**params), 400)
+
+
+class CatalogImportTests(APITestCase):
+    header = 'ref,name,description,address,city,state,country,postal_code,phone,email,amenities\n'
+
+    def hotel_line(self, ref, name, email='hotel@example.com'):
+        return f'{ref},{name},Imported,Street 1,Pune,Maharashtra,India,411001,+911234567890,{email},"WiFi, Pool"\n'
+
+    def test_imports_update_in_place_and_report_bad_rows(self):
+        importer = CatalogImporter(batch_size=2)
+        hotels = self.header + self.hotel_line('h1', 'First') + self.hotel_line('h2', 'Second', email='nope') + \
+            self.hotel_line('h3', 'Third')
+        report = importer.run('hotels', io.StringIO(hotels), 'csv').as_dict()
+        self.assertEqual((report['rows'], report['imported'], report['failed']), (3, 2, 1))
+        self.assertEqual([error['line'] for error in report['errors']], [3])
+        self.assertIn('email', report['errors'][0]['errors'])
+        first = Hotel.objects.get(external_ref='h1')
+
+        rooms = '\n'.join([
+            json.dumps({'hotel': 'h1', 'room_number': '101', 'room_type': 'double', 'description': 'Room',
+                        'price_per_night': '100.00', 'max_occupancy': 2, 'amenities': 'TV'}),
+            json.dumps({'hotel': str(first.pk), 'room_number': '102', 'room_type': 'suite', 'description': 'Room',
+                        'price_per_night': '300.00', 'max_occupancy': 4, 'amenities': 'TV'}),
+            json.dumps({'hotel': 'h9', 'room_number': '1', 'room_type': 'double', 'description': 'Room',
+                        'price_per_night': '100.00', 'max_occupancy': 2, 'amenities': 'TV'}),
+            '{"hotel": ',
+            json.dumps({'hotel': 'h1', 'room_number': '103', 'room_type': 'double', 'description': 'Room',
+                        'price_per_night': '100.00', 'max_occupancy': 2, 'amenities': 'TV, ' + 'x' * 101}),
+        ])
+        report = importer.run('rooms', io.StringIO(rooms), 'jsonl').as_dict()
+        self.assertEqual((report['rows'], report['imported'], report['failed']), (5, 2, 3))
+        self.assertEqual(sorted((error['line'], list(error['errors'])) for error in report['errors']),
+                         [(3, ['hotel']), (4, ['non_field_errors']), (5, ['amenities'])])
+
+        CatalogImporter().run('hotels', io.StringIO(self.header + self.hotel_line('h1', 'First Renamed')), 'csv')
+        CatalogImporter().run('rooms', io.StringIO(rooms.splitlines()[0].replace('100.00', '120.00')), 'jsonl')
+        self.assertEqual(Hotel.objects.count(), 2)
+        self.assertEqual(Hotel.objects.get(pk=first.pk).name, 'First Renamed')
+        self.assertEqual(sorted(Room.objects.filter(hotel=first).values_list('room_number', 'price_per_night')),
+                         [('101', Decimal('120.00')), ('102', Decimal('300.00'))])
+        response = self.client.get('/api/v1/hotels/', {'search': 'renamed'})
+        self.assertEqual([hotel['id'] for hotel in response.data['results']], [first.pk])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class DatasetTests(APITestCase):
+    def generate(self):
+        call_command('generate_dataset', hotels=6, rooms_per_hotel=4, users=12, bookings=80, reviews=15, seed=7,
+                     today=date(2030, 1, 1), history_days=60, future_days=30, batch_size=7, stdout=io.StringIO())
+        return {
+            'hotels': sorted(Hotel.objects.values_list('external_ref', 'name', 'city', 'geohash')),
+            'bookings': sorted(Booking.objects.values_list(
+                'room__hotel__external_ref', 'room__room_number', 'check_in_date', 'check_out_date', 'status',
+                'total_price')),
+        }
+
+    def test_seeded_dataset_is_consistent_and_repeatable(self):
+        first = self.generate()
+        active = Booking.objects.filter(status__in=Booking.ACTIVE_STATUSES)
+        self.assertEqual(RoomNight.objects.count(), sum((b.check_out_date - b.check_in_date).days for b in active))
+        self.assertFalse(Booking.objects.filter(status='completed', check_out_date__gt=date(2030, 1, 1)).exists())
+        self.assertFalse(active.filter(check_out_date__lte=date(2030, 1, 1)).exists())
+        self.assertTrue(0 < Review.objects.count() <= 15)
+        self.assertFalse(Review.objects.exclude(booking__status='completed').exists())
+        for hotel in Hotel.objects.all():
+            self.assertEqual(hotel.review_count, hotel.reviews.count())
+        self.assertEqual(DailyRollup.objects.aggregate(sold=Sum('rooms_sold'))['sold'],
+                         sum((b.check_out_date - b.check_in_date).days
+                             for b in Booking.objects.filter(status__in=['confirmed', 'completed'])))
+        self.assertEqual(len(self.client.get('/api/v1/hotels/', {'search': first['hotels'][0][2]}).data['results']),
+                         sum(hotel[2] == first['hotels'][0][2] for hotel in first['hotels']))
+
+        for model in (Review, Booking, Room, Hotel, User):
+            model.objects.all().delete()
+        self.assertEqual(self.generate(), first)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BenchmarkTests(APITestCase):
+    def test_statistics_and_regressions(self):
+        samples = [0.001 * n for n in range(1, 101)]
+        self.assertEqual([percentile(samples, pct) for pct in (50, 95, 99)], [0.05, 0.095, 0.099])
+        self.assertEqual(percentile([], 50), 0.0)
+        summary = summarize('hotels_list', 'get', '/api/v1/hotels/', samples, [3] * 100, [10, 30] * 50, 2)
+        self.assertEqual((summary['p95_ms'], summary['queries'], summary['bytes'], summary['errors']),
+                         (95.0, {'mean': 3.0, 'max': 3}, {'mean': 20, 'max': 30}, 2))
+        baseline = {'results': [{'name': 'a', 'p95_ms': 10.0, 'queries': {'mean': 3}},
+                                {'name': 'b', 'p95_ms': 10.0, 'queries': {'mean': 3}}]}
+        results = {'results': [{'name': 'a', 'p95_ms': 11.9, 'queries': {'mean': 3}},
+                               {'name': 'b', 'p95_ms': 12.1, 'queries': {'mean': 4}},
+                               {'name': 'c', 'p95_ms': 99.0, 'queries': {'mean': 9}}]}
+        self.assertEqual(compare(results, baseline), ['b: p95 10.0ms -> 12.1ms', 'b: queries 3 -> 4'])
+
+    def test_every_scenario_runs_without_errors(self):
+        DatasetGenerator(seed=3, history_days=30, future_days=30).run(3, 3, 5, 20, 5)
+        results = BenchmarkRunner(iterations=2, warmup=1).run()['results']
+        self.assertEqual([entry['name'] for entry in results], [
+            'register', 'login', 'profile', 'hotels_list', 'hotels_search', 'rooms_search_available',
+            'bookings_create', 'bookings_list', 'bookings_cancel', 'reviews_list', 'reviews_create'])
+        self.assertEqual({(entry['requests'], entry['errors']) for entry in results}, {(2, 0)})
+
+
+class AmenityTests(APITestCase):
+    def setUp(self):
+        self.spa, self.plain = create_hotel(name='Spa'), create_hotel(name='Plain')
+        self.plain.amenities = 'WiFi'
+        self.plain.save()
+        self.spa_room, self.plain_room = create_room(self.spa, '1'), create_room(self.plain, '2')
+        self.plain_room.amenities = 'Mini-bar'
+        self.plain_room.save()
+
+    def links(self, obj):
+        return sorted(obj.amenity_links.values_list('amenity__slug', flat=True))
+
+    def test_links_follow_the_amenity_text(self):
+        self.assertEqual(list(Amenity.objects.values_list('slug', flat=True)), ['minibar', 'pool', 'tv', 'wifi'])
+        self.assertEqual([self.links(self.spa), self.links(self.spa_room), self.links(self.plain_room)],
+                         [['pool', 'wifi'], ['tv', 'wifi'], ['minibar']])
+        self.spa.amenities = 'wi-fi, Sauna, SAUNA, ' + ', '.join(f'Extra {n}' for n in range(80))
+        self.spa.save()
+        self.assertEqual(self.links(self.spa)[-2:], ['sauna', 'wifi'])
+        self.assertEqual((len(self.links(self.spa)), Amenity.objects.count()), (82, 85))
+        self.assertEqual(Amenity.objects.ids_for(['Sauna', 'Steam room'], create=False).keys(), {'sauna'})
+        self.assertEqual(self.client.put(f'/api/v1/rooms/{self.plain_room.pk}/', {
+            'hotel': self.plain.pk, 'room_number': '2', 'room_type': 'double', 'description': 'Room',
+            'price_per_night': '100.00', 'max_occupancy': 2, 'amenities': 'x' * 101}).status_code, 400)
+
+    def test_filters_require_every_amenity(self):
+        def hotels(amenities):
+            response = self.client.get('/api/v1/hotels/', {'amenities': amenities})
+            return [hotel['name'] for hotel in response.data['results']]
+
+        def rooms(amenities):
+            response = self.client.get('/api/v1/rooms/search_available/', {'amenities': amenities})
+            return [room['id'] for room in response.data]
+        self.assertEqual(hotels('wifi'), ['Plain', 'Spa'])
+        self.assertEqual(hotels('WiFi, pool'), ['Spa'])
+        self.assertEqual(hotels('wifi,sauna'), [])
+        self.assertEqual(rooms('pool,tv'), [self.spa_room.pk])
+        self.assertEqual(rooms('minibar,wifi'), [self.plain_room.pk])
+        self.assertEqual(rooms('tv,minibar'), [])
+
+
+class PricingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.client.force_authenticate(self.user)
+        hotel = create_hotel()
+        self.cheap, self.dear = create_room(hotel, '101', price=100), create_room(hotel, '102', price=150)
+        # 2030-03-01 is a Friday: weekend nights for every double, then one week for room 102 only
+        RoomRate.objects.create(hotel=hotel, room_type='double', start_date=date(2030, 3, 1),
+                                end_date=date(2030, 3, 31), price_per_night=200, weekdays=0b1110000)
+        RoomRate.objects.create(room=self.dear, hotel=hotel, start_date=date(2030, 3, 1),
+                                end_date=date(2030, 3, 7), price_per_night=90)
+
+    def search(self, **params):
+        response = self.client.get('/api/v1/rooms/search_available/', {
+            'check_in': '2030-02-28', 'check_out': '2030-03-04', **params})
+        self.assertEqual(response.status_code, 200)
+        return [(room['id'], room['quoted_total']) for room in response.data]
+
+    def test_stays_are_priced_from_the_rate_calendar(self):
+        self.assertEqual(self.search(), [(self.cheap.pk, '700.00'), (self.dear.pk, '420.00')])
+        self.assertEqual(self.search(ordering='quoted_total', max_total='600'), [(self.dear.pk, '420.00')])
+        self.assertEqual(self.client.get('/api/v1/rooms/search_available/', {'ordering': 'quoted_total'}).status_code,
+                         400)
+        self.assertEqual(self.search(ordering='price_per_night'), [(self.cheap.pk, '700.00'), (self.dear.pk, '420.00')])
+        for check_out in ('2030-02-28', '2030-02-20', '2030-05-30', '2099-01-01'):
+            response = self.client.get('/api/v1/rooms/search_available/',
+                                       {'check_in': '2030-02-28', 'check_out': check_out})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('check_out', response.data)
+        self.assertEqual(len(self.search(check_out='2030-05-29')), 2)
+
+        booking = Booking.objects.create(user=self.user, room_id=self.cheap.pk, check_in_date=date(2030, 3, 2),
+                                         check_out_date=date(2030, 3, 5), guests=1)
+        self.assertEqual(booking.total_price, Decimal('500.00'))
+        response = self.client.patch(f'/api/v1/bookings/{booking.pk}/', {'check_out_date': '2030-03-04'})
+        self.assertEqual(response.data['total_price'], '400.00')
+        response = self.client.patch(f'/api/v1/bookings/{booking.pk}/', {'room': self.dear.pk})
+        self.assertEqual(response.data['total_price'], '180.00')
+        response = self.client.post('/api/v1/bookings/bulk/', {'bookings': [
+            {'room': self.dear.pk, 'check_in_date': '2030-03-06', 'check_out_date': '2030-03-09', 'guests': 1}]},
+            format='json')
+        self.assertEqual(response.data['results'][0]['booking']['total_price'], '380.00')
+
+    def test_partial_updates_check_the_stored_stay(self):
+        booking = Booking.objects.create(user=self.user, room_id=self.cheap.pk, check_in_date=date(2030, 3, 2),
+                                         check_out_date=date(2030, 3, 5), guests=1)
+        for change in ({'check_in_date': '2030-03-06'}, {'check_out_date': '2030-03-02'}):
+            response = self.client.patch(f'/api/v1/bookings/{booking.pk}/', change)
+            self.assertEqual(response.status_code, 400)
+        Booking.objects.create(user=self.user, room_id=self.cheap.pk, check_in_date=date(2030, 3, 6),
+                               check_out_date=date(2030, 3, 8), guests=1)
+        response = self.client.patch(f'/api/v1/bookings/{booking.pk}/', {'check_out_date': '2030-03-07'})
+        self.assertEqual(response.status_code, 400)
+        booking.refresh_from_db()
+        self.assertEqual((booking.check_out_date, booking.total_price), (date(2030, 3, 5), Decimal('500.00')))
+        booking.check_in_date = booking.check_out_date
+        with self.assertRaises(ValueError):
+            quote_booking(booking)
+
+
+class RoomNightTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.room = create_room(create_hotel(), '101')
+
+    def book(self, check_in, check_out):
+        return Booking.objects.create(user=self.user, room=self.room, check_in_date=date(2030, 6, check_in),
+                                      check_out_date=date(2030, 6, check_out), guests=1)
+
+    def test_overlapping_booking_is_rolled_back_with_its_nights(self):
+        first = self.book(1, 4)
+        with self.assertRaises(IntegrityError):
+            self.book(3, 5)
+        self.assertEqual(list(Booking.objects.values_list('pk', flat=True)), [first.pk])
+        self.assertEqual(RoomNight.objects.count(), 3)
+
+    def test_migration_reports_overlapping_bookings(self):
+        populate = import_module('app.migrations.0002_roomnight').populate_room_nights
+        first, second = self.book(1, 3), self.book(5, 7)
+        RoomNight.objects.all().delete()
+        Booking.objects.filter(pk=second.pk).update(check_in_date=date(2030, 6, 2))
+        message = f'room {self.room.pk} on 2030-06-02: bookings {first.pk} and {second.pk}'
+        with self.assertRaisesMessage(RuntimeError, message):
+            populate(apps, None)
+        self.assertFalse(RoomNight.objects.exists())
+
+
+class BulkBookingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.client.force_authenticate(self.user)
+        hotel = create_hotel()
+        self.rooms = [create_room(hotel, str(i)) for i in range(6)]
+
+    def book(self, rooms, day):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/v1/bookings/bulk/', {'bookings': [
+                {'room': room.pk, 'check_in_date': f'2030-05-{day:02}', 'check_out_date': f'2030-05-{day + 2:02}',
+                 'guests': 1} for room in rooms]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return [item['booking']['id'] for item in response.data['results']], len(queries)
+
+    def test_bulk_insert_without_returned_pks(self):
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            _, few = self.book(self.rooms[:2], 1)
+            ids, many = self.book(self.rooms, 10)
+        self.assertEqual(few, many)
+        self.assertEqual(list(Booking.objects.filter(pk__in=ids).order_by('pk').values_list('room_id', flat=True)),
+                         [room.pk for room in self.rooms])
+        self.assertEqual(RoomNight.objects.filter(booking_id__in=ids).count(), 12)
+
+
+class CalendarTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.client.force_authenticate(self.user)
+        self.hotel = create_hotel()
+        self.room, self.other = create_room(self.hotel, '101'), create_room(self.hotel, '102')
+        for room, check_in, check_out, state in [(self.room, 1, 3, 'confirmed'), (self.room, 4, 12, 'pending'),
+                                                 (self.other, 2, 3, 'cancelled'), (self.other, 5, 6, 'confirmed')]:
+            Booking.objects.create(user=self.user, room=room, check_in_date=date(2030, 4, check_in),
+                                   check_out_date=date(2030, 4, check_out), guests=1, status=state)
+
+    def test_calendars_merge_active_bookings(self):
+        params = {'from': '2030-04-02', 'to': '2030-04-08'}
+        response = self.client.get(f'/api/v1/rooms/{self.room.pk}/calendar/', params)
+        self.assertEqual(response.data['available'], '010000')
+
+        response = self.client.get(f'/api/v1/hotels/{self.hotel.pk}/calendar/', params)
+        self.assertEqual([room['available'] for room in response.data['rooms']], ['010000', '111011'])
+        self.assertEqual(response.data['available_rooms'], [1, 2, 1, 0, 1, 1])
+        self.assertEqual(self.client.get(f'/api/v1/hotels/{self.hotel.pk}/calendar/',
+                                         {'from': '2030-01-01', 'to': '2031-06-01'}).status_code, 400)
+
+
+class RollupTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', name='Admin', password='password123')
+        self.client.force_authenticate(self.admin)
+        hotel = create_hotel()
+        self.rooms = [create_room(hotel, '101'), create_room(hotel, '102'), create_room(hotel, '201', price=300)]
+        Room.objects.filter(pk=self.rooms[2].pk).update(room_type='suite')
+
+    def book(self, room, check_in, check_out, state, total=None):
+        return Booking.objects.create(user=self.admin, room_id=room.pk, check_in_date=date(2030, 1, check_in),
+                                      check_out_date=date(2030, 1, check_out), guests=1, status=state,
+                                      total_price=total)
+
+    def rollups(self):
+        return sorted(DailyRollup.objects.filter(rooms_sold__gt=0).values_list(
+            'room_type', 'date', 'rooms_sold', 'revenue'))
+
+    def test_rollups_follow_booking_changes(self):
+        first = self.book(self.rooms[0], 1, 3, 'confirmed', total=Decimal('100.01'))
+        second = self.book(self.rooms[1], 2, 4, 'pending')
+        self.book(self.rooms[2], 2, 3, 'completed')
+        self.assertEqual(self.rollups()[0], ('double', date(2030, 1, 1), 1, Decimal('50.01')))
+        second.status = 'confirmed'
+        second.save()
+        self.client.post(f'/api/v1/bookings/{first.pk}/cancel/')
+        incremental = self.rollups()
+        rebuild_rollups()
+        self.assertEqual(incremental, self.rollups())
+
+        response = self.client.get('/api/v1/admin/analytics/occupancy/', {
+            'from': '2030-01-01', 'to': '2030-01-05', 'group_by': 'room_type'})
+        self.assertEqual(response.data['results'], [
+            {'room_type': 'double', 'rooms_sold': 2, 'rooms_available': 8, 'occupancy': 0.25,
+             'adr': '100.00', 'revpar': '25.00', 'revenue': '200.00'},
+            {'room_type': 'suite', 'rooms_sold': 1, 'rooms_available': 4, 'occupancy': 0.25,
+             'adr': '300.00', 'revpar': '75.00', 'revenue': '300.00'}])
+        self.assertEqual(self.client.get('/api/v1/admin/analytics/occupancy/', {'group_by': 'week'}).status_code, 400)
+
+
+class BookingSweepTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.client.force_authenticate(self.user)
+        self.room = create_room(create_hotel(), '101')
+
+    def book(self, check_in, check_out, state):
+        return Booking.objects.create(user=self.user, room=self.room, check_in_date=check_in,
+                                      check_out_date=check_out, guests=1, status=state)
+
+    def available(self, check_in, check_out):
+        return self.client.get('/api/v1/rooms/search_available/', {'check_in': check_in, 'check_out': check_out}).data
+
+    def test_sweep_expires_stale_pending_and_completes_past_stays(self):
+        today = timezone.localdate()
+        stale, fresh = self.book(date(2031, 5, 1), date(2031, 5, 3), 'pending'), self.book(
+            date(2031, 6, 1), date(2031, 6, 3), 'pending')
+        Booking.objects.filter(pk=stale.pk).update(created_at=timezone.now() - timedelta(days=2))
+        past = [self.book(today - timedelta(days=9 - i * 3), today - timedelta(days=8 - i * 3), 'confirmed')
+                for i in range(3)]
+        current = self.book(today, today + timedelta(days=1), 'confirmed')
+        self.assertEqual(self.available('2031-05-01', '2031-05-03'), [])
+
+        self.assertEqual(sweep_bookings(ttl=timedelta(hours=1), batch_size=2), {'expired': 1, 'completed': 3})
+        statuses = dict(Booking.objects.values_list('pk', 'status'))
+        self.assertEqual([statuses[booking.pk] for booking in [stale, fresh, *past, current]],
+                         ['expired', 'pending', 'completed', 'completed', 'completed', 'confirmed'])
+        self.assertEqual(set(RoomNight.objects.values_list('booking_id', flat=True)), {fresh.pk, current.pk})
+        self.assertEqual(len(self.available('2031-05-01', '2031-05-03')), 1)
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.client.force_authenticate(self.user)
+        hotel = create_hotel()
+        for number in range(5):
+            room = create_room(hotel, str(number))
+            for stay in range(5):
+                check_in = date(2030, 7, 1) + timedelta(days=2 * stay)
+                Booking.objects.create(user=self.user, room=room, check_in_date=check_in,
+                                       check_out_date=check_in + timedelta(days=1), guests=1)
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([booking['id'] for booking in response.data['results']])
+            url = response.data[link]
+        return pages
+
+    def test_cursors_walk_both_ways_in_order(self):
+        expected = list(Booking.objects.order_by('-check_in_date', '-id').values_list('pk', flat=True))
+        pages = self.walk('/api/v1/bookings/?ordering=-check_in_date', 'next')
+        self.assertEqual([len(page) for page in pages], [20, 5])
+        self.assertEqual(sum(pages, []), expected)
+
+        last = self.client.get('/api/v1/bookings/?ordering=-check_in_date').data['next']
+        self.assertEqual(self.walk(last, 'previous'), pages[::-1])
+        self.assertEqual(self.client.get('/api/v1/bookings/?ordering=-created_at', {
+            'cursor': last.split('cursor=')[1]}).status_code, 404)
+        self.assertEqual(self.client.get('/api/v1/bookings/', {'cursor': 'not-a-cursor'}).status_code, 404)
+
+
+class StreamingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.client.force_authenticate(self.user)
+        hotel = create_hotel(name='Hôtel "Nord"')
+        for number in range(5):
+            create_room(hotel, str(number))
+
+    def test_chunks_are_framed_as_ndjson_or_one_array(self):
+        chunks = [[], [{'a': 1}], [], [{'a': 2}, {'a': 'é\n'}]]
+        self.assertEqual(b''.join(json_array(chunks)), b'[{"a":1},{"a":2},{"a":"\xc3\xa9\\n"}]')
+        self.assertEqual(b''.join(json_array([])), b'[]')
+        self.assertEqual(b''.join(ndjson_lines(chunks)), b'{"a":1}\n{"a":2}\n{"a":"\xc3\xa9\\n"}\n')
+        rooms = Room.objects.order_by('pk').values('id')
+        self.assertEqual([len(chunk) for chunk in row_chunks(rooms, chunk_size=2)], [2, 2, 1])
+        ids = list(rooms.values_list('id', flat=True))[::-2]
+        self.assertEqual([[row['id'] for row in chunk] for chunk in row_chunks(rooms, chunk_size=2, ids=ids)],
+                         [ids[:2], ids[2:]])
+
+    def test_streamed_search_matches_the_regular_response(self):
+        url = '/api/v1/rooms/search_available/'
+        expected = self.client.get(url).json()
+        response = self.client.get(url, {'stream': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        body = b''.join(response.streaming_content)
+        self.assertTrue(body.endswith(b'\n'))
+        self.assertEqual([json.loads(line) for line in body.splitlines()], expected)
+        response = self.client.get(url, headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 5)
+        response = self.client.get(url, {'stream': 'json'})
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), expected)
+
+
+class ValuesPlanTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        hotel = create_hotel(name='Caf\u00e9 \u2028 "Grand"')
+        hotel.latitude, hotel.longitude = Decimal('18.5'), Decimal('73.856')
+        hotel.save()
+        create_hotel(name='Plain')
+        room = create_room(hotel, '101', price=Decimal('99.5'))
+        booking = Booking.objects.create(user=self.user, room=room, check_in_date=date(2030, 1, 1),
+                                         check_out_date=date(2030, 1, 3), guests=1)
+        Review.objects.create(user=self.user, hotel=hotel, booking=booking, rating=4, comment='Good')
+
+    def test_values_rows_render_like_the_serializers(self):
+        for model, serializer_class in ((Hotel, HotelSerializer), (Room, RoomSerializer),
+                                        (Booking, BookingSerializer), (Review, ReviewSerializer)):
+            plan = build_values_plan(serializer_class())
+            self.assertIsNotNone(plan)
+            for zone in ('UTC', 'Asia/Kolkata'):
+                with timezone.override(zone):
+                    expected = JSONRenderer().render(serializer_class(model.objects.order_by('pk'), many=True).data)
+                    rows = plan.dump(plan.apply(model.objects.order_by('pk')))
+                    self.assertEqual(FastJSONRenderer().render(rows), expected)
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.client.force_authenticate(self.user)
+        self.hotel = create_hotel(name='Pune Hotel')
+        room = create_room(self.hotel, '101')
+        Booking.objects.create(user=self.user, room=room, check_in_date=date(2030, 1, 1),
+                               check_out_date=date(2030, 1, 3), guests=1)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, ' '.join(query['sql'] for query in queries)
+
+    def test_selection_limits_columns_and_joins(self):
+        response, sql = self.get('/api/v1/hotels/?fields=id,name,rating')
+        self.assertEqual(list(response.data['results'][0]), ['id', 'name', 'rating'])
+        self.assertNotIn('"description"', sql)
+
+        response, sql = self.get('/api/v1/bookings/?exclude=room_details,user_email')
+        self.assertNotIn('room_details', response.data['results'][0])
+        self.assertNotIn('"app_room"', sql)
+        self.assertNotIn('"app_user"', sql)
+
+        response, sql = self.get('/api/v1/bookings/?fields=id,room_details.room_number')
+        self.assertEqual(response.data['results'][0]['room_details'], {'room_number': '101'})
+        self.assertNotIn('"app_hotel"', sql)
+
+    def test_expand_and_unknown_fields(self):
+        response, _ = self.get('/api/v1/rooms/?fields=id,hotel.name&expand=hotel')
+        self.assertEqual(response.data['results'][0]['hotel'], {'name': 'Pune Hotel'})
+        self.assertEqual(self.client.get(f'/api/v1/hotels/{self.hotel.pk}/?exclude=description').status_code, 200)
+        self.assertEqual(self.client.get('/api/v1/hotels/?fields=secret').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/hotels/?expand=rooms').status_code, 400)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class AsyncReadTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.token = self.client.post('/api/v1/public/user/login/', {
+            'email': 'guest@example.com', 'password': 'password123'}, format='json').json()['access']
+        for i in range(25):
+            hotel = create_hotel(name=f'Hotel {i:02}', city='Mumbai' if i % 2 else 'Pune')
+            room = create_room(hotel, str(i))
+            booking = Booking.objects.create(
+                user=self.user, room=room, check_in_date=date(2030, 1, 1), check_out_date=date(2030, 1, 3), guests=1)
+            Review.objects.create(user=self.user, hotel=hotel, booking=booking, rating=i % 5 + 1, comment='Fine')
+
+    def sync_get(self, urls, headers):
+        with override_settings(ROOT_URLCONF=SyncURLConf):
+            responses = [self.client.get(url, headers=headers) for url in urls]
+        return [(r.status_code, b''.join(r.streaming_content) if r.streaming else r.content) for r in responses]
+
+    @override_settings(ROOT_URLCONF=AsyncURLConf)
+    async def test_async_reads_match_the_sync_views(self):
+        hotel = await Hotel.objects.afirst()
+        urls = ['/api/v1/hotels/?ordering=-rating', '/api/v1/hotels/?page=2', f'/api/v1/hotels/{hotel.pk}/',
+                '/api/v1/hotels/0/', '/api/v1/rooms/?search=hotel',
+                '/api/v1/rooms/search_available/?city=mumbai&check_in=2030-01-02&check_out=2030-01-04',
+                '/api/v1/rooms/search_available/?city=pune&check_in=2030-01-05&check_out=2030-01-06&stream=ndjson',
+                '/api/v1/rooms/search_available/?check_in=2030-01-05&check_out=2030-01-08&ordering=-quoted_total',
+                f'/api/v1/hotels/{hotel.pk}/calendar/?from=2029-12-30&to=2030-01-05', '/api/v1/reviews/?page=1',
+                '/api/v1/reviews/']
+        headers = {'Authorization': f'Bearer {self.token}'}
+        served = []
+        for url in urls:
+            response = await AsyncClient().get(url, headers=headers)
+            body = b''.join([chunk async for chunk in response]) if response.streaming else response.content
+            served.append((response.status_code, body))
+        self.assertEqual([code for code, _ in served], [200, 200, 200, 404, 200, 200, 200, 200, 200, 200, 200])
+        self.assertEqual(served, await sync_to_async(self.sync_get)(urls, headers))
+        self.assertTrue(all(asyncio.iscoroutinefunction(resolve(url.split('?')[0]).func) for url in urls))
+
+
+class ReplicaRoutingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.client.force_authenticate(self.user)
+        self.room = create_room(create_hotel(), '101')
+
+    @override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+    def test_reads_use_replicas_until_the_user_writes(self):
+        with replica_reads(self.user.id):
+            self.assertIn(Hotel.objects.all().db, ['replica1', 'replica2'])
+            self.assertEqual(Hotel.objects.select_for_update().db, 'default')
+        self.assertEqual(Hotel.objects.all().db, 'default')
+
+        with override_settings(DATABASE_REPLICAS=[]):
+            response = self.client.post('/api/v1/bookings/', {
+                'room': self.room.pk, 'check_in_date': '2030-02-10', 'check_out_date': '2030-02-12', 'guests': 1})
+        self.assertEqual(response.status_code, 201)
+        with replica_reads(self.user.id):
+            self.assertEqual(Hotel.objects.all().db, 'default')
+        with replica_reads(self.user.id + 1):
+            self.assertNotEqual(Hotel.objects.all().db, 'default')
+
+
+class StatelessAuthTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        response = self.client.post('/api/v1/public/user/register/', {
+            'email': 'guest@example.com', 'name': 'Guest', 'password': 'password123', 'password2': 'password123'})
+        self.assertEqual(response.status_code, 201)
+        self.tokens = response.json()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+
+    def earlier_access_token(self, user):
+        issued = datetime.now(dt_timezone.utc) - timedelta(seconds=2)
+        with mock.patch('rest_framework_simplejwt.tokens.aware_utcnow', return_value=issued):
+            return issue_tokens(user)['access']
+
+    def test_authenticated_requests_skip_the_user_lookup(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/v1/bookings/').status_code, 200)
+        self.assertFalse([query for query in queries if 'FROM "app_user"' in query['sql']])
+
+        self.assertEqual(self.client.get('/api/v1/public/user/profile/').data['email'], 'guest@example.com')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/v1/public/user/profile/').data['name'], 'Guest')
+
+    def test_logout_revokes_tokens(self):
+        response = self.client.post('/api/v1/public/user/logout/', {'refresh': self.tokens['refresh']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/v1/bookings/').status_code, 401)
+
+    def test_deactivated_users_are_rejected(self):
+        token = self.earlier_access_token(User.objects.get(email='guest@example.com'))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        User.objects.filter(email='guest@example.com').update(is_active=False)
+        self.assertEqual(self.client.get('/api/v1/bookings/').status_code, 200)
+        user_cache.users.clear()  # as once USER_CACHE_TTL has passed
+        response = self.client.post('/api/v1/bookings/', {
+            'room': create_room(create_hotel(), '101').pk, 'check_in_date': '2030-01-01',
+            'check_out_date': '2030-01-02', 'guests': 1})
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Booking.objects.exists())
+        user = User.objects.get(email='guest@example.com')
+        user.save()
+        self.assertEqual(self.client.get('/api/v1/bookings/').status_code, 401)
+
+    def test_privilege_and_password_changes_revoke_tokens(self):
+        users = [User.objects.create_user(email=f'user{i}@example.com', name='User', password='password123')
+                 for i in range(3)]
+        tokens = [self.earlier_access_token(user) for user in users]
+        users[0].name = 'Renamed'
+        users[1].is_staff = True
+        users[2].set_password('password456')
+        for user, token, code in zip(users, tokens, [200, 401, 401]):
+            user.save()
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertEqual(self.client.get('/api/v1/bookings/').status_code, code)
+
+        response = self.client.post('/api/v1/public/user/login/', {
+            'email': 'user2@example.com', 'password': 'password456'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+        self.assertEqual(self.client.get('/api/v1/bookings/').status_code, 200)
+
+
+class HashingPoolTests(APITestCase):
+    def test_requests_beyond_the_queue_are_rejected(self):
+        pool = HashingPool(workers=1, queue=1)
+
+        async def storm():
+            return await asyncio.gather(*(pool.run(time.sleep, 0.05) for _ in range(3)), return_exceptions=True)
+        results = asyncio.run(storm())
+        self.assertEqual(sum(isinstance(result, HashingPoolBusy) for result in results), 1)
+        self.assertEqual(pool.in_flight, 0)
+
+    def test_login_hashes_in_the_pool(self):
+        User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        response = self.client.post('/api/v1/public/user/login/', {'email': 'guest@example.com', 'password': 'password123'},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+        response = self.client.post('/api/v1/public/user/login/', {'email': 'guest@example.com', 'password': 'wrong'},
+                                    format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    workers = 8
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('needs a database that accepts concurrent connections')
+        self.user = User.objects.create_user(email='guest@example.com', name='Guest', password='password123')
+        self.hotel = create_hotel()
+
+    def book(self, room):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        try:
+            return client.post('/api/v1/bookings/', {
+                'room': room.id, 'check_in_date': '2030-03-01', 'check_out_date': '2030-03-04', 'guests': 1,
+            }).status_code
+        finally:
+            connection.close()
+
+    def book_all(self, rooms, workers):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self.book, rooms))
+
+    def test_same_room_is_booked_exactly_once(self):
+        room = create_room(self.hotel, '1')
+        statuses = self.book_all([room] * 24, self.workers)
+        self.assertEqual(statuses.count(201), 1)
+        self.assertEqual(statuses.count(400), 23)
+        self.assertEqual(Booking.objects.filter(room=room).count(), 1)
+        self.assertEqual(RoomNight.objects.filter(room=room).count(), 3)
+
+    def test_distinct_rooms_book_in_parallel(self):
+        sequential_rooms = [create_room(self.hotel, f'S{i}') for i in range(24)]
+        parallel_rooms = [create_room(self.hotel, f'P{i}') for i in range(24)]
+        self.assertEqual(self.book_all(sequential_rooms, 1) + self.book_all(parallel_rooms, self.workers), [201] * 48)
+        self.assertEqual(RoomNight.objects.count(), 48 * 3)
+
+    def test_booking_throughput_is_reported(self):
+        for i in range(6):
+            create_room(self.hotel, f'T{i}')
+        with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+            results = booking_throughput(bookings=12, concurrency=4)
+        self.assertEqual([(entry['name'], entry['requests'], entry['errors']) for entry in results],
+                         [('bookings_distinct_c1', 12, 0), ('bookings_distinct_c4', 12, 0)])
+        self.assertGreater(results[-1]['speedup'], 0)
+        self.assertEqual(Booking.objects.count(), 24)
@@ -1,148 +1,343 @@
+import io
+import json
+from collections.abc import Mapping
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.contrib.auth import authenticate
 from app.serializers import UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework.permissions import IsAuthenticated
+from app.importer import CatalogImporter, detect_format
+from app.hashing import HashingPoolBusy, hashing_pool
+from app.authentication import issue_tokens, load_user, parse_refresh_token, revoke_token
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.parsers import MultiPartParser
 
 
-class UserRegistrationView(APIView):
-    def post(self, request):
-        serializer = UserRegistrationSerializer(data=request.data)
-        if serializer.is_valid(raise_exception=True):
-            user = serializer.save()
-            token = RefreshToken.for_user(user)
-            return Response({'msg' : "user registration succesful", 'refresh': str(token), 'access': str(token.access_token)}, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors , status=status.HTTP_400_BAD_REQUEST)
+def _request_data(request):
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+    return request.POST
+
+
+def _busy_response():
+    response = JsonResponse({'detail': 'Too many sign-in requests, retry shortly'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = '1'
+    return response
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class UserRegistrationView(View):
+    async def post(self, request):
+        data = _request_data(request)
+        if not isinstance(data, Mapping):
+            return JsonResponse({'detail': 'JSON parse error'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = UserRegistrationSerializer(data=data)
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            password = await hashing_pool.make_password(serializer.validated_data['password'])
+        except HashingPoolBusy:
+            return _busy_response()
+        user = await sync_to_async(serializer.save)(password=password)
+        return JsonResponse({'msg' : "user registration succesful", **issue_tokens(user)}, status=status.HTTP_201_CREATED)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class UserLoginView(View):
+    async def post(self, request):
+        data = _request_data(request)
+        if not isinstance(data, Mapping):
+            return JsonResponse({'detail': 'JSON parse error'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = UserLoginSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        email = serializer.data.get('email')
+        password = serializer.data.get('password')
+        user = await User.objects.filter(email=email).afirst()
+        try:
+            if user is None:
+                # hash anyway so unknown emails take as long as wrong passwords
+                await hashing_pool.make_password(password)
+            elif await hashing_pool.check_password(password, user.password) and user.is_active:
+                return JsonResponse({'msg' : "user login succesful", **issue_tokens(user)}, status=status.HTTP_200_OK)
+        except HashingPoolBusy:
+            return _busy_response()
+        return JsonResponse({'non_field_errors' : ["Your credentials are not match"]}, status=status.HTTP_404_NOT_FOUND)
 
+class CatalogImportView(APIView):
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
 
-class UserLoginView(APIView):
     def post(self, request):
-       serializer = UserLoginSerializer(data=request.data)
-       if serializer.is_valid(raise_exception=True):
-           email = serializer.data.get('email')
-           password = serializer.data.get('password')
-           user = authenticate(email = email, password = password)
-           if user is not None :
-               token = RefreshToken.for_user(user)
-               return Response({'msg' : "user login succesful", 'refresh': str(token), 'access': str(token.access_token) }, status=status.HTTP_200_OK) 
-           return Response({'non_field_errors' : ["Your credentials are not match"]}, status=status.HTTP_404_NOT_FOUND) 
-       return Response(serializer.errors , status=status.HTTP_400_BAD_REQUEST)
+        uploads = [(kind, request.FILES[kind]) for kind in ('hotels', 'rooms') if kind in request.FILES]
+        if not uploads:
+            return Response({'error': 'Upload a "hotels" and/or "rooms" file'}, status=status.HTTP_400_BAD_REQUEST)
+        importer = CatalogImporter()
+        reports = []
+        for kind, upload in uploads:
+            lines = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+            reports.append(importer.run(kind, lines, request.data.get('format') or detect_format(upload.name)).as_dict())
+        return Response({'reports': reports}, status=status.HTTP_200_OK)
+
+class OccupancyReportView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            window = parse_window(request.query_params, start=timezone.localdate() - timedelta(days=REPORT_NIGHTS),
+                                  nights=REPORT_NIGHTS, max_nights=MAX_REPORT_NIGHTS)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        options = report_options(request.query_params)
+        return Response({'from': window[0].isoformat(), 'to': window[1].isoformat(),
+                         'results': occupancy_report(*window, **options)})
 
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        serializer = UserProfileSerializer(request.user)
+        serializer = UserProfileSerializer(load_user(request.user))
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+class UserLogoutView(APIView):
+    permission_classes = [IsAuthenticated]
+    def post(self, request):
+        refresh = request.data.get('refresh')
+        if refresh:
+            try:
+                refresh = parse_refresh_token(refresh)
+            except TokenError:
+                return Response({'refresh': ['Token is invalid or expired']}, status=status.HTTP_400_BAD_REQUEST)
+            if refresh['user_id'] != request.user.id:
+                return Response({'refresh': ['Token belongs to another user']}, status=status.HTTP_400_BAD_REQUEST)
+            revoke_token(refresh)
+        if request.auth is not None:
+            revoke_token(request.auth)
+        return Response({'msg': "user logout succesful"}, status=status.HTTP_200_OK)
+
 
 
 
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
 from django.db.models import Q
-from datetime import datetime
-from app.serializers import HotelSerializer, RoomSerializer, BookingSerializer, ReviewSerializer
-from app.models import Hotel, Room, Booking, Review
+from datetime import timedelta
+from django.utils import timezone
+from app.serializers import HotelSerializer, RoomSerializer, BookingSerializer, ReviewSerializer, BulkBookingSerializer, BulkBookingItemSerializer
+from app.models import Hotel, Room, Booking, Review, User
+from app.availability import aavailable_room_ids, afilter_available_rooms, available_room_ids, filter_available_rooms, parse_stay
+from app.async_views import AsyncReadMixin
+from app.routing import ReplicaReadMixin
+from app.planning import QueryPlanMixin
+from app.caching import CachedReadMixin
+from app.pagination import CollectionPagination
+from app.streaming import NDJSONRenderer, arow_chunks, astreaming_response, row_chunks, streaming_response
+from app.calendars import ahotel_calendar, aroom_calendar, hotel_calendar, parse_window, room_calendar
+from app.rollups import MAX_REPORT_NIGHTS, REPORT_NIGHTS, occupancy_report, report_options
+from app.pricing import aquote_search, quote_options, quote_search, with_quotes
+from app.search import IndexedSearchFilter
+from app.amenities import AmenityFilter
+from app.ratings import RatingFilter
+from app.geo import GeoFilter
+from app.bookings import create_bookings, save_booking
+from django.db import transaction
+from rest_framework.settings import api_settings
 
-class HotelViewSet(viewsets.ModelViewSet):
+class HotelViewSet(ReplicaReadMixin, CachedReadMixin, AsyncReadMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Hotel.objects.all()
+    replica_actions = ['list', 'retrieve', 'calendar']
+    cache_scope = 'hotels'
     serializer_class = HotelSerializer
+    filter_backends = [filters.OrderingFilter, IndexedSearchFilter, AmenityFilter, RatingFilter, GeoFilter]
     filterset_fields = ['city', 'state', 'country']
     search_fields = ['name', 'description', 'city', 'amenities']
     ordering_fields = ['name', 'rating', 'created_at']
     ordering = ['name']
 
-class RoomViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def calendar(self, request, pk=None):
+        try:
+            window = parse_window(request.query_params)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(hotel_calendar(self.get_object(), *window))
+
+    async def acalendar(self, request, pk=None):
+        try:
+            window = parse_window(request.query_params)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(await ahotel_calendar(await self.aget_object(), *window))
+
+class RoomViewSet(ReplicaReadMixin, CachedReadMixin, AsyncReadMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Room.objects.all()
+    replica_actions = ['list', 'retrieve', 'search_available', 'calendar']
+    cache_scope = 'rooms'
     serializer_class = RoomSerializer
+    filter_backends = [IndexedSearchFilter, AmenityFilter]
     filterset_fields = ['hotel', 'room_type', 'is_available']
     search_fields = ['room_number', 'description', 'amenities']
     ordering_fields = ['price_per_night', 'max_occupancy', 'created_at']
     ordering = ['hotel', 'room_number']
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer])
     def search_available(self, request):
-        check_in = request.query_params.get('check_in')
-        check_out = request.query_params.get('check_out')
-        guests = request.query_params.get('guests')
-        city = request.query_params.get('city')
-        room_type = request.query_params.get('room_type')
-        min_price = request.query_params.get('min_price')
-        max_price = request.query_params.get('max_price')
+        try:
+            stay = parse_stay(request.query_params)
+        except ValueError:
+            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
 
-        queryset = self.get_queryset().filter(is_available=True)
+        options = quote_options(request.query_params, stay)
+        queryset = self.get_queryset()
+        room_ids = available_room_ids(queryset, request.query_params, stay)
+        if room_ids is None:
+            queryset = filter_available_rooms(queryset, request.query_params, stay)
+        else:
+            queryset = queryset.filter(pk__in=room_ids)
 
-        if city:
-            queryset = queryset.filter(hotel__city__icontains=city)
+        serialize, ids = self.serialize_list, None
+        if stay:
+            ids, totals = quote_search(queryset, stay, options)
+            serialize = with_quotes(serialize, totals)
+        chunks = row_chunks(self.list_queryset(queryset), ids=ids)
+        stream = self.stream_mode(request)
+        if stream:
+            return streaming_response(chunks, serialize, stream)
+        return Response(serialize([room for chunk in chunks for room in chunk]))
 
-        if room_type:
-            queryset = queryset.filter(room_type=room_type)
+    async def asearch_available(self, request):
+        try:
+            stay = parse_stay(request.query_params)
+        except ValueError:
+            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'},
+                          status=status.HTTP_400_BAD_REQUEST)
 
-        if min_price:
-            queryset = queryset.filter(price_per_night__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(price_per_night__lte=max_price)
+        options = quote_options(request.query_params, stay)
+        queryset = self.get_queryset()
+        room_ids = await aavailable_room_ids(queryset, request.query_params, stay)
+        if room_ids is None:
+            queryset = await afilter_available_rooms(queryset, request.query_params, stay)
+        else:
+            queryset = queryset.filter(pk__in=room_ids)
 
-        if guests:
-            queryset = queryset.filter(max_occupancy__gte=guests)
+        serialize, ids = self.serialize_list, None
+        if stay:
+            ids, totals = await aquote_search(queryset, stay, options)
+            serialize = with_quotes(serialize, totals)
+        chunks = arow_chunks(self.list_queryset(queryset), ids=ids)
+        stream = self.stream_mode(request)
+        if stream:
+            return astreaming_response(chunks, serialize, stream)
+        return Response(serialize([room async for chunk in chunks for room in chunk]))
 
-        if check_in and check_out:
-            try:
-                check_in_date = datetime.strptime(check_in, '%Y-%m-%d').date()
-                check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
-                
-                overlapping_bookings = Booking.objects.filter(
-                    status__in=['pending', 'confirmed'],
-                    check_in_date__lt=check_out_date,
-                    check_out_date__gt=check_in_date
-                ).values_list('room_id', flat=True)
-                
-                queryset = queryset.exclude(id__in=overlapping_bookings)
-            except ValueError:
-                return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, 
-                              status=status.HTTP_400_BAD_REQUEST)
-
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
-
-class BookingViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def calendar(self, request, pk=None):
+        try:
+            window = parse_window(request.query_params)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(room_calendar(self.get_object(), *window))
+
+    async def acalendar(self, request, pk=None):
+        try:
+            window = parse_window(request.query_params)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(await aroom_calendar(await self.aget_object(), *window))
+
+    def stream_mode(self, request):
+        stream = request.query_params.get('stream')
+        if stream is None and request.accepted_renderer.format == NDJSONRenderer.format:
+            stream = 'ndjson'
+        return stream if stream in ('ndjson', 'json') else None
+
+class BookingViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CollectionPagination
     filterset_fields = ['status', 'room__hotel']
     ordering_fields = ['created_at', 'check_in_date', 'check_out_date']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        return Booking.objects.filter(user=self.request.user)
+        return self.plan_queryset(Booking.objects.filter(user_id=self.request.user.id))
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        save_booking(serializer, user=load_user(self.request.user))
+
+    def perform_update(self, serializer):
+        save_booking(serializer)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        payload = BulkBookingSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        items, errors = {}, {}
+        for index, item in enumerate(payload.validated_data['bookings']):
+            serializer = BulkBookingItemSerializer(data=item)
+            if serializer.is_valid():
+                items[index] = serializer.validated_data
+            else:
+                errors[index] = serializer.errors
+
+        created = create_bookings(load_user(request.user), items, errors, atomic=payload.validated_data['atomic'])
+        data = dict(zip(created, self.get_serializer(list(created.values()), many=True).data))
+        results = []
+        for index in range(len(payload.validated_data['bookings'])):
+            if index in data:
+                results.append({'index': index, 'status': 'created', 'booking': data[index]})
+            elif index in errors:
+                results.append({'index': index, 'status': 'error', 'errors': errors[index]})
+            else:
+                results.append({'index': index, 'status': 'skipped'})
+
+        if not created:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif errors:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({'created': len(created), 'failed': len(errors), 'results': results}, status=response_status)
 
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         booking = self.get_object()
-        if booking.status in ['pending', 'confirmed']:
+        if booking.status in Booking.ACTIVE_STATUSES:
             booking.status = 'cancelled'
             booking.save()
             return Response({'message': 'Booking cancelled successfully'})
         return Response({'error': 'Cannot cancel this booking'}, 
                        status=status.HTTP_400_BAD_REQUEST)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ReplicaReadMixin, AsyncReadMixin, QueryPlanMixin, viewsets.ModelViewSet):
+    replica_actions = ['list']
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CollectionPagination
     filterset_fields = ['hotel', 'rating']
     ordering_fields = ['created_at', 'rating']
     ordering = ['-created_at']
 
     def get_queryset(self):
         if self.action == 'list':
-            return Review.objects.all()
-        return Review.objects.filter(user=self.request.user)
+            return self.plan_queryset(Review.objects.all())
+        return self.plan_queryset(Review.objects.filter(user_id=self.request.user.id))
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # the Review signals keep the hotel's rating aggregates in step
+        with transaction.atomic():
+            serializer.save(user=load_user(self.request.user))
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
 